@@ -0,0 +1,89 @@
+"""
+\file       bench_fleet.py
+\brief      Throughput, lag and merged map accuracy of fleet.py on a synthetic fleet
+            Each vehicle drives the bench_scan_matcher.py laps starting at a different
+            point of the oval; all of their scans are submitted to a FusionPool as fast
+            as the pool takes them, once per worker count. Reports scans/s, receive ->
+            fused lag and each vehicle's final global pose error (its true start pose is
+            given to the merger, like --start on server.py).
+            Throughput only scales with workers up to the number of free cores.
+            Run:  python bench_fleet.py [--vehicles 4] [--scans 200] [--workers 1 2 4]
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import math
+import os
+import time
+import numpy as np
+from bench_scan_matcher import cast, trajectory, walls
+from fleet import FusionPool
+
+""" [Constants] """
+SESSION = 0xF1EE7
+BATCH = 8  # Scans per vehicle between flushes (server.py flushes once per decoded batch)
+
+
+def drives(vehicles, scans, rng):
+    """:return: {vehicle: (true poses, distances, odometry)}, vehicles spread evenly around one lap"""
+    a, b = walls()
+    lap = trajectory(scans * vehicles + scans)
+    fleet = {}
+    for vehicle in range(1, vehicles + 1):
+        offset = (vehicle - 1) * scans
+        truth = lap[offset:offset + scans]
+        distances = [cast(a, b, pose, rng).astype(np.float32) for pose in truth]
+        odometry = [0.0] + [math.hypot(p[0] - q[0], p[1] - q[1]) for p, q in zip(truth[1:], truth)]
+        fleet[vehicle] = (truth, distances, odometry)
+    return fleet
+
+
+def run(fleet, workers, scans):
+    starts = {vehicle: truth[0] for vehicle, (truth, _, _) in fleet.items()}
+    pool = FusionPool(workers=workers, starts=starts, period=0.25)
+    pool.flush()
+    start = time.perf_counter()
+    for first in range(0, scans, BATCH):
+        for vehicle, (_, distances, odometry) in fleet.items():
+            for i in range(first, min(first + BATCH, scans)):
+                pool.submit(vehicle, SESSION, distances[i], odometry[i], time.perf_counter())
+        pool.flush()
+    pool.close(timeout=600.0)
+    elapsed = time.perf_counter() - start
+    points, poses = pool.merger.merge()
+    snapshots = {key[0]: stats.snapshot for key, stats in pool.vehicles.items()}
+    return elapsed, points, poses, snapshots
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fleet fusion benchmark')
+    parser.add_argument('--vehicles', type=int, default=4)
+    parser.add_argument('--scans', type=int, default=200, help='scans per vehicle')
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help='worker counts to run (default 1, 2, 4 ... up to the vehicles)')
+    args = parser.parse_args()
+
+    worker_counts = args.workers or sorted({min(1 << k, args.vehicles) for k in range(args.vehicles.bit_length() + 1)})
+    fleet = drives(args.vehicles, args.scans, np.random.default_rng(25))
+    total = args.vehicles * args.scans
+    print(f"{args.vehicles} vehicles x {args.scans} scans, {os.cpu_count()} cpu(s)")
+    baseline = None
+    for workers in worker_counts:
+        elapsed, points, poses, snapshots = run(fleet, workers, args.scans)
+        rate = total / elapsed
+        baseline = baseline or rate
+        lag = max(snapshot.max_lag_ms for snapshot in snapshots.values())
+        print(f"workers {workers}: {rate:.0f} scans/s ({rate / baseline:.2f}x)  max lag {lag:.0f} ms  "
+              f"merged cells {points.shape[0]}")
+    for (vehicle, _), pose in sorted(poses.items()):
+        true = fleet[vehicle][0][-1]
+        error = math.hypot(pose[0] - true[0], pose[1] - true[1])
+        heading_error = abs((pose[2] - true[2] + 180) % 360 - 180)
+        print(f"vehicle {vehicle}: final global pose error {error:.0f} mm, {heading_error:.1f} deg")
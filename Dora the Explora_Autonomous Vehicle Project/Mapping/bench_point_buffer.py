@@ -0,0 +1,104 @@
+"""
+\file       bench_point_buffer.py
+\brief      Per-frame latency of map point accumulation at different drive lengths
+            Compares the old rebuild-everything loop from map.py with PointBuffer.
+            The buffer column is the cost of keeping every point (test_parse.py's
+            headless replay); map.py itself now only appends to the viewer's
+            LevelOfDetail copy, which is capped at LOD_BUDGET points
+            Run:  python bench_point_buffer.py [--scans 1000 10000 100000]
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import time
+import numpy as np
+from point_buffer import PointBuffer
+from scan_convert import polar_to_cartesian
+
+try:
+    import open3d as o3d
+except ImportError:
+    o3d = None
+
+POINT_COLOR = [1, 0, 0]
+
+
+def make_scan(rng, points_per_scan):
+    distances = np.zeros(360)
+    distances[rng.choice(360, points_per_scan, replace=False)] = rng.uniform(150, 6000, points_per_scan)
+    return distances
+
+
+def time_frames(frame, frames):
+    """Runs frame() `frames` times and returns the mean latency in ms."""
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def bench_legacy(history, scan, frames):
+    # Same work as the original map.py loop minus the visualizer calls
+    all_points = list(history)
+    translation = [0, 0, 0]
+
+    def frame():
+        all_points.extend(polar_to_cartesian(scan, translation))
+        points = np.array(all_points)
+        colors = np.tile(POINT_COLOR, (len(all_points), 1))
+        if o3d is not None:
+            pcd = o3d.geometry.PointCloud()
+            pcd.points = o3d.utility.Vector3dVector(points)
+            pcd.colors = o3d.utility.Vector3dVector(colors)
+    return time_frames(frame, frames)
+
+
+def bench_buffer(history, scan, frames):
+    buffer = PointBuffer()
+    buffer.append(history)
+    translation = [0, 0, 0]
+    pcd = None
+    if o3d is not None:
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(history)
+        pcd.colors = o3d.utility.Vector3dVector(np.tile(POINT_COLOR, (history.shape[0], 1)))
+
+    def frame():
+        new_points = polar_to_cartesian(scan, translation)
+        buffer.append(new_points)
+        if pcd is not None:
+            pcd.points.extend(o3d.utility.Vector3dVector(new_points))
+            pcd.colors.extend(o3d.utility.Vector3dVector(np.tile(POINT_COLOR, (new_points.shape[0], 1))))
+    return time_frames(frame, frames)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scans', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='accumulated scan counts to measure at')
+    parser.add_argument('--points-per-scan', type=int, default=300)
+    parser.add_argument('--frames', type=int, default=20, help='frames timed per measurement')
+    parser.add_argument('--legacy-max', type=int, default=10000,
+                        help='skip the legacy path above this many scans (it takes seconds per frame)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scan = make_scan(rng, args.points_per_scan)
+    print(f"Open3D geometry update: {'on' if o3d is not None else 'off (open3d not installed)'}")
+    print(f"{'scans':>8} {'points':>11} {'legacy ms/frame':>16} {'buffer ms/frame':>16}")
+    for scans in args.scans:
+        history = rng.uniform(-6000, 6000, (scans * args.points_per_scan, 3))
+        history[:, 2] = 0
+        buffer_ms = bench_buffer(history, scan, args.frames)
+        if scans <= args.legacy_max:
+            legacy = f"{bench_legacy(history, scan, max(1, args.frames // 10)):16.3f}"
+        else:
+            legacy = f"{'skipped':>16}"
+        print(f"{scans:>8} {history.shape[0]:>11} {legacy} {buffer_ms:16.3f}")
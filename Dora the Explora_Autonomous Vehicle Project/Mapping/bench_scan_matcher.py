@@ -0,0 +1,151 @@
+"""
+\file       bench_scan_matcher.py
+\brief      Accuracy and per-scan cost of scan_matcher.py on a synthetic drive
+            Scans are ray-cast in a rectangular room with a few boxes in it, from laps of
+            an oval path (straights and 180 degree turns); odometry gets the distance only
+            (with scale noise). Compares the matched poses with dead reckoning at a fixed heading
+            (the old map.py), and with --check also compares branch and bound against an
+            exhaustive search of the same window.
+            Run:  python bench_scan_matcher.py [--scans 300] [--check 20]
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import math
+import numpy as np
+import scan_matcher
+from scan_matcher import ScanMatcher, predict
+
+""" [Constants] """
+ROOM = (12000.0, 8000.0)  # mm
+BOXES = ((6000, 3900, 600), (4500, 3900, 300), (1000, 1000, 400), (11000, 7000, 500))  # centre x, y, half size
+SCAN_RATE = 10  # Scans per second
+SPEED = 1000.0  # mm/s
+STRAIGHT_SCANS = 60  # Scans per straight (6 m)
+TURN_RATE = 3.0  # Degrees per scan in the turns (60 scans per 180 degrees, ~1.9 m radius)
+ODOMETRY_NOISE = 0.03  # Relative error of each distance reading
+RANGE_NOISE = 10.0  # mm
+
+
+def walls():
+    w, h = ROOM
+    corners = [((0, 0), (w, 0)), ((w, 0), (w, h)), ((w, h), (0, h)), ((0, h), (0, 0))]
+    for x, y, s in BOXES:
+        box = [(x - s, y - s), (x + s, y - s), (x + s, y + s), (x - s, y + s)]
+        corners += [(box[i], box[(i + 1) % 4]) for i in range(4)]
+    segments = np.array(corners, dtype=np.float64)
+    return segments[:, 0], segments[:, 1]
+
+
+def cast(a, b, pose, rng):
+    """:return: 360 distances seen from pose (x, y, heading), index a at heading - 90 + a degrees"""
+    bearings = np.radians(pose[2] - 90.0 + np.arange(360))
+    dx = np.cos(bearings)[:, None]
+    dy = np.sin(bearings)[:, None]
+    e = b - a
+    ax = a[:, 0] - pose[0]
+    ay = a[:, 1] - pose[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = dx * e[:, 1] - dy * e[:, 0]
+        t = (ax * e[:, 1] - ay * e[:, 0]) / denom
+        u = (ax * dy - ay * dx) / denom
+    t = np.where((t > 0) & (u >= 0) & (u <= 1), t, np.inf).min(axis=1)
+    t[~np.isfinite(t)] = 0.0
+    hit = t > 0
+    t[hit] += rng.normal(0.0, RANGE_NOISE, int(hit.sum()))
+    return t
+
+
+def trajectory(scans):
+    """:return: list of true poses, counter-clockwise laps around the boxes in the middle"""
+    poses = [(3000.0, 2000.0, 0.0)]
+    step = SPEED / SCAN_RATE
+    turn_scans = int(round(180.0 / TURN_RATE))
+    for i in range(1, scans):
+        x, y, heading = poses[-1]
+        if i % (STRAIGHT_SCANS + turn_scans) >= STRAIGHT_SCANS:
+            heading += TURN_RATE
+        x += step * math.cos(math.radians(heading))
+        y += step * math.sin(math.radians(heading))
+        poses.append((x, y, heading % 360))
+    return poses
+
+
+def exhaustive(matcher, distances, guess):
+    """Best pose over the full window at full resolution (what branch and bound must find)."""
+    grids = matcher._grids
+    scan = scan_matcher.polar_to_cartesian(np.where(distances <= matcher.max_range, distances, 0.0), (0.0, 0.0))
+    reach = max(float(np.hypot(scan[:, 0], scan[:, 1]).max()), matcher.resolution)
+    step = math.degrees(math.acos(1 - matcher.resolution ** 2 / (2 * reach * reach)))
+    count = int(math.ceil(matcher.angular_window / step))
+    headings = guess[2] + np.arange(-count, count + 1) * (matcher.angular_window / max(count, 1))
+    window = int(math.ceil(matcher.linear_window / matcher.resolution))
+    ox, oy = np.meshgrid(np.arange(-window, window + 1), np.arange(-window, window + 1), indexing='ij')
+    best = (-1.0, None)
+    for heading in headings:
+        rotation = math.radians(heading - 90.0)
+        x = math.cos(rotation) * scan[:, 0] - math.sin(rotation) * scan[:, 1] + guess[0]
+        y = math.sin(rotation) * scan[:, 0] + math.cos(rotation) * scan[:, 1] + guess[1]
+        cx, cy = grids.cells(x, y)
+        scores = grids.score(0, cx, cy, ox.ravel(), oy.ravel())
+        k = int(np.argmax(scores))
+        if scores[k] > best[0]:
+            best = (float(scores[k]), heading)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scan matcher benchmark')
+    parser.add_argument('--scans', type=int, default=300)
+    parser.add_argument('--check', type=int, default=0, help='compare with an exhaustive search on this many scans')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(195)
+    a, b = walls()
+    truth = trajectory(args.scans)
+    matcher = ScanMatcher(pose=truth[0])
+    dead_reckoning = truth[0]
+    times = []
+    matcher_error = []
+    dead_error = []
+    checked = mismatches = 0
+    for i, pose in enumerate(truth):
+        distances = cast(a, b, pose, rng)
+        travelled = 0.0 if i == 0 else math.hypot(pose[0] - truth[i - 1][0], pose[1] - truth[i - 1][1])
+        odometry = travelled * (1 + rng.normal(0.0, ODOMETRY_NOISE))
+        if checked < args.check and i > 0 and matcher._submap:
+            guess = predict(matcher.pose, odometry)
+            if matcher._grids is None:
+                matcher._grids = scan_matcher.LikelihoodGrids(np.concatenate(matcher._submap), matcher.resolution,
+                                                              matcher.sigma, matcher.levels)
+            reference = exhaustive(matcher, distances, guess)
+        else:
+            reference = None
+        result = matcher.match(distances, odometry)
+        if reference is not None:
+            checked += 1
+            if result.matched and abs(result.score - reference[0]) > 1e-9:
+                mismatches += 1
+        dead_reckoning = predict((dead_reckoning[0], dead_reckoning[1], truth[0][2]), odometry)
+        times.append(result.match_ms)
+        matcher_error.append(math.hypot(result.pose[0] - pose[0], result.pose[1] - pose[1]))
+        dead_error.append(math.hypot(dead_reckoning[0] - pose[0], dead_reckoning[1] - pose[1]))
+
+    times = np.array(times[1:])
+    stats = matcher.stats()
+    print(f"{args.scans} scans, {stats['matched']} matched")
+    print(f"match time: p50 {np.percentile(times, 50):.2f} ms  p99 {np.percentile(times, 99):.2f} ms  "
+          f"max {times.max():.2f} ms  (budget {1000 / SCAN_RATE:.0f} ms)")
+    print(f"position error: scan matching mean {np.mean(matcher_error):.0f} mm, final {matcher_error[-1]:.0f} mm  |  "
+          f"fixed heading dead reckoning mean {np.mean(dead_error):.0f} mm, final {dead_error[-1]:.0f} mm")
+    heading_error = abs((matcher.pose[2] - truth[-1][2] + 180) % 360 - 180)
+    print(f"final heading error: {heading_error:.1f} deg")
+    if args.check:
+        print(f"branch and bound vs exhaustive search: {checked - mismatches}/{checked} scores identical")
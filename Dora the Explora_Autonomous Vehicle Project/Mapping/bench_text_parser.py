@@ -0,0 +1,128 @@
+"""
+\file       bench_text_parser.py
+\brief      Lines/second of the bulk text log parser vs the old per-line parse_data
+            Run:  python bench_text_parser.py [data.txt] [--lines 20000]
+            Without a log file a synthetic one is generated in memory.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import io
+import time
+import numpy as np
+import scan_text_parser
+
+""" [Constants] """
+EDGE_TOKENS = ['0', '5.', '.5', '.', '', '1234.25', '12345678', '123456789', '-1', '1.2.3', '1e3']  # '.', '' and '1.2.3' must be rejected
+EQUIVALENCE_LINES = 2000  # Lines of the benchmark log also checked against the legacy parser
+
+
+def legacy_parse_data(input_str):
+    # The per-line parser previously copied in plot.py and test_parse.py (prints removed)
+    try:
+        parts = input_str.split(' ', 1)
+        if len(parts) < 2:
+            return None, None, None
+        angle_distance_parts = parts[0].strip('{}').split(',')
+        if len(angle_distance_parts) < 2:
+            return None, None, None
+        angle = float(angle_distance_parts[0])
+        distance_travelled = float(angle_distance_parts[1])
+        distances_str = parts[1].strip('[]').strip()
+        if not distances_str:
+            return angle, distance_travelled, []
+        distances = list(map(float, distances_str.split(',')))
+        return angle, distance_travelled, distances
+    except Exception:
+        return None, None, None
+
+
+def edge_case_log(token):
+    """
+    :param token <str>: Unusual distance token, alone in a block of valid scans
+    :return: text log
+    """
+    distances = [str(d) for d in range(scan_text_parser.FIELDS - 2)]
+    valid = '{90,1.5} [%s]\n' % ', '.join(distances)
+    distances[7] = token
+    return valid + '{90,1.5} [%s]\n' % ', '.join(distances) + valid
+
+
+def check_equivalence(text):
+    """
+    Parses `text` with both parsers; full length scans the legacy parser accepts must come
+    out of iter_batches with the same values, and the lines it rejects must be skipped.
+
+    :return: list of mismatch descriptions, empty if the parsers agree
+    """
+    legacy = []
+    for line in io.StringIO(text):
+        angle, distance_travelled, distances = legacy_parse_data(line.strip())
+        if angle is not None and len(distances) == scan_text_parser.FIELDS - 2:
+            legacy.append([angle, distance_travelled] + distances)
+    bulk = [np.column_stack((batch.angle, batch.distance_travelled, batch.distances))
+            for batch in scan_text_parser.iter_batches(io.BytesIO(text.encode()))]
+    bulk = np.concatenate(bulk) if bulk else np.empty((0, scan_text_parser.FIELDS))
+    legacy = np.array(legacy).reshape(-1, scan_text_parser.FIELDS)
+    if legacy.shape != bulk.shape:
+        return [f"legacy kept {legacy.shape[0]} scans, iter_batches {bulk.shape[0]}"]
+    return [f"scan {row}: legacy {legacy[row, :3]} iter_batches {bulk[row, :3]}"
+            for row in np.flatnonzero((legacy != bulk).any(axis=1))]
+
+
+def synthetic_log(lines):
+    rng = np.random.default_rng(0)
+    out = io.StringIO()
+    for i in range(lines):
+        distances = np.round(rng.uniform(0, 6000, 360), 2)
+        distances[rng.random(360) < 0.2] = 0
+        out.write('{90,%.2f} [%s]\n' % (i % 7, ', '.join(map(str, distances))))
+    return out.getvalue()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Text scan log parser benchmark')
+    parser.add_argument('log', nargs='?', help='text scan log (synthetic if omitted)')
+    parser.add_argument('--lines', type=int, default=20000, help='synthetic log size')
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log, 'r') as fp:
+            text = fp.read()
+    else:
+        text = synthetic_log(args.lines)
+    print(f"{text.count(chr(10))} lines, {len(text) / 1e6:.1f} MB")
+
+    head = ''.join(text.splitlines(keepends=True)[:EQUIVALENCE_LINES])
+    mismatches = check_equivalence(head)
+    for token in EDGE_TOKENS:
+        mismatches += [f"token {token!r}: {mismatch}" for mismatch in check_equivalence(edge_case_log(token))]
+    print(f"equivalence: {'ok' if not mismatches else 'FAILED'}")
+    for mismatch in mismatches:
+        print(f"  {mismatch}")
+
+    start = time.perf_counter()
+    legacy_rows = 0
+    for line in io.StringIO(text):
+        angle, distance_travelled, distances = legacy_parse_data(line.strip())
+        if angle is not None:
+            legacy_rows += 1
+    legacy_s = time.perf_counter() - start
+
+    stats = scan_text_parser.ParseStats()
+    start = time.perf_counter()
+    bulk_rows = 0
+    for batch in scan_text_parser.iter_batches(io.BytesIO(text.encode()), stats=stats):
+        bulk_rows += batch.angle.shape[0]
+    bulk_s = time.perf_counter() - start
+
+    print(f"legacy parse_data : {legacy_rows / legacy_s:12,.0f} lines/s ({legacy_rows} scans, {legacy_s:.2f}s)")
+    print(f"iter_batches      : {bulk_rows / bulk_s:12,.0f} lines/s ({bulk_rows} scans, {bulk_s:.2f}s)")
+    print(f"speedup x{legacy_s / bulk_s:.1f}  {stats}")
@@ -0,0 +1,355 @@
+"""
+\file       fleet.py
+\brief      Multi-vehicle map fusion for server.py --fleet
+            Scans are keyed by (vehicle, session) from the scan frame and each key gets
+            its own pose and local map:
+
+              * FusionPool (server process) assigns every key to one fusion worker
+                process for its whole life (least loaded worker first) and forwards its
+                scans there in batches
+              * fusion_worker runs a VehicleFusion per key (scan_filter -> scan_matcher
+                pose -> occupancy grid, the same chain as map.py) and every
+                SNAPSHOT_PERIOD sends back the pose, counters and occupied cells of the
+                keys that changed
+              * MapMerger places each local map in the global frame at its vehicle's
+                start pose and unions the occupied cells into one global map
+
+            Only scans (in) and snapshots (out) cross processes, so vehicles on different
+            workers fuse in parallel and throughput grows with workers up to the number of
+            vehicles. Local maps start at each vehicle's own origin; the global frame comes
+            from the start poses (--start on server.py), there is no matching between
+            vehicles' maps.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+from collections import namedtuple
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import traceback
+import numpy as np
+from occupancy_grid import OccupancyGrid
+from scan_filter import ScanFilter
+from scan_matcher import ScanMatcher, transform_points
+
+""" [Constants] """
+MAP_RESOLUTION = 50.0  # Local and global grid cell size (mm)
+SNAPSHOT_PERIOD = 1.0  # Seconds between local map snapshots from a worker
+START_POSE = (0.0, 0.0, 90.0)  # Global pose (x, y, heading) of a vehicle with no --start
+
+FusionSnapshot = namedtuple('FusionSnapshot', ['key', 'pose', 'fused', 'mapped', 'errors', 'lag_ms', 'max_lag_ms',
+                                               'match_ms', 'filter_ratio', 'points'])
+"""
+key           (vehicle, session)
+pose          (x, y, heading) in the vehicle's local frame
+fused         scans taken off the worker queue so far
+mapped        scans inserted into the local map (stationary scans are skipped, like map.py)
+errors        scans that raised while being fused (counted in fused, not mapped)
+lag_ms        median receive -> fused time over the scans since the previous snapshot
+max_lag_ms    max of the same
+match_ms      mean scan match time
+filter_ratio  points kept by the scan filter
+points        (M, 3) float32 occupied cell centers of the local map
+"""
+
+
+class VehicleFusion:
+    """Pose and local map of one (vehicle, session), inside a fusion worker."""
+    def __init__(self, key, resolution=MAP_RESOLUTION):
+        self.key = key
+        self.filter = ScanFilter()
+        self.matcher = ScanMatcher(pose=(0.0, 0.0, 90.0))
+        self.grid = OccupancyGrid(resolution=resolution)
+        self.fused = 0
+        self.mapped = 0
+        self.errors = 0
+        self.lags = []
+        self.changed = False
+
+    def fuse(self, distances, car_distance, received_at):
+        if car_distance != 0 or self.mapped == 0:
+            distances = self.filter.apply(distances)
+            result = self.matcher.match(distances, car_distance)
+            self.grid.insert(result.points, result.pose)
+            self.mapped += 1
+        self.fused += 1
+        # perf_counter is system wide (CLOCK_MONOTONIC on Linux), so it compares across processes
+        self.lags.append(time.perf_counter() - received_at)
+        self.changed = True
+
+    def failed(self):
+        """Counts a scan that raised in fuse() as taken off the queue, without mapping it."""
+        self.fused += 1
+        self.errors += 1
+        self.changed = True
+
+    def snapshot(self):
+        lags = np.array(self.lags) * 1e3 if self.lags else np.zeros(1)
+        self.lags = []
+        self.changed = False
+        return FusionSnapshot(self.key, self.matcher.pose, self.fused, self.mapped, self.errors, float(np.median(lags)),
+                              float(lags.max()), self.matcher.stats()['mean_ms'], self.filter.ratio,
+                              self.grid.occupied_centers().astype(np.float32))
+
+
+def fusion_worker(inbox, outbox, resolution=MAP_RESOLUTION, period=SNAPSHOT_PERIOD):
+    """
+    Fusion worker process: fuses batches of (key, received_at, distances, car_distance)
+    from `inbox` until it gets None, sending FusionSnapshots of changed keys to `outbox`.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the whole process group, the server stops us
+    vehicles = {}
+    next_snapshot = time.perf_counter() + period
+    running = True
+    while running:
+        try:
+            batch = inbox.get(timeout=max(0.0, next_snapshot - time.perf_counter()))
+        except queue.Empty:
+            batch = ()
+        if batch is None:
+            running = False
+            batch = ()
+        for key, received_at, distances, car_distance in batch:
+            fusion = vehicles.get(key)
+            if fusion is None:
+                fusion = vehicles[key] = VehicleFusion(key, resolution)
+            try:
+                fusion.fuse(distances, car_distance, received_at)
+            except Exception:
+                # One bad scan must not kill the worker and with it every vehicle assigned here
+                fusion.failed()
+                if fusion.errors == 1:
+                    traceback.print_exc()
+        if not running or time.perf_counter() >= next_snapshot:
+            for fusion in vehicles.values():
+                if fusion.changed:
+                    outbox.put(fusion.snapshot())
+            next_snapshot = time.perf_counter() + period
+    outbox.put(None)
+
+
+class VehicleStats:
+    """Server side counters of one (vehicle, session)."""
+    def __init__(self, key, worker):
+        self.key = key
+        self.worker = worker
+        self.received = 0
+        self.dropped = 0  # Scans lost because the vehicle's worker process died
+        self.snapshot = None  # Newest FusionSnapshot
+        self._rate_count = 0
+        self._rate_time = time.perf_counter()
+        self.rate = 0.0  # Scans/s received over the last summary period
+
+    def summary(self, now):
+        elapsed = now - self._rate_time
+        if elapsed > 0:
+            self.rate = (self.received - self._rate_count) / elapsed
+        self._rate_count = self.received
+        self._rate_time = now
+        snap = self.snapshot
+        fused = snap.fused if snap else 0
+        line = (f"vehicle {self.key[0]} session {self.key[1]:08x} worker {self.worker}: "
+                f"ingest {self.rate:.1f} scans/s  received {self.received} fused {fused} "
+                f"backlog {self.received - self.dropped - fused}")
+        if self.dropped:
+            line += f"  dropped {self.dropped} (worker died)"
+        if snap and snap.errors:
+            line += f"  errors {snap.errors}"
+        if snap:
+            line += (f"  lag p50 {snap.lag_ms:.1f}ms max {snap.max_lag_ms:.1f}ms  match {snap.match_ms:.1f}ms  "
+                     f"pose ({snap.pose[0]:.0f}, {snap.pose[1]:.0f}, {snap.pose[2]:.1f})  cells {snap.points.shape[0]}")
+        return line
+
+
+class MapMerger:
+    """
+    Global map: the union of every vehicle's occupied cells, each local map placed at
+    its vehicle's start pose (local heading 90 = the start heading).
+    """
+    def __init__(self, resolution=MAP_RESOLUTION, starts=None):
+        self.resolution = resolution
+        self.starts = dict(starts or {})  # vehicle -> (x, y, heading)
+        self._snapshots = {}
+
+    def update(self, snapshot):
+        self._snapshots[snapshot.key] = snapshot
+
+    def start(self, vehicle):
+        return self.starts.get(vehicle, START_POSE)
+
+    def global_pose(self, snapshot):
+        """:return: snapshot.pose in the global frame"""
+        start = self.start(snapshot.key[0])
+        x, y = transform_points(np.array([snapshot.pose[:2]]), start)[0, :2]
+        return (float(x), float(y), (snapshot.pose[2] + start[2] - 90.0) % 360)
+
+    def merge(self):
+        """
+        :return: ((M, 3) occupied cell centers, {key: global pose})
+        """
+        parts = []
+        poses = {}
+        for key, snapshot in self._snapshots.items():
+            parts.append(transform_points(snapshot.points, self.start(key[0])))
+            poses[key] = self.global_pose(snapshot)
+        if not parts:
+            return np.zeros((0, 3)), poses
+        cells = np.floor(np.concatenate(parts)[:, :2] / self.resolution).astype(np.int64)
+        cells = np.unique((cells[:, 0] << 32) | (cells[:, 1] & 0xFFFFFFFF))
+        x = cells >> 32
+        y = (cells & 0xFFFFFFFF).astype(np.int64)
+        y[y >= 1 << 31] -= 1 << 32
+        points = np.zeros((cells.shape[0], 3))
+        points[:, 0] = (x + 0.5) * self.resolution
+        points[:, 1] = (y + 0.5) * self.resolution
+        return points, poses
+
+
+def save_map(path, points, poses):
+    """Writes the merged map (.npz: points, keys, poses) atomically, readers never see half a file."""
+    keys = np.array(list(poses.keys()), dtype=np.int64).reshape(-1, 2)
+    pose_array = np.array(list(poses.values()), dtype=np.float64).reshape(-1, 3)
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, points=points, keys=keys, poses=pose_array)
+    os.replace(tmp, path)
+
+
+class FusionPool:
+    """
+    Routes scans to per-vehicle fusion workers and merges their local maps.
+
+        pool = FusionPool(workers=4)
+        pool.submit(vehicle, session, distances, car_distance, received_at)   # decode thread
+        pool.flush()                                                         # after each decoded batch
+        points, poses = pool.merge()                                         # merge stage, periodically
+        pool.close()
+    """
+    def __init__(self, workers=None, resolution=MAP_RESOLUTION, starts=None, period=SNAPSHOT_PERIOD):
+        self.workers = workers or os.cpu_count() or 1
+        self.merger = MapMerger(resolution, starts)
+        self.vehicles = {}  # (vehicle, session) -> VehicleStats
+        self._lock = threading.Lock()
+        self._load = [0] * self.workers  # Keys per worker
+        self._dead = set()  # Workers that exited before close()
+        self._closing = False
+        self._pending = [[] for _ in range(self.workers)]
+        context = multiprocessing.get_context('spawn')  # The server has threads running, don't fork it
+        self._outbox = context.Queue()
+        self._inboxes = [context.Queue() for _ in range(self.workers)]
+        self._processes = [context.Process(target=fusion_worker, args=(inbox, self._outbox, resolution, period),
+                                           name=f'fusion-{index}', daemon=True)
+                           for index, inbox in enumerate(self._inboxes)]
+        for process in self._processes:
+            process.start()
+
+    def submit(self, vehicle, session, distances, car_distance, received_at):
+        """
+        Queues one scan for its vehicle's worker (sent on the next flush).
+        Raises ValueError for anything but a non-empty 1-D distances array, in this process,
+        so a bad scan never reaches a worker.
+        """
+        key = (int(vehicle), int(session))
+        distances = np.asarray(distances, dtype=np.float32)
+        if distances.ndim != 1 or distances.shape[0] == 0:
+            raise ValueError(f"distances must be a non-empty 1-D array, got shape {distances.shape}")
+        car_distance = float(car_distance)
+        with self._lock:
+            stats = self.vehicles.get(key)
+            if stats is None:
+                live = [worker for worker in range(self.workers) if worker not in self._dead] or [0]
+                worker = min(live, key=lambda worker: self._load[worker])
+                self._load[worker] += 1
+                stats = self.vehicles[key] = VehicleStats(key, worker)
+            stats.received += 1
+            if stats.worker in self._dead:
+                stats.dropped += 1
+                return
+            self._pending[stats.worker].append((key, received_at, distances, car_distance))
+
+    def flush(self):
+        """Sends every worker its queued scans as one message."""
+        self.check_workers()
+        with self._lock:
+            pending = self._pending
+            self._pending = [[] for _ in range(self.workers)]
+        for inbox, batch in zip(self._inboxes, pending):
+            if batch:
+                inbox.put(batch)
+
+    def check_workers(self):
+        """
+        Notices worker processes that died (exited before close()). Their vehicles keep their
+        last snapshot in the merged map, their scans not in that snapshot and any further
+        scans are counted as dropped, and new vehicles go to the remaining workers.
+
+        :return: number of dead workers
+        """
+        for index, process in enumerate(self._processes):
+            if index not in self._dead and process.exitcode is not None and not self._closing:
+                with self._lock:
+                    self._dead.add(index)
+                    self._pending[index] = []
+                    keys = []
+                    for stats in self.vehicles.values():
+                        if stats.worker == index:
+                            stats.dropped = stats.received - (stats.snapshot.fused if stats.snapshot else 0)
+                            keys.append(stats.key[0])
+                logging.error("Fusion worker %d died (exit code %s), dropping scans of vehicles %s",
+                              index, process.exitcode, keys)
+        return len(self._dead)
+
+    def collect(self, timeout=0.0):
+        """
+        Takes the snapshots the workers have sent.
+
+        :return: number of worker exits seen (None messages)
+        """
+        self.check_workers()
+        live = self.workers - len(self._dead)
+        exits = 0
+        while True:
+            try:
+                snapshot = self._outbox.get(timeout=timeout) if timeout else self._outbox.get_nowait()
+            except queue.Empty:
+                return exits
+            if snapshot is None:
+                exits += 1
+                if exits >= live:
+                    return exits
+                continue
+            with self._lock:
+                self.vehicles[snapshot.key].snapshot = snapshot
+            self.merger.update(snapshot)
+
+    def merge(self):
+        """:return: global map points and {key: global pose}, from the newest snapshots"""
+        self.collect()
+        return self.merger.merge()
+
+    def summary(self):
+        now = time.perf_counter()
+        with self._lock:
+            vehicles = list(self.vehicles.values())
+        return '\n'.join(stats.summary(now) for stats in vehicles)
+
+    def close(self, timeout=10.0):
+        """Fuses what is queued, takes the final snapshots and stops the workers."""
+        self.check_workers()
+        self._closing = True
+        self.flush()
+        for inbox in self._inboxes:
+            inbox.put(None)
+        self.collect(timeout=timeout if len(self._dead) < self.workers else 0.0)
+        for process in self._processes:
+            process.join(timeout)
@@ -0,0 +1,142 @@
+"""
+\file       load_gen.py
+\brief      Load generator for server.py
+            Replays recorded scans (text log lines '{angle,distance} [d0,d1,...]')
+            or synthetic scans over persistent connections at a fixed rate and
+            reports sustained throughput and request latency percentiles.
+            Each connection is a separate car (vehicle ID 1, 2, ...) for server.py --fleet.
+            Run:  python load_gen.py --rate 10 --connections 4 --mode stream data.txt
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import scan_frame
+from scan_text_parser import iter_batches
+
+FRAME_HEADER = struct.Struct('>I')
+
+
+def encode_body(distances, distance, fmt, vehicle=0, session=0):
+    if fmt == 'binary':
+        return scan_frame.encode_scan(distances, distance, vehicle=vehicle, session=session)
+    return json.dumps({"scan_data": distances, "distance": distance, "vehicle": vehicle, "session": session}).encode()
+
+
+def load_bodies(path, limit, fmt, vehicle=0, session=0):
+    """
+    Builds POST bodies (JSON as lidar_test.py sends, or binary frames) from a text scan log,
+    or from random scans when no log is given.
+    """
+    bodies = []
+    if path:
+        for batch in iter_batches(path, batch_size=min(limit, 4096)):
+            for distance, distances in zip(batch.distance_travelled, batch.distances):
+                bodies.append(encode_body(distances.tolist(), float(distance), fmt, vehicle, session))
+            if len(bodies) >= limit:
+                del bodies[limit:]
+                break
+    if not bodies:
+        rng = np.random.default_rng(0)
+        for _ in range(min(limit, 100)):
+            distances = np.round(rng.uniform(0, 6000, 360), 2).tolist()
+            bodies.append(encode_body(distances, 1.0, fmt, vehicle, session))
+    return bodies
+
+
+async def send_http(reader, writer, host, body):
+    content_type = scan_frame.CONTENT_TYPE.encode() if scan_frame.is_frame(body) else b'application/json'
+    writer.write(b'POST / HTTP/1.1\r\nHost: ' + host.encode() + b'\r\nContent-Type: ' + content_type + b'\r\n'
+                 b'Content-Length: ' + str(len(body)).encode() + b'\r\nConnection: keep-alive\r\n\r\n' + body)
+    await writer.drain()
+    status = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        if key.strip().lower() == 'content-length':
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status.split()[1:2] == [b'200']
+
+
+async def send_stream(reader, writer, host, body):
+    writer.write(FRAME_HEADER.pack(len(body)) + body)
+    await writer.drain()
+    return await reader.readexactly(1) == b'\x01'
+
+
+async def run_connection(args, bodies, latencies, results):
+    port = args.port if args.port else (8069 if args.mode == 'http' else 8070)
+    send = send_http if args.mode == 'http' else send_stream
+    reader, writer = await asyncio.open_connection(args.host, port)
+    period = 1.0 / args.rate if args.rate > 0 else 0.0
+    start = time.perf_counter()
+    sent = 0
+    while True:
+        now = time.perf_counter()
+        if now - start >= args.duration:
+            break
+        if period:
+            next_send = start + sent * period
+            if next_send > now:
+                await asyncio.sleep(next_send - now)
+            else:
+                results['late'] += 1
+        t0 = time.perf_counter()
+        ok = await send(reader, writer, args.host, bodies[sent % len(bodies)])
+        latencies.append(time.perf_counter() - t0)
+        results['ok' if ok else 'failed'] += 1
+        sent += 1
+    writer.close()
+
+
+async def main(args):
+    session = int.from_bytes(os.urandom(4), 'little')
+    fleet = [load_bodies(args.log, args.limit, args.format, vehicle + 1, session) for vehicle in range(args.connections)]
+    bodies = fleet[0]
+    latencies = []
+    results = {'ok': 0, 'failed': 0, 'late': 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(run_connection(args, fleet[i], latencies, results) for i in range(args.connections)))
+    elapsed = time.perf_counter() - start
+
+    lat = np.array(latencies) * 1000
+    p50, p99 = np.percentile(lat, [50, 99]) if lat.size else (0.0, 0.0)
+    offered = args.rate * args.connections if args.rate > 0 else float('inf')
+    print(f"mode {args.mode} ({args.format})  connections {args.connections}  offered {offered:.0f} scans/s  "
+          f"payload ~{np.mean([len(b) for b in bodies]):.0f} B")
+    print(f"sent {len(latencies)} in {elapsed:.1f}s -> {len(latencies) / elapsed:.1f} scans/s  "
+          f"(ok {results['ok']} failed {results['failed']} behind schedule {results['late']})")
+    print(f"latency p50 {p50:.2f} ms  p99 {p99:.2f} ms  max {lat.max() if lat.size else 0:.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay scans against server.py')
+    parser.add_argument('log', nargs='?', help='text scan log to replay (synthetic scans if omitted)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='default 8069 for http, 8070 for stream')
+    parser.add_argument('--mode', choices=['http', 'stream'], default='http')
+    parser.add_argument('--format', choices=['json', 'binary'], default='json', help='scan payload encoding')
+    parser.add_argument('--rate', type=float, default=10, help='scans/s per connection, 0 = as fast as possible')
+    parser.add_argument('--connections', type=int, default=1, help='simulated cars')
+    parser.add_argument('--duration', type=float, default=10, help='seconds')
+    parser.add_argument('--limit', type=int, default=10000, help='max scans loaded from the log')
+    asyncio.run(main(parser.parse_args()))
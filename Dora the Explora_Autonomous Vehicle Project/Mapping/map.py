@@ -1,50 +1,25 @@
 import math
-import numpy as np
-import open3d as o3d
 import os
+import threading
 import time
-import json
-
-FILENAME = 'lidar_scans.json'
-
-def polar_to_cartesian(distances, translation):
-    points = []
-    # Count down from 359 to 0 to account for CW rotations versus polar coordinate CCW rotations
-    for degree in range(359, 0, -1):
-        if degree < len(distances):
-            distance = distances[degree]
-            if distance == 0:
-                continue  # Skip zero distances
-            radians = math.radians(degree)
-            x = distance * math.cos(radians) + translation[0]
-            y = distance * math.sin(radians) + translation[1]
-            z = 0  # Assuming 2D LiDAR
-            points.append([x, y, z])
-    return np.array(points)
-
-def create_point_cloud(points, color):
-    pcd = o3d.geometry.PointCloud()
-    pcd.points = o3d.utility.Vector3dVector(points)
-    pcd.colors = o3d.utility.Vector3dVector(np.tile(color, (points.shape[0], 1)))
-    return pcd
-
-def update_view(vis, pcd):
-    vis.update_geometry(pcd)
-    vis.poll_events()
-    vis.update_renderer()
-
-    # Fit the view to the new set of points
-    view_ctl = vis.get_view_control()
-    bounds = pcd.get_axis_aligned_bounding_box()
-    center = bounds.get_center()
-    extent = bounds.get_extent()
-
-    # Set the lookat point to the center of the bounding box
-    view_ctl.set_lookat(center)
-    view_ctl.set_front([0.0, 1.0, 0.0])    # 0 -1 0
-    view_ctl.set_up([0.0, 0.0, 1.0])        # 0 0 1
-    # Adjust the zoom to fit the bounding box
-    view_ctl.set_zoom(2.0 / max(extent)) 
+import numpy as np
+from scan_convert import polar_to_cartesian
+from occupancy_grid import OccupancyGrid
+from scan_ring import ScanRing
+from scan_matcher import ScanMatcher
+from scan_filter import ScanFilter
+from map_view import MapViewer
+
+POINT_COLOR = [1, 0, 0]  # Red
+MAP_BACKEND = 'grid'  # 'grid': occupancy grid cell centers, 'points': every raw return
+MAP_RESOLUTION = 50  # Grid cell size (mm)
+MAP_WINDOW = None  # Grid sliding window half-width around the car (mm), None keeps the whole map
+POSE_ESTIMATION = 'match'  # 'match': scan-to-map matching from the odometry guess, 'odometry': fixed heading dead reckoning
+FILTER_SCANS = True  # Range clip, drop spikes and downsample each scan before mapping (scan_filter.py)
+REPORT_SCANS = 50  # Print match time / score and filter ratio every this many scans
+VIEW_POINT_BUDGET = 250000  # Max points drawn ('points' backend: the viewer's thinned copy is the map)
+VIEW_FPS = 30.0  # Render timer, independent of the scan rate
+FLEET_MAP = None  # 'fleet_map.npz': show the merged multi-car map from server.py --fleet instead of the scan ring
 
 def update_translation(translation, distance_traveled, angle_degrees):
     angle_radians = math.radians(angle_degrees)
@@ -52,89 +27,121 @@ def update_translation(translation, distance_traveled, angle_degrees):
     translation[1] += distance_traveled * math.sin(angle_radians)
     return translation
 
-# Main Function
-first_scan = 1
-if True:
-    print("=== [Beginning Map Program] ===")
-    # Initialize Open3D visualizer with specific window dimensions
-    vis = o3d.visualization.Visualizer()
-    vis.create_window(window_name='LiDAR Point Cloud', width=800, height=600)
-
+def ingest_scans(scan_ring, viewer, stop):
+    """
+    Map update loop, run in its own thread so rendering never delays it.
+    Filters, places and fuses each scan, then hands the new points to the viewer.
+    """
+    first_scan = 1
+    data_wait = 0
     # Initial translation
     translation = [0, 0, 0]
-    # Store all points
-    all_points = []
-
-    # Create an empty point cloud object for initial visualization
-    pcd = o3d.geometry.PointCloud()
-    vis.add_geometry(pcd)
-
-    data_wait = 0
-
-    # Loop to read data in chunks of three lines
-    while True:
-        if os.path.exists(FILENAME):
+    # Fused grid cells ('grid' backend)
+    occupancy = OccupancyGrid(resolution=MAP_RESOLUTION, window=MAP_WINDOW)
+    grid_changed = False
+    # Pose (x, y, heading) of each scan, matched against the last few scans
+    matcher = ScanMatcher(pose=(0.0, 0.0, 90.0))
+    scan_filter = ScanFilter()
+    mapped_scans = 0
+
+    while not stop.is_set():
+        # The grid is redrawn whole, so push it at most once per frame instead of every scan
+        if grid_changed and viewer.frame_due():
+            viewer.set_points(occupancy.occupied_centers())
+            grid_changed = False
+
+        scan = scan_ring.get()
+        if scan is not None:
             data_wait = 0
-            try:
-                with open(FILENAME, 'r') as fp:
-                    data = json.load(fp)
-            except json.JSONDecodeError:
-                continue
+            seq, distances, distance_traveled, heading = scan
             angle = 90
-            distance_traveled = float(data["car_distance"])
-            distances = data["scans"]
             if distance_traveled != 0 or first_scan == 1:
                 # for angle, distance in enumerate(distances):
                 #     if angle >= 350 or angle <= 30 or angle >= 160 or angle <= 190:
                 #         pass
                 #     else:
                 #         distances[angle] = 0
-                # Convert to Cartesian coordinates with current translation
-                new_points = polar_to_cartesian(distances, translation)
-
-                # Add new points to the accumulated points
-                all_points.extend(new_points)
-
-                # Create point cloud from all accumulated points
-                pcd.points = o3d.utility.Vector3dVector(np.array(all_points))
-                pcd.colors = o3d.utility.Vector3dVector(np.tile([1, 0, 0], (len(all_points), 1)))  # Red color
+                if FILTER_SCANS:
+                    distances = scan_filter.apply(distances)
+                mapped_scans += 1
+
+                if POSE_ESTIMATION == 'match':
+                    # Odometry gives the initial guess, the match corrects position and heading
+                    result = matcher.match(distances, distance_traveled)
+                    translation = [result.pose[0], result.pose[1], 0]
+                    angle = result.pose[2]
+                    new_points = result.points
+                    if mapped_scans % REPORT_SCANS == 0:
+                        stats = matcher.stats()
+                        print(f"Scan match: {stats['matched']}/{stats['scans']} matched, last score {result.score:.2f}, "
+                              f"last {result.match_ms:.1f} ms, mean {stats['mean_ms']} ms, max {stats['max_ms']} ms")
+                else:
+                    # distance_traveled is the odometry up to this scan's capture time, so move first
+                    translation = update_translation(translation, distance_traveled, angle)
+                    # Convert to Cartesian coordinates with current translation
+                    new_points = polar_to_cartesian(distances, translation)
+                if FILTER_SCANS and mapped_scans % REPORT_SCANS == 0:
+                    print(scan_filter)
+                if mapped_scans % REPORT_SCANS == 0:
+                    print(viewer)
+
+                if MAP_BACKEND == 'grid':
+                    # Fuse into the grid, the viewer gets the occupied cell centers
+                    occupancy.insert(new_points, translation)
+                    grid_changed = True
+                else:
+                    # Add only the new points to the viewer's level-of-detail copy
+                    viewer.add_points(new_points)
 
-                # Update the visualizer
-                vis.clear_geometries()
-                vis.add_geometry(pcd)
-
-                # # Adjust view to fit all points
-                update_view(vis, pcd)
-
-                # Simulate movement by updating the translation
-                translation = update_translation(translation, distance_traveled, angle)
                 first_scan = 0
-            # elif first_scan == 1:
-            #     # Convert to Cartesian coordinates with current translation
-            #     new_points = polar_to_cartesian(distances, translation)
-
-            #     # Add new points to the accumulated points
-            #     all_points.extend(new_points)
-
-            #     # Create point cloud from all accumulated points
-            #     pcd.points = o3d.utility.Vector3dVector(np.array(all_points))
-            #     pcd.colors = o3d.utility.Vector3dVector(np.tile([1, 0, 0], (len(all_points), 1)))  # Red color
-
-            #     # Update the visualizer
-            #     vis.clear_geometries()
-            #     vis.add_geometry(pcd)
-
-            #     # # Adjust view to fit all points
-            #     update_view(vis, pcd)
-
-            #     # Simulate movement by updating the translation
-            #     translation = update_translation(translation, distance_traveled, angle)
-            #     first_scan = 0
             else:
                 continue
         else:
             if data_wait == 0:
-                print("Waiting for JSON file to populate...")
+                print("Waiting for new scans...")
                 data_wait = 1
-            time.sleep(0.05)
+            time.sleep(0.005)
             continue
+
+def follow_fleet_map(path, viewer, stop):
+    """Shows the merged map server.py --fleet rewrites every MERGE_PERIOD."""
+    print(f"Waiting for server.py --fleet to write {path}...")
+    last_mtime = None
+    while not stop.is_set():
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime is not None and mtime != last_mtime:
+            last_mtime = mtime
+            with np.load(path) as fleet:
+                viewer.set_points(fleet['points'])
+                poses = ', '.join(f"{vehicle}: ({x:.0f}, {y:.0f}, {heading:.0f})"
+                                  for (vehicle, session), (x, y, heading) in zip(fleet['keys'], fleet['poses']))
+            print(f"Fleet map: {viewer.lod.total} cells  {poses}")
+        stop.wait(0.2)
+
+# Main Function
+if True:
+    print("=== [Beginning Map Program] ===")
+    # Open3D window; must be created and drawn from the main thread
+    viewer = MapViewer('LiDAR Point Cloud', width=800, height=600, budget=VIEW_POINT_BUDGET, fps=VIEW_FPS,
+                       color=POINT_COLOR)
+
+    stop = threading.Event()
+    if FLEET_MAP:
+        ingest = threading.Thread(target=follow_fleet_map, args=(FLEET_MAP, viewer, stop), name='fleet', daemon=True)
+    else:
+        # Scans arrive from server.py through shared memory, each one exactly once
+        print("Waiting for server.py to create the scan ring...")
+        scan_ring = ScanRing.attach(wait=True)
+        ingest = threading.Thread(target=ingest_scans, args=(scan_ring, viewer, stop), name='ingest', daemon=True)
+    ingest.start()
+    try:
+        # Render timer: runs until the window is closed
+        viewer.run(stop)
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    ingest.join(timeout=1.0)
+    viewer.close()
@@ -0,0 +1,248 @@
+"""
+\file       map_view.py
+\brief      Open3D map viewer shared by map.py and test_parse.py
+            Rendering cost is kept independent of the size of the map:
+
+              * RunningBounds grows the map bounds from each new batch's min / max
+                instead of a bounding box over the whole cloud every frame, and the
+                camera is only re-fitted when the bounds actually changed
+              * LevelOfDetail keeps a decimated copy of the map (every stride-th point,
+                stride doubles whenever the copy passes the point budget), so the
+                renderer never draws more than LOD_BUDGET points
+              * MapViewer.run() renders on its own fixed-rate timer on the main thread
+                while scans are ingested in another thread; the two only share the
+                (small) level-of-detail copy under a lock, so a slow frame never holds
+                up a map update
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import math
+import threading
+import time
+import numpy as np
+import open3d as o3d
+from point_buffer import PointBuffer
+
+""" [Constants] """
+LOD_BUDGET = 250000  # Max points handed to the renderer
+TARGET_FPS = 30.0
+POINT_COLOR = [1, 0, 0]  # Red
+
+
+class RunningBounds:
+    """Axis aligned bounds that grow with each batch of points."""
+    def __init__(self):
+        self.low = None
+        self.high = None
+
+    def update(self, points):
+        """
+        :param points <np.ndarray>: (M, 3) new points
+        :return: True if the bounds changed
+        """
+        if points.shape[0] == 0:
+            return False
+        low = points.min(axis=0)
+        high = points.max(axis=0)
+        if self.low is None:
+            self.low, self.high = low, high
+            return True
+        if (low >= self.low).all() and (high <= self.high).all():
+            return False
+        self.low = np.minimum(self.low, low)
+        self.high = np.maximum(self.high, high)
+        return True
+
+    def reset(self):
+        self.low = None
+        self.high = None
+
+    @property
+    def center(self):
+        return (self.low + self.high) / 2
+
+    @property
+    def extent(self):
+        return self.high - self.low
+
+
+class LevelOfDetail:
+    """
+    Every stride-th point of everything added, at most `budget` points.
+    Point i of the map (in arrival order) is kept if i % stride == 0, so halving the
+    copy and doubling the stride keeps the same rule and each add is O(new points).
+    """
+    def __init__(self, budget=LOD_BUDGET):
+        self.budget = budget
+        self.stride = 1
+        self.total = 0
+        self._buffer = PointBuffer(capacity=min(budget, 1 << 16) + 1)
+
+    def __len__(self):
+        return len(self._buffer)
+
+    @property
+    def points(self):
+        return self._buffer.points
+
+    def add(self, points):
+        """
+        :param points <np.ndarray>: (M, 3) points appended to the map
+        :return: none
+        """
+        start = (-self.total) % self.stride
+        self.total += points.shape[0]
+        self._buffer.append(points[start::self.stride])
+        while len(self._buffer) > self.budget:
+            thinned = self._buffer.points[::2].copy()
+            self._buffer.clear()
+            self._buffer.append(thinned)
+            self.stride *= 2
+
+    def set(self, points):
+        """
+        :param points <np.ndarray>: (M, 3) whole map (e.g. occupancy grid cell centers), replaces the copy
+        :return: none
+        """
+        self.total = points.shape[0]
+        self.stride = max(1, int(math.ceil(self.total / self.budget)))
+        self._buffer.clear()
+        self._buffer.append(points[::self.stride])
+
+
+class MapViewer:
+    """
+    Open3D window drawing a level-of-detail copy of the map.
+
+        viewer = MapViewer('LiDAR Point Cloud')
+        threading.Thread(target=ingest, args=(viewer,)).start()   # calls viewer.add_points / set_points
+        viewer.run()                                              # main thread, until the window is closed
+
+    or, single threaded, viewer.render() whenever a frame is wanted.
+    """
+    def __init__(self, window_name, width=800, height=600, budget=LOD_BUDGET, fps=TARGET_FPS,
+                 color=POINT_COLOR, front=(0.0, 1.0, 0.0), up=(0.0, 0.0, 1.0), visible=True):
+        self.fps = fps
+        self.color = color
+        self.front = list(front)
+        self.up = list(up)
+        self.bounds = RunningBounds()
+        self.lod = LevelOfDetail(budget)
+        self.frames = 0
+        self.slow_frames = 0  # Frames that took longer than 1 / fps
+        self.max_frame_ms = 0.0
+        self._lock = threading.Lock()
+        self._points_changed = False
+        self._bounds_changed = False
+        self._last_push = 0.0
+        self._vis = o3d.visualization.Visualizer()
+        self._vis.create_window(window_name=window_name, width=width, height=height, visible=visible)
+        self._pcd = o3d.geometry.PointCloud()
+        self._pcd_added = False
+
+    # -- Ingestion side (any thread) --
+
+    def add_points(self, points):
+        """Appends new map points (points backend)."""
+        points = np.asarray(points, dtype=np.float64)
+        if points.shape[0] == 0:
+            return
+        with self._lock:
+            self.lod.add(points)
+            self._bounds_changed |= self.bounds.update(points)
+            self._points_changed = True
+            self._last_push = time.perf_counter()
+
+    def set_points(self, points):
+        """Replaces the whole map (grid backend, occupied cell centers)."""
+        points = np.asarray(points, dtype=np.float64)
+        with self._lock:
+            self.lod.set(points)
+            self.bounds.reset()
+            self.bounds.update(points)
+            self._bounds_changed = True
+            self._points_changed = True
+            self._last_push = time.perf_counter()
+
+    def frame_due(self):
+        """:return: True if a frame has passed since the last add / set (rate limits set_points callers)"""
+        return time.perf_counter() - self._last_push >= 1.0 / self.fps
+
+    # -- Render side (the thread that created the window) --
+
+    def render(self):
+        """
+        Draws one frame; the cloud and camera are only touched if the map changed.
+
+        :return: False once the window has been closed
+        """
+        start = time.perf_counter()
+        with self._lock:
+            points = self.lod.points.copy() if self._points_changed else None
+            fit = self._bounds_changed and self.bounds.low is not None
+            center = self.bounds.center if fit else None
+            extent = self.bounds.extent if fit else None
+            self._points_changed = False
+            self._bounds_changed = False
+
+        if points is not None:
+            self._pcd.points = o3d.utility.Vector3dVector(points)
+            self._pcd.paint_uniform_color(self.color)
+            if not self._pcd_added and points.shape[0]:
+                self._vis.add_geometry(self._pcd)
+                self._pcd_added = True
+            elif self._pcd_added:
+                self._vis.update_geometry(self._pcd)
+        if fit and self._pcd_added:
+            view_ctl = self._vis.get_view_control()
+            view_ctl.set_lookat(center)
+            view_ctl.set_front(self.front)
+            view_ctl.set_up(self.up)
+            view_ctl.set_zoom(2.0 / max(float(extent.max()), 1.0))
+        alive = self._vis.poll_events()
+        self._vis.update_renderer()
+
+        elapsed = (time.perf_counter() - start) * 1e3
+        self.frames += 1
+        self.slow_frames += elapsed > 1e3 / self.fps
+        self.max_frame_ms = max(self.max_frame_ms, elapsed)
+        return alive
+
+    def run(self, stop=None):
+        """
+        Renders at `fps` until the window is closed or `stop` (threading.Event) is set.
+        A late frame moves the schedule instead of rendering a burst to catch up.
+
+        :return: none
+        """
+        period = 1.0 / self.fps
+        next_frame = time.perf_counter()
+        while stop is None or not stop.is_set():
+            if not self.render():
+                break
+            next_frame += period
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_frame = time.perf_counter()
+
+    def capture(self, filename):
+        """Renders the current map and saves a screenshot."""
+        self.render()
+        self._vis.capture_screen_image(filename, do_render=True)
+
+    def close(self):
+        self._vis.destroy_window()
+
+    def __repr__(self):
+        return (f"MapViewer(frames={self.frames}, slow_frames={self.slow_frames}, "
+                f"max_frame_ms={self.max_frame_ms:.1f}, shown={len(self.lod)}, map={self.lod.total}, "
+                f"stride={self.lod.stride})")
@@ -0,0 +1,184 @@
+"""
+\file       occupancy_grid.py
+\brief      Fixed-resolution occupancy grid map for long mapping sessions
+            Each scan is fused into hit/miss counts per cell (free space is
+            ray-cast along every beam), so memory grows with the explored area
+            instead of with drive time. Cells live in 64x64 tiles that are only
+            allocated where the car has actually seen something, and an optional
+            sliding window drops tiles far away from the car.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import numpy as np
+
+""" [Constants] """
+TILE_BITS = 6
+TILE_SIZE = 1 << TILE_BITS  # Cells per tile side
+TILE_MASK = TILE_SIZE - 1
+HITS = 0
+MISSES = 1
+DEFAULT_RESOLUTION = 50.0  # Map units (mm) per cell side
+DEFAULT_OCCUPIED_RATIO = 0.4  # hits / (hits + misses) needed to draw a cell
+
+
+def _pack(x, y):
+    """Packs two int arrays into one int64 key per element."""
+    return (x.astype(np.int64) << 32) | (y.astype(np.int64) & 0xFFFFFFFF)
+
+
+def _unpack(key):
+    """Inverse of _pack for a single Python int key."""
+    y = key & 0xFFFFFFFF
+    if y & 0x80000000:
+        y -= 1 << 32
+    return key >> 32, y
+
+
+class OccupancyGrid:
+    """
+    Sparse, tiled 2D occupancy grid with hit/miss counts per cell.
+
+    :param resolution <float>: Cell side length in the same units as the scans
+    :param window <float>: Optional sliding window half-width around the car.
+        Tiles entirely outside of it are dropped after every insert. None keeps everything.
+    :param occupied_ratio <float>: Minimum hits / (hits + misses) for a cell to count as occupied
+    :param min_hits <int>: Minimum hits for a cell to count as occupied
+    """
+    def __init__(self, resolution=DEFAULT_RESOLUTION, window=None,
+                 occupied_ratio=DEFAULT_OCCUPIED_RATIO, min_hits=1):
+        self.resolution = float(resolution)
+        self.window = window
+        self.occupied_ratio = occupied_ratio
+        self.min_hits = min_hits
+        self._tiles = {}  # tile key -> (2, TILE_SIZE, TILE_SIZE) uint32 hit/miss counts
+        self._centers = {}  # tile key -> cached (M, 3) occupied cell centers
+        self._dirty = set()
+
+    def __len__(self):
+        """Number of allocated tiles."""
+        return len(self._tiles)
+
+    @property
+    def nbytes(self):
+        return sum(tile.nbytes for tile in self._tiles.values())
+
+    def cell_index(self, points):
+        """
+        :param points <array>: (M, >=2) points in map coordinates
+        :return: (ix, iy) integer cell coordinates
+        """
+        ix = np.floor(points[:, 0] / self.resolution).astype(np.int64)
+        iy = np.floor(points[:, 1] / self.resolution).astype(np.int64)
+        return ix, iy
+
+    def insert(self, points, origin):
+        """
+        Fuses one scan into the grid. Cells containing a return get a hit, cells
+        crossed by a beam before its return get a miss (at most one per beam).
+
+        :param points <array>: (M, >=2) scan returns in map coordinates (e.g. from polar_to_cartesian)
+        :param origin <list>: Sensor position [x, y, (z)] the scan was taken from
+        :return: none
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if points.shape[0] == 0:
+            return
+        hit_x, hit_y = self.cell_index(points)
+        free_x, free_y = self._ray_cast(points, origin, hit_x, hit_y)
+        self._accumulate(hit_x, hit_y, HITS)
+        self._accumulate(free_x, free_y, MISSES)
+        if self.window is not None:
+            self.crop(origin, self.window)
+
+    def _ray_cast(self, points, origin, hit_x, hit_y):
+        """
+        Samples every beam at half-cell steps from the origin to its return and
+        returns the cells crossed, excluding the return cell itself.
+        """
+        step = self.resolution * 0.5
+        dx = points[:, 0] - origin[0]
+        dy = points[:, 1] - origin[1]
+        length = np.hypot(dx, dy)
+        samples = np.floor(length / step).astype(np.intp)
+        total = int(samples.sum())
+        if total == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+
+        beam = np.repeat(np.arange(points.shape[0]), samples)
+        k = np.arange(total) - np.repeat(np.cumsum(samples) - samples, samples)
+        t = k * step / length[beam]
+        ix = np.floor((origin[0] + dx[beam] * t) / self.resolution).astype(np.int64)
+        iy = np.floor((origin[1] + dy[beam] * t) / self.resolution).astype(np.int64)
+
+        # Samples along a ray are ordered, so repeated cells are always adjacent
+        keep = (ix != hit_x[beam]) | (iy != hit_y[beam])
+        keep[1:] &= (ix[1:] != ix[:-1]) | (iy[1:] != iy[:-1]) | (beam[1:] != beam[:-1])
+        return ix[keep], iy[keep]
+
+    def _accumulate(self, ix, iy, layer):
+        if ix.shape[0] == 0:
+            return
+        tile_keys = _pack(ix >> TILE_BITS, iy >> TILE_BITS)
+        order = np.argsort(tile_keys, kind='stable')
+        tile_keys = tile_keys[order]
+        local_x = (ix[order] & TILE_MASK).astype(np.intp)
+        local_y = (iy[order] & TILE_MASK).astype(np.intp)
+        unique_keys, starts = np.unique(tile_keys, return_index=True)
+        ends = np.append(starts[1:], tile_keys.shape[0])
+
+        for key, start, end in zip(unique_keys.tolist(), starts.tolist(), ends.tolist()):
+            tile = self._tiles.get(key)
+            if tile is None:
+                tile = np.zeros((2, TILE_SIZE, TILE_SIZE), dtype=np.uint32)
+                self._tiles[key] = tile
+            np.add.at(tile[layer], (local_x[start:end], local_y[start:end]), 1)
+            self._dirty.add(key)
+
+    def crop(self, center, half_width):
+        """
+        Drops every tile that lies completely outside the square window.
+
+        :param center <list>: Window center [x, y, (z)]
+        :param half_width <float>: Window half-width in map units
+        :return: number of tiles dropped
+        """
+        tile_span = TILE_SIZE * self.resolution
+        dropped = 0
+        for key in list(self._tiles):
+            tx, ty = _unpack(key)
+            min_x, min_y = tx * tile_span, ty * tile_span
+            if (min_x > center[0] + half_width or min_x + tile_span < center[0] - half_width or
+                    min_y > center[1] + half_width or min_y + tile_span < center[1] - half_width):
+                del self._tiles[key]
+                self._centers.pop(key, None)
+                self._dirty.discard(key)
+                dropped += 1
+        return dropped
+
+    def occupied_centers(self):
+        """
+        Centers of all occupied cells. Only tiles changed since the last call are recomputed.
+
+        :return: (M, 3) float64 array, z is always 0
+        """
+        for key in self._dirty:
+            hits, misses = self._tiles[key]
+            occupied = (hits >= self.min_hits) & (hits >= self.occupied_ratio * (hits + misses))
+            local_x, local_y = np.nonzero(occupied)
+            tx, ty = _unpack(key)
+            centers = np.zeros((local_x.shape[0], 3))
+            centers[:, 0] = ((tx << TILE_BITS) + local_x + 0.5) * self.resolution
+            centers[:, 1] = ((ty << TILE_BITS) + local_y + 0.5) * self.resolution
+            self._centers[key] = centers
+        self._dirty.clear()
+        if not self._centers:
+            return np.zeros((0, 3))
+        return np.concatenate(list(self._centers.values()))
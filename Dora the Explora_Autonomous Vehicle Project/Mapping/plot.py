@@ -1,87 +1,348 @@
-import matplotlib.animation as animation
+import argparse
+import io
+import math
+import os
+import shutil
+import subprocess
+import time
+import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib import use
-import time
+from PIL import Image
+from scan_text_parser import parse_data
 
-use('MacOSX')
+# One persistent polar figure, updated in place: the scatter's offsets and colors are
+# rewritten for each scan and only the scatter is redrawn over a cached background
+# (blitting). The last TRAIL_SCANS scans stay on screen, fading with age.
+# Scans are tailed from an open file handle, or taken from server.py's scan ring.
+# --headless renders with Agg to a PNG sequence or a video instead of a window.
 
-print('To stop - close the plot window')
-data_wait = 0
-IMIN: int = 0
-IMAX: int = 50
 DMAX: int = 4000
+TRAIL_SCANS = 1  # Scans kept on screen, older ones fade out (1 = no trail)
+SCAN_RATE = 10.0  # Scans per second in a logged file (headless frame timing)
+FPS = 30.0  # Max window redraws per second / headless frames per second of scans
+POLL = 0.01  # Seconds between checks for new data
+IDLE = 1.0  # Seconds without a scan before saying so
+CMAP = plt.cm.viridis
+MARKER_SIZE = 5
+
+DEGREES = np.arange(360)
+
 
-def parse_data(input_str):
+def tail_scans(filename, follow=True, poll=POLL):
+    """
+    Yields each scan appended to a text scan log, from one open file handle.
+    Yields None when there is nothing new (so the caller can keep drawing),
+    and stops at the end of the file if not following.
+
+    :param filename <str>: '{angle,distance} [d0,...]' scan log
+    :return: generator of (360,) distances or None
+    """
+    while not os.path.exists(filename):
+        if not follow:
+            return
+        yield None
+        time.sleep(poll)
+    with open(filename, 'r') as file:
+        partial = ''
+        while True:
+            line = file.readline()
+            if not line:
+                if not follow:
+                    break
+                if os.path.getsize(filename) < file.tell():
+                    file.seek(0)  # Truncated (server restarted), start over
+                    partial = ''
+                yield None
+                continue
+            if not line.endswith('\n') and follow:
+                partial += line  # Writer is mid-line, keep it until the newline arrives
+                continue
+            angle, distance_travelled, distances = parse_data(partial + line)
+            partial = ''
+            if distances is not None:
+                yield distances
+        if partial:
+            angle, distance_travelled, distances = parse_data(partial)
+            if distances is not None:
+                yield distances
+
+
+def ring_scans(name=None, poll=POLL):
+    """
+    Yields each scan published by server.py, None when there is nothing new.
+    The ring has a single consumer: run this instead of map.py, not alongside it.
+    """
+    from scan_ring import DEFAULT_NAME, ScanRing
+    print("Waiting for server.py to create the scan ring...")
+    scan_ring = ScanRing.attach(name or DEFAULT_NAME, wait=True)
     try:
-        # Split the line into two parts: angle-distance and distances array
-        parts = input_str.split(' ', 1)  # Split only at the first space
-        if len(parts) < 2:
-            print(f"Invalid input format: {input_str}")
-            return None, None, None
-        
-        # Extract and parse the angle and distance travelled
-        angle_distance_str = parts[0].strip('{}')
-        angle_distance_parts = angle_distance_str.split(',')
-        
-        if len(angle_distance_parts) < 2:
-            print(f"Invalid angle-distance format: {angle_distance_str}")
-            return None, None, None
-        
-        angle = float(angle_distance_parts[0])
-        distance_travelled = float(angle_distance_parts[1])
-        
-        # Extract and parse the distances array
-        distances_str = parts[1].strip('[]').strip()
-        if not distances_str:
-            print(f"Empty distances array: {input_str}")
-            return angle, distance_travelled, []
-        
-        distances = list(map(float, distances_str.split(',')))
-        return angle, distance_travelled, distances
-    except Exception as e:
-        print(f"Error parsing input data: {e}")
-        print(f"Input string causing error: {input_str}")
-        return None, None, None
-
-def update_line(num, iterator, line):
-    scan = next(iterator)
-    offsets = np.array([(np.radians(meas[1]), meas[2]) for meas in scan])
-    line.set_offsets(offsets)
-    intents = np.array([meas[0] for meas in scan])
-    line.set_array(intents)
-    return line
-
-file_position = 0
-while True:
-    with open('lidar_scans.txt', 'r') as file:
-        file.seek(file_position)  # Move to the last read position
-        scan_body = file.readline().strip()
-        file_position = file.tell()  # Update the file position
-
-    if not scan_body:
-        if data_wait == 0:
-            print("No new data. Waiting for new data...")
-            data_wait = 1
-        time.sleep(1)
-        continue
-
-    # New Data Found, Plot
+        while True:
+            scan = scan_ring.get()
+            if scan is None:
+                yield None
+            else:
+                yield scan[1]
+    finally:
+        scan_ring.close()
+
+
+class PolarView:
+    """
+    Persistent polar scatter of the last `trail` scans.
+    Every scan owns 360 fixed rows of the scatter (one per degree), kept in a ring
+    buffer, so a new scan only rewrites its own rows and the alphas.
+    """
+    def __init__(self, trail=TRAIL_SCANS, rmax=DMAX, cmap=CMAP, blit=True):
+        self.trail = max(1, trail)
+        self.rmax = rmax
+        self.cmap = cmap
+        self.blit = blit
+        self.scans = 0
+        self.frames = 0
+        self._slot = -1
+        self._age_alpha = np.linspace(1.0, 0.15, self.trail)  # Newest ... oldest
+        self._offsets = np.zeros((self.trail, 360, 2))
+        self._offsets[:, :, 0] = np.radians(DEGREES)
+        self._rgba = np.zeros((self.trail, 360, 4))
+        self._valid = np.zeros((self.trail, 360), dtype=bool)
+        self._background = None
+
+        self.fig = plt.figure()
+        title = 'RPLIDAR'
+        self.fig.set_label(title)
+        if self.fig.canvas.manager is not None:
+            self.fig.canvas.manager.set_window_title(title)
+        self.ax = self.fig.add_subplot(111, projection='polar')
+        self.ax.set_title('360° scan result')
+        self.ax.set_rmax(rmax)
+        self.ax.grid(True)
+        self.line = self.ax.scatter(self._offsets[:, :, 0].ravel(), self._offsets[:, :, 1].ravel(),
+                                    s=MARKER_SIZE, lw=0, animated=blit)
+        self.line.set_facecolors(self._rgba.reshape(-1, 4))
+        self.status = self.ax.text(0.0, -0.08, '', transform=self.ax.transAxes, animated=blit)
+        self.ax.set_rmax(rmax)  # The scatter call autoscales r, put the limit back
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # Full redraw (first show, resize): cache everything but the animated artists
+        if self.blit:
+            self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+            self._draw_animated()
+
+    def _draw_animated(self):
+        self.fig.draw_artist(self.line)
+        self.fig.draw_artist(self.status)
+
+    def push(self, distances):
+        """
+        Puts one scan into the ring buffer.
+
+        :param distances <array-like>: Up to 360 distances, index is the angle in degrees
+        :return: none
+        """
+        distances = np.asarray(distances, dtype=np.float64)[:360]
+        self._slot = (self._slot + 1) % self.trail
+        slot = self._slot
+        self._offsets[slot, :, 1] = 0.0
+        self._offsets[slot, :distances.shape[0], 1] = distances
+        self._valid[slot] = False
+        self._valid[slot, :distances.shape[0]] = distances > 0
+        self._rgba[slot] = self.cmap(np.minimum(self._offsets[slot, :, 1] / self.rmax, 1.0))
+        self.scans += 1
+
+    def _update_artists(self):
+        # Age 0 is the newest slot; invalid bins (no return) are fully transparent
+        age = (self._slot - np.arange(self.trail)) % self.trail
+        alpha = self._age_alpha[age][:, None] * self._valid
+        alpha[age >= self.scans] = 0.0  # Slots not filled yet
+        self._rgba[:, :, 3] = alpha
+        self.line.set_offsets(self._offsets.reshape(-1, 2))
+        self.line.set_facecolors(self._rgba.reshape(-1, 4))
+        self.status.set_text(f'scan {self.scans}')
+
+    def draw(self):
+        """Redraws the scatter: blitted over the cached background, or a full draw."""
+        self._update_artists()
+        canvas = self.fig.canvas
+        if self.blit and self._background is not None:
+            canvas.restore_region(self._background)
+            self._draw_animated()
+            canvas.blit(self.fig.bbox)
+        else:
+            canvas.draw()
+        canvas.flush_events()
+        self.frames += 1
+
+    def save(self, filename):
+        """Writes the current frame to an image file."""
+        self._update_artists()
+        self.fig.savefig(filename)
+
+    @property
+    def closed(self):
+        return not plt.fignum_exists(self.fig.number)
+
+
+def run_window(scans, view, fps=FPS):
+    """Draws the newest data at most `fps` times a second until the window is closed."""
+    plt.show(block=False)
+    view.fig.canvas.draw()  # Fills the blit background
+    period = 1.0 / fps
+    last_draw = 0.0
+    last_data = time.perf_counter()
     data_wait = 0
-    fig = plt.figure()
-    title = 'RPLIDAR'
-    fig.set_label(title)
-    fig.canvas.manager.set_window_title(title)
-
-    ax = plt.subplot(111, projection='polar')
-    line = ax.scatter([0, 0], [0, 0], s=5, c=[IMIN, IMAX], cmap=plt.cm.Greys_r, lw=0)
-    ax.set_title('360° scan result')
-    ax.set_rmax(DMAX)
-    ax.grid(True)
-
-    angle, distance_travelled, distances = parse_data(scan_body)
-    iterator = distances
-    ani = animation.FuncAnimation(fig, update_line, fargs=(iterator, line), interval=50)
-
-    plt.show()
-    
\ No newline at end of file
+    pending = False
+    while not view.closed:
+        # Drain everything that arrived since the last frame, then draw once
+        for distances in scans:
+            if distances is None:
+                break
+            view.push(distances)
+            pending = True
+            last_data = time.perf_counter()
+            data_wait = 0
+        else:
+            break  # Source finished
+        now = time.perf_counter()
+        if pending and now - last_draw >= period:
+            view.draw()
+            last_draw = now
+            pending = False
+        else:
+            if data_wait == 0 and now - last_data > IDLE:
+                print("No new data. Waiting for new data...")
+                data_wait = 1
+            view.fig.canvas.flush_events()
+            time.sleep(POLL)
+    if pending and not view.closed:
+        view.draw()
+    # Keep the last scan up until the window is closed
+    if not view.closed:
+        plt.show()
+
+
+class FrameWriter:
+    """
+    Writes RGBA frames to a numbered PNG sequence, a .gif, or a video (piped to ffmpeg).
+    A repeated frame is only encoded once.
+    """
+    def __init__(self, output, fps, size):
+        self.output = output
+        self.fps = fps
+        self.frames = 0
+        self._gif = None
+        self._ffmpeg = None
+        if output.endswith('.png'):
+            if os.path.dirname(output):
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+        elif output.endswith('.gif'):
+            self._gif = []
+        else:
+            if shutil.which('ffmpeg') is None:
+                raise RuntimeError(f"ffmpeg not found, needed for {output} (use a .png pattern or .gif)")
+            width, height = size
+            self._ffmpeg = subprocess.Popen(
+                ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}',
+                 '-r', str(fps), '-i', '-', '-pix_fmt', 'yuv420p', output], stdin=subprocess.PIPE)
+
+    def write(self, rgba, repeat=1):
+        """
+        :param rgba <np.ndarray>: (height, width, 4) uint8 frame
+        :param repeat <int>: Number of consecutive frames showing it
+        :return: none
+        """
+        if repeat <= 0:
+            return
+        if self._ffmpeg is not None:
+            data = rgba.tobytes()
+            for _ in range(repeat):
+                self._ffmpeg.stdin.write(data)
+        elif self._gif is not None:
+            self._gif.append((Image.fromarray(rgba).convert('RGB').quantize(), repeat))
+        else:
+            encoded = io.BytesIO()
+            Image.fromarray(rgba).save(encoded, format='png', compress_level=1)
+            for frame in range(self.frames, self.frames + repeat):
+                with open(self.output % frame if '%' in self.output else self.output, 'wb') as fp:
+                    fp.write(encoded.getbuffer())
+        self.frames += repeat
+
+    def close(self):
+        if self._ffmpeg is not None:
+            self._ffmpeg.stdin.close()
+            self._ffmpeg.wait()
+        elif self._gif:
+            images = [image for image, repeat in self._gif]
+            durations = [repeat * 1000.0 / self.fps for image, repeat in self._gif]
+            images[0].save(self.output, save_all=True, append_images=images[1:], duration=durations, loop=0)
+
+
+def run_headless(scans, view, output, fps=FPS, scan_rate=SCAN_RATE, wall_clock=False):
+    """
+    Renders frames with Agg at a fixed rate of `fps` frames per second of scans.
+    Scan time is scans / scan_rate for a file, the wall clock for a live source.
+    Each frame shows the newest scan at its time; a scan is rendered once however many
+    frames show it, and scans that fall between two frames are only kept for the trail.
+
+    :param output <str>: PNG pattern with a frame number ('frames/scan_%05d.png') or a video (.mp4 / .gif)
+    :return: number of frames written
+    """
+    view.fig.canvas.draw()  # Fills the blit background
+    writer = FrameWriter(output, fps, view.fig.canvas.get_width_height())
+    start = time.perf_counter()
+    try:
+        for distances in scans:
+            if distances is None:
+                time.sleep(POLL)
+                continue
+            view.push(distances)
+            elapsed = time.perf_counter() - start if wall_clock else view.scans / scan_rate
+            due = int(math.ceil(elapsed * fps)) - writer.frames
+            if due > 0:
+                view.draw()
+                writer.write(np.asarray(view.fig.canvas.buffer_rgba()), due)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+    return writer.frames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Live polar plot of LiDAR scans')
+    parser.add_argument('filename', nargs='?', default='lidar_scans.txt', help='text scan log to tail')
+    parser.add_argument('--ring', nargs='?', const='', default=None, metavar='NAME',
+                        help="read server.py's scan ring instead of a file (replaces map.py as its consumer)")
+    parser.add_argument('--trail', type=int, default=TRAIL_SCANS, help='scans kept on screen, fading with age')
+    parser.add_argument('--rmax', type=float, default=DMAX, help='plot radius (mm)')
+    parser.add_argument('--fps', type=float, default=FPS, help='window redraw limit / headless frame rate')
+    parser.add_argument('--headless', metavar='OUT',
+                        help='render with Agg to a PNG pattern (frames/scan_%%05d.png) or a .mp4 / .gif, no window')
+    parser.add_argument('--scan-rate', type=float, default=SCAN_RATE, help='scans per second of a logged file (--headless)')
+    parser.add_argument('--no-follow', action='store_true',
+                        help='stop at the end of the file instead of waiting for more (always with --headless)')
+    parser.add_argument('--no-blit', action='store_true', help='full redraws (backends without blitting)')
+    args = parser.parse_args()
+
+    if args.headless:
+        matplotlib.use('Agg')
+    live = args.ring is not None
+    if live:
+        scans = ring_scans(args.ring)
+    else:
+        scans = tail_scans(args.filename, follow=not (args.no_follow or args.headless))
+    view = PolarView(trail=args.trail, rmax=args.rmax, blit=not args.no_blit)
+
+    if args.headless:
+        start = time.perf_counter()
+        try:
+            frames = run_headless(scans, view, args.headless, args.fps, args.scan_rate, wall_clock=live)
+        except RuntimeError as e:
+            parser.error(str(e))
+        elapsed = time.perf_counter() - start
+        print(f"{view.scans} scans, {frames} frames in {elapsed:.2f}s "
+              f"({view.scans / elapsed if elapsed else 0:.0f} scans/s) -> {args.headless}")
+    else:
+        print('To stop - close the plot window')
+        run_window(scans, view, args.fps)
@@ -0,0 +1,80 @@
+"""
+\file       point_buffer.py
+\brief      Growable, preallocated NumPy buffer for accumulating map points
+            Appends are amortized O(new points) by doubling the backing array,
+            so per-scan cost does not grow with the length of the drive
+            Used as the storage behind map_view.LevelOfDetail and for the full map of
+            test_parse.replay_headless (.ply / .png output). The live map in map.py
+            keeps no full-history point buffer: the viewer's level-of-detail copy
+            ('points' backend) or the OccupancyGrid ('grid' backend) is the map
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import numpy as np
+
+""" [Constants] """
+DEFAULT_CAPACITY = 1 << 16  # ~180 full scans before the first resize
+
+
+class PointBuffer:
+    """
+    Append-only (N, dim) array with amortized doubling.
+    `points` is a view of the filled rows; it is invalidated by the next append
+    that triggers a resize, so do not hold on to it across appends.
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY, dim=3, dtype=np.float64):
+        self._data = np.empty((max(1, capacity), dim), dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return self._data.shape[0]
+
+    @property
+    def points(self):
+        return self._data[:self._size]
+
+    def reserve(self, capacity):
+        """
+        Grows the backing array to hold at least `capacity` rows.
+
+        :param capacity <int>: Minimum number of rows
+        :return: none
+        """
+        if capacity <= self._data.shape[0]:
+            return
+        new_capacity = self._data.shape[0]
+        while new_capacity < capacity:
+            new_capacity *= 2
+        data = np.empty((new_capacity, self._data.shape[1]), dtype=self._data.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, points):
+        """
+        Copies `points` onto the end of the buffer.
+
+        :param points <array-like>: (M, dim) rows to append
+        :return: view of the M newly appended rows
+        """
+        points = np.asarray(points)
+        count = points.shape[0]
+        start = self._size
+        self.reserve(start + count)
+        self._data[start:start + count] = points
+        self._size = start + count
+        return self._data[start:self._size]
+
+    def clear(self):
+        """Drops all points but keeps the allocated capacity."""
+        self._size = 0
@@ -0,0 +1,99 @@
+"""
+\file       scan_convert.py
+\brief      Shared LiDAR scan -> cartesian point conversion for the mapping tools
+            Uses cos/sin lookup tables built once at import so each scan is a
+            single masked NumPy pass instead of a per-degree Python loop
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import numpy as np
+
+""" [Constants] """
+DEGREE_BINS = 360
+FINE_STEPS_PER_DEGREE = 64  # Fractional angle table resolution (1/64 deg, < 1 mm error at 6 m)
+FINE_BINS = DEGREE_BINS * FINE_STEPS_PER_DEGREE
+
+""" [Lookup Tables] """
+# One entry per whole degree, matches the scan_data[degree] layout sent by the Pi
+DEG_COS = np.cos(np.radians(np.arange(DEGREE_BINS, dtype=np.float64)))
+DEG_SIN = np.sin(np.radians(np.arange(DEGREE_BINS, dtype=np.float64)))
+
+# Finer table for the raw fractional angles that iter_scans() yields
+FINE_COS = np.cos(np.radians(np.arange(FINE_BINS, dtype=np.float64) / FINE_STEPS_PER_DEGREE))
+FINE_SIN = np.sin(np.radians(np.arange(FINE_BINS, dtype=np.float64) / FINE_STEPS_PER_DEGREE))
+
+
+def polar_to_cartesian(distances, translation):
+    """
+    Converts one binned scan (index == degree) to 2D points in the map frame.
+    Zero distances (no return) are dropped.
+
+    :param distances <array-like>: Up to 360 distances, index is the angle in degrees
+    :param translation <list>: Current car position [x, y, (z)]
+    :return: (M, 3) float64 array of points, z is always 0
+    """
+    distances = np.asarray(distances, dtype=np.float64)[:DEGREE_BINS]
+    count = distances.shape[0]
+    mask = distances != 0
+    hits = distances[mask]
+
+    points = np.zeros((hits.shape[0], 3))
+    points[:, 0] = hits * DEG_COS[:count][mask] + translation[0]
+    points[:, 1] = hits * DEG_SIN[:count][mask] + translation[1]
+    return points
+
+
+def polar_to_cartesian_angles(angles, distances, translation):
+    """
+    Converts raw (angle, distance) measurements with fractional angles to 2D points.
+    Angles are snapped to the nearest 1/FINE_STEPS_PER_DEGREE of a degree.
+
+    :param angles <array-like>: Measurement angles in degrees (any range, wrapped to 0-360)
+    :param distances <array-like>: Measurement distances, same length as angles
+    :param translation <list>: Current car position [x, y, (z)]
+    :return: (M, 3) float64 array of points, z is always 0
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    distances = np.asarray(distances, dtype=np.float64)
+    mask = distances != 0
+    hits = distances[mask]
+    index = np.rint(angles[mask] * FINE_STEPS_PER_DEGREE).astype(np.intp) % FINE_BINS
+
+    points = np.zeros((hits.shape[0], 3))
+    points[:, 0] = hits * FINE_COS[index] + translation[0]
+    points[:, 1] = hits * FINE_SIN[index] + translation[1]
+    return points
+
+
+def polar_to_cartesian_batch(scans, translations):
+    """
+    Converts a whole batch of binned scans in one call (used for log replay).
+
+    :param scans <array-like>: (N, 360) distances, one row per scan
+    :param translations <array-like>: (N, 2) or (N, 3) car position for each scan
+    :return: ((M, 3) points, (M,) index of the scan each point came from)
+      * points are grouped by scan in input order
+    """
+    scans = np.asarray(scans, dtype=np.float64)
+    translations = np.asarray(translations, dtype=np.float64)
+    if scans.ndim != 2 or scans.shape[1] > DEGREE_BINS:
+        raise ValueError(f"Expected (N, <={DEGREE_BINS}) scans, got {scans.shape}")
+    if translations.shape[0] != scans.shape[0]:
+        raise ValueError(f"Got {scans.shape[0]} scans but {translations.shape[0]} translations")
+
+    count = scans.shape[1]
+    mask = scans != 0
+    scan_index = np.nonzero(mask)[0]
+    hits = scans[mask]
+
+    points = np.zeros((hits.shape[0], 3))
+    points[:, 0] = hits * np.broadcast_to(DEG_COS[:count], scans.shape)[mask] + translations[scan_index, 0]
+    points[:, 1] = hits * np.broadcast_to(DEG_SIN[:count], scans.shape)[mask] + translations[scan_index, 1]
+    return points, scan_index
@@ -0,0 +1,131 @@
+"""
+\file       scan_filter.py
+\brief      Per-scan preprocessing between scan decoding and map insertion
+            Works on the 360 bin distances array (index == degree, 0 = no return) and
+            returns one in the same layout, so polar_to_cartesian and the scan matcher
+            take it unchanged. Each step is one vectorized pass over the scan:
+
+              * range clipping: returns closer than min_range (the car itself) or
+                further than max_range are dropped
+              * spike rejection: a return that is further than the tolerance from the
+                median of its +-spike_window neighbours is dropped, as is a return with
+                no neighbouring return at all (single beam spikes)
+              * downsampling: 'voxel' keeps the first return in each voxel x voxel mm
+                cell of the scan (near walls get dozens of returns per cell), 'angular'
+                keeps the first return in each angular_step degree sector
+
+            ScanFilter counts points in / points out so the reduction can be reported.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import numpy as np
+from scan_convert import DEGREE_BINS, DEG_COS, DEG_SIN
+
+""" [Constants] """
+MIN_RANGE = 150.0  # mm, returns off the car body / mounting
+MAX_RANGE = 12000.0  # mm, RPLidar A1 rated range
+SPIKE_WINDOW = 1  # Neighbours on each side in the median, 0 = no spike rejection
+SPIKE_TOLERANCE = 100.0  # mm, allowed distance from the neighbour median ...
+SPIKE_RATIO = 0.05  # ... or this fraction of the range, whichever is larger
+DOWNSAMPLE = 'voxel'  # 'voxel', 'angular' or None
+VOXEL_SIZE = 50.0  # mm, same as the map grid cell
+ANGULAR_STEP = 2  # Degrees per sector for 'angular'
+
+
+class ScanFilter:
+    """
+    Configurable scan preprocessing.
+
+        scan_filter = ScanFilter()
+        distances = scan_filter.apply(distances)
+        print(scan_filter)   # ScanFilter(scans=..., points_in=..., points_out=..., ratio=...)
+    """
+    def __init__(self, min_range=MIN_RANGE, max_range=MAX_RANGE, spike_window=SPIKE_WINDOW,
+                 spike_tolerance=SPIKE_TOLERANCE, spike_ratio=SPIKE_RATIO, downsample=DOWNSAMPLE,
+                 voxel_size=VOXEL_SIZE, angular_step=ANGULAR_STEP):
+        if downsample not in ('voxel', 'angular', None):
+            raise ValueError(f"downsample must be 'voxel', 'angular' or None, not {downsample!r}")
+        self.min_range = min_range
+        self.max_range = max_range
+        self.spike_window = spike_window
+        self.spike_tolerance = spike_tolerance
+        self.spike_ratio = spike_ratio
+        self.downsample = downsample
+        self.voxel_size = voxel_size
+        self.angular_step = angular_step
+        self.scans = 0
+        self.points_in = 0
+        self.points_out = 0
+        self.clipped = 0
+        self.spikes = 0
+
+    def apply(self, distances):
+        """
+        :param distances <array-like>: Up to 360 distances, index is the angle in degrees (0 = no return)
+        :return: filtered copy, same length, dropped returns set to 0
+        """
+        distances = np.array(distances, dtype=np.float64)[:DEGREE_BINS]
+        hit = distances != 0
+        count = int(np.count_nonzero(hit))
+        self.scans += 1
+        self.points_in += count
+
+        # Range clipping
+        keep = hit & (distances >= self.min_range) & (distances <= self.max_range)
+        self.clipped += count - int(np.count_nonzero(keep))
+
+        # Spike rejection against the median of the neighbouring returns (the scan wraps around)
+        if self.spike_window > 0 and distances.shape[0] == DEGREE_BINS:
+            before = int(np.count_nonzero(keep))
+            keep &= ~self._spikes(np.where(keep, distances, np.nan))
+            self.spikes += before - int(np.count_nonzero(keep))
+
+        # Downsampling: first kept return per voxel / sector
+        if self.downsample is not None and keep.any():
+            index = np.flatnonzero(keep)
+            if self.downsample == 'voxel':
+                d = distances[index]
+                x = np.floor(d * DEG_COS[index] / self.voxel_size).astype(np.int64)
+                y = np.floor(d * DEG_SIN[index] / self.voxel_size).astype(np.int64)
+                _, first = np.unique((x << 32) | (y & 0xFFFFFFFF), return_index=True)
+            else:
+                _, first = np.unique(index // self.angular_step, return_index=True)
+            keep[:] = False
+            keep[index[first]] = True
+
+        distances[~keep] = 0.0
+        self.points_out += int(np.count_nonzero(keep))
+        return distances
+
+    def _spikes(self, ranges):
+        """
+        :param ranges <np.ndarray>: (360,) distances, NaN = no return
+        :return: (360,) True for returns to drop
+        """
+        shifts = range(-self.spike_window, self.spike_window + 1)
+        window = np.sort(np.stack([np.roll(ranges, -shift) for shift in shifts], axis=1), axis=1)  # NaN last
+        count = np.count_nonzero(~np.isnan(window), axis=1)
+        neighbours = count - 1
+        low = np.take_along_axis(window, np.maximum(count - 1, 0)[:, None] // 2, axis=1)[:, 0]
+        high = np.take_along_axis(window, (count // 2)[:, None], axis=1)[:, 0]
+        median = (low + high) / 2
+        valid = ~np.isnan(ranges)
+        tolerance = np.maximum(self.spike_tolerance, self.spike_ratio * ranges)
+        with np.errstate(invalid='ignore'):
+            return valid & ((neighbours == 0) | (np.abs(ranges - median) > tolerance))
+
+    @property
+    def ratio(self):
+        """Points out / points in over all scans so far."""
+        return self.points_out / self.points_in if self.points_in else 1.0
+
+    def __repr__(self):
+        return (f"ScanFilter(scans={self.scans}, points_in={self.points_in}, points_out={self.points_out}, "
+                f"ratio={self.ratio:.2f}, clipped={self.clipped}, spikes={self.spikes})")
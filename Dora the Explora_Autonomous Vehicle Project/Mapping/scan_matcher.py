@@ -0,0 +1,274 @@
+"""
+\file       scan_matcher.py
+\brief      Real-time scan-to-map pose estimation for map.py
+            Each scan is matched against a likelihood grid built from the last
+            SUBMAP_SCANS matched scans, starting from the odometry guess (previous pose
+            moved car_distance along the heading). The search is correlative over a
+            window of headings and x / y offsets, made fast with branch and bound:
+
+              * the likelihood grid is precomputed once per scan (each return blurs into
+                a Gaussian, separable max filter)
+              * LEVELS max-pooled copies of it (cell = max over the next 2^k x 2^k cells)
+                give an upper bound on the score of a whole 2^k x 2^k block of offsets
+              * blocks are scored coarse to fine, best first, and any block whose bound is
+                below the best full resolution score so far is skipped
+
+            so most of the window is never evaluated at full resolution, and the result is
+            the same as an exhaustive search of the window.
+
+            Poses are (x, y, heading) in map units (mm) and degrees, in map.py's frame:
+            a scan's degree index a points at heading - 90 + a, and heading 90 is where
+            the car started (the old hardcoded `angle = 90`).
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+from collections import deque, namedtuple
+import math
+import time
+import numpy as np
+from scan_convert import polar_to_cartesian
+
+""" [Constants] """
+RESOLUTION = 50.0  # Likelihood grid cell size (mm)
+SIGMA = 75.0  # Spread of each return in the likelihood grid (mm)
+LINEAR_WINDOW = 300.0  # Search +- this far (mm) around the odometry guess
+ANGULAR_WINDOW = 12.0  # Search +- this many degrees around the odometry heading
+LEVELS = 4  # Precomputed grids: blocks of 1, 2, 4, 8 cells
+SUBMAP_SCANS = 20  # Recent scans the new one is matched against
+MIN_SCORE = 0.35  # Mean likelihood per return (0 - 1) below which the odometry guess is kept
+MIN_POINTS = 20  # Returns needed to attempt a match
+MAX_RANGE = 8000.0  # Returns further than this are left out of matching (mm)
+
+MatchResult = namedtuple('MatchResult', ['pose', 'score', 'matched', 'match_ms', 'points'])
+"""
+pose     (x, y, heading) estimate for the scan
+score    mean likelihood of the scan's returns at that pose (0 - 1)
+matched  False if the odometry guess was kept (first scan, too few returns, score < min_score)
+match_ms time spent in match()
+points   (M, 3) returns in map coordinates at that pose (all of them, max_range only limits matching)
+"""
+
+
+def transform_points(points, pose):
+    """
+    :param points <np.ndarray>: (M, >=2) points in the scan frame (polar_to_cartesian with no translation)
+    :param pose <tuple>: (x, y, heading)
+    :return: (M, 3) points in map coordinates, z = 0
+    """
+    rotation = math.radians(pose[2] - 90.0)
+    c = math.cos(rotation)
+    s = math.sin(rotation)
+    out = np.zeros((points.shape[0], 3))
+    out[:, 0] = c * points[:, 0] - s * points[:, 1] + pose[0]
+    out[:, 1] = s * points[:, 0] + c * points[:, 1] + pose[1]
+    return out
+
+
+def predict(pose, distance_traveled):
+    """:return: pose moved distance_traveled along its heading (same as map.update_translation)"""
+    heading = math.radians(pose[2])
+    return (pose[0] + distance_traveled * math.cos(heading), pose[1] + distance_traveled * math.sin(heading), pose[2])
+
+
+def _shifted(a, shift, axis):
+    """:return: b with b[i] = a[i + shift] along axis, 0 outside a"""
+    out = np.zeros_like(a)
+    n = a.shape[axis]
+    if abs(shift) >= n:
+        return out
+    src = [slice(None)] * a.ndim
+    dst = [slice(None)] * a.ndim
+    if shift >= 0:
+        src[axis] = slice(shift, n)
+        dst[axis] = slice(0, n - shift)
+    else:
+        src[axis] = slice(0, n + shift)
+        dst[axis] = slice(-shift, n)
+    out[tuple(dst)] = a[tuple(src)]
+    return out
+
+
+class LikelihoodGrids:
+    """
+    Likelihood grid of a set of map points and its max-pooled copies.
+    levels[k] is flat (cells + 1 trailing 0 for out-of-grid lookups); levels[k][cell(x, y)]
+    is the max likelihood over cells x .. x + 2^k - 1, y .. y + 2^k - 1.
+    The zero border is wide enough that blocks starting outside the grid really are all 0.
+    """
+    def __init__(self, points, resolution=RESOLUTION, sigma=SIGMA, levels=LEVELS):
+        self.resolution = resolution
+        pad = int(math.ceil(3 * sigma / resolution)) + (1 << (levels - 1))
+        self.origin = np.floor(points[:, :2].min(axis=0) / resolution).astype(np.int64) - pad
+        top = np.floor(points[:, :2].max(axis=0) / resolution).astype(np.int64) + pad
+        self.shape = tuple(int(v) for v in top - self.origin + 1)
+
+        cells = np.floor(points[:, :2] / resolution).astype(np.int64) - self.origin
+        hits = np.zeros(self.shape)
+        hits[cells[:, 0], cells[:, 1]] = 1.0
+
+        # max over the neighbourhood of hit * g(dx) * g(dy): separable because everything is >= 0
+        radius = int(math.ceil(3 * sigma / resolution))
+        weights = np.exp(-(np.arange(-radius, radius + 1) * resolution) ** 2 / (2 * sigma * sigma))
+        likelihood = hits
+        for axis in (0, 1):
+            blurred = np.zeros(self.shape)
+            for shift, weight in zip(range(-radius, radius + 1), weights):
+                np.maximum(blurred, _shifted(likelihood, shift, axis) * weight, out=blurred)
+            likelihood = blurred
+
+        self.levels = []
+        grid = likelihood
+        for level in range(levels):
+            if level:
+                step = 1 << (level - 1)
+                for axis in (0, 1):
+                    grid = np.maximum(grid, _shifted(grid, step, axis))
+            self.levels.append(np.append(grid.ravel(), 0.0))
+        self._sentinel = self.shape[0] * self.shape[1]
+
+    def cells(self, x, y):
+        """:return: integer cell coordinates (relative to the grid origin) of map coordinates"""
+        return (np.floor(x / self.resolution).astype(np.int64) - self.origin[0],
+                np.floor(y / self.resolution).astype(np.int64) - self.origin[1])
+
+    def score(self, level, cx, cy, ox, oy):
+        """
+        :param cx, cy <np.ndarray>: (n,) cells of the scan returns
+        :param ox, oy <np.ndarray>: (k,) cell offsets to try
+        :return: (k,) mean likelihood (upper bound for level > 0) over the returns
+        """
+        x = cx[None, :] + ox[:, None]
+        y = cy[None, :] + oy[:, None]
+        inside = (x >= 0) & (x < self.shape[0]) & (y >= 0) & (y < self.shape[1])
+        index = np.where(inside, x * self.shape[1] + y, self._sentinel)
+        return self.levels[level][index].mean(axis=1)
+
+
+class ScanMatcher:
+    """
+    Tracks the car pose scan by scan.
+
+        matcher = ScanMatcher()
+        result = matcher.match(distances, car_distance)   # MatchResult
+    """
+    def __init__(self, resolution=RESOLUTION, sigma=SIGMA, linear_window=LINEAR_WINDOW,
+                 angular_window=ANGULAR_WINDOW, levels=LEVELS, submap_scans=SUBMAP_SCANS,
+                 min_score=MIN_SCORE, max_range=MAX_RANGE, pose=(0.0, 0.0, 90.0)):
+        self.resolution = resolution
+        self.sigma = sigma
+        self.linear_window = linear_window
+        self.angular_window = angular_window
+        self.levels = levels
+        self.min_score = min_score
+        self.max_range = max_range
+        self.pose = tuple(pose)
+        self.scans = 0
+        self.matches = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._submap = deque(maxlen=submap_scans)
+        self._grids = None
+
+    def match(self, distances, distance_traveled=0.0):
+        """
+        Estimates the pose of a new scan and adds the scan to the submap.
+
+        :param distances <array-like>: 360 distances, index is the angle in degrees (0 = no return)
+        :param distance_traveled <float>: Odometry since the previous scan
+        :return: MatchResult
+        """
+        start = time.perf_counter()
+        distances = np.asarray(distances, dtype=np.float64)[:360]
+        scan = polar_to_cartesian(distances, (0.0, 0.0))
+        near = scan[distances[distances != 0] <= self.max_range]
+        guess = predict(self.pose, distance_traveled)
+        pose, score, matched = guess, 0.0, False
+        if self._submap and near.shape[0] >= MIN_POINTS:
+            if self._grids is None:
+                self._grids = LikelihoodGrids(np.concatenate(self._submap), self.resolution, self.sigma, self.levels)
+            pose, score, matched = self._search(near, guess)
+        self.pose = pose
+        if near.shape[0]:
+            self._submap.append(transform_points(near, pose))
+            self._grids = None  # Rebuilt on the next match
+        points = transform_points(scan, pose)
+
+        elapsed = (time.perf_counter() - start) * 1e3
+        self.scans += 1
+        self.matches += matched
+        self.total_ms += elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+        return MatchResult(pose, score, matched, elapsed, points)
+
+    def _search(self, scan, guess):
+        grids = self._grids
+        # Heading step that moves the furthest return by about one cell
+        reach = max(float(np.hypot(scan[:, 0], scan[:, 1]).max()), self.resolution)
+        step = math.degrees(math.acos(max(-1.0, 1 - self.resolution ** 2 / (2 * reach * reach))))
+        count = int(math.ceil(self.angular_window / step))
+        headings = guess[2] + np.arange(-count, count + 1) * (self.angular_window / max(count, 1))
+
+        rotation = np.radians(headings - 90.0)[:, None]
+        x = np.cos(rotation) * scan[:, 0] - np.sin(rotation) * scan[:, 1] + guess[0]
+        y = np.sin(rotation) * scan[:, 0] + np.cos(rotation) * scan[:, 1] + guess[1]
+        cx, cy = grids.cells(x, y)
+
+        window = int(math.ceil(self.linear_window / self.resolution))
+        top = self.levels - 1
+        size = 1 << top
+        ox, oy = np.meshgrid(np.arange(-window, window + 1, size), np.arange(-window, window + 1, size), indexing='ij')
+        ox = ox.ravel()
+        oy = oy.ravel()
+        candidates = []
+        for a in range(headings.shape[0]):
+            scores = grids.score(top, cx[a], cy[a], ox, oy)
+            candidates.extend(zip(scores.tolist(), [a] * ox.shape[0], ox.tolist(), oy.tolist()))
+        candidates.sort(reverse=True)
+
+        # Score at the guess itself, reported if nothing beats min_score
+        center = headings.shape[0] // 2
+        guess_score = float(grids.score(0, cx[center], cy[center], np.zeros(1, np.int64), np.zeros(1, np.int64))[0])
+        best = self._branch(candidates, top, (self.min_score, None, 0, 0), cx, cy, window)
+        if best[1] is None:
+            return guess, guess_score, False
+        score, a, dx, dy = best
+        pose = (guess[0] + dx * self.resolution, guess[1] + dy * self.resolution, float(headings[a]))
+        return pose, score, True
+
+    def _branch(self, candidates, level, best, cx, cy, window):
+        """
+        :param candidates <list>: (bound, heading index, x offset, y offset) at `level`, best first
+        :return: best (score, heading index, x offset, y offset) found, `best` if nothing beat it
+        """
+        for bound, a, ox, oy in candidates:
+            if bound <= best[0]:
+                break
+            if level == 0:
+                return (bound, a, ox, oy)  # Sorted, so nothing after this one can beat it
+            half = 1 << (level - 1)
+            child_x = np.array([ox, ox, ox + half, ox + half])
+            child_y = np.array([oy, oy + half, oy, oy + half])
+            keep = (child_x <= window) & (child_y <= window)
+            child_x = child_x[keep]
+            child_y = child_y[keep]
+            scores = self._grids.score(level - 1, cx[a], cy[a], child_x, child_y)
+            children = sorted(zip(scores.tolist(), [a] * child_x.shape[0], child_x.tolist(), child_y.tolist()),
+                              reverse=True)
+            best = self._branch(children, level - 1, best, cx, cy, window)
+        return best
+
+    def stats(self):
+        """:return: dict of scans, matched, mean_ms, max_ms"""
+        return {
+            'scans': self.scans,
+            'matched': self.matches,
+            'mean_ms': round(self.total_ms / self.scans, 2) if self.scans else 0.0,
+            'max_ms': round(self.max_ms, 2),
+        }
@@ -0,0 +1,165 @@
+"""
+\file       scan_ring.py
+\brief      Lock-free single-producer/single-consumer scan ring buffer in shared memory
+            server.py (producer) publishes every received scan, map.py (consumer)
+            reads them in order. Each scan is written once and read once, with no
+            file I/O in between.
+
+            Layout: a 256 byte header (magic, slot count, then the write index,
+            read index and drop counter on separate cache lines) followed by
+            fixed-size slots of (seq, car_distance, heading, 360 float32 distances).
+            The producer fills a slot and then bumps the write index, the consumer
+            copies a slot out and then bumps the read index, so neither side ever
+            touches a slot the other one owns.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+from multiprocessing import resource_tracker, shared_memory
+import time
+import numpy as np
+
+""" [Constants] """
+DEFAULT_NAME = 'dora_scans'
+DEFAULT_SLOTS = 1024  # ~1.5 MB, over a minute of backlog at 10 scans/s
+SCAN_BINS = 360
+MAGIC = 0x444F5241  # 'DORA'
+HEADER_SIZE = 256
+WRITE_INDEX_OFFSET = 64
+READ_INDEX_OFFSET = 128
+DROPPED_OFFSET = 192
+
+SLOT_DTYPE = np.dtype([
+    ('seq', np.uint64),
+    ('car_distance', np.float32),
+    ('heading', np.float32),
+    ('distances', np.float32, (SCAN_BINS,)),
+])
+
+
+class ScanRing:
+    """
+    Shared-memory SPSC ring of fixed-size scan slots.
+    Use ScanRing.create() in the producer and ScanRing.attach() in the consumer.
+    """
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        buf = shm.buf
+        self._header = np.ndarray((2,), dtype=np.uint32, buffer=buf, offset=0)
+        self._write_index = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=WRITE_INDEX_OFFSET)
+        self._read_index = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=READ_INDEX_OFFSET)
+        self._dropped = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=DROPPED_OFFSET)
+        slot_count = int(self._header[1])
+        self._slots = np.ndarray((slot_count,), dtype=SLOT_DTYPE, buffer=buf, offset=HEADER_SIZE)
+
+    @classmethod
+    def create(cls, name=DEFAULT_NAME, slots=DEFAULT_SLOTS):
+        """
+        Creates (or recreates) the shared memory segment. Called by the producer.
+
+        :param name <str>: Shared memory name
+        :param slots <int>: Number of scan slots
+        :return: ScanRing
+        """
+        size = HEADER_SIZE + slots * SLOT_DTYPE.itemsize
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        header = np.ndarray((2,), dtype=np.uint32, buffer=shm.buf, offset=0)
+        header[1] = slots
+        header[0] = MAGIC
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME, wait=True, poll=0.05):
+        """
+        Attaches to a ring created by another process. Called by the consumer.
+
+        :param name <str>: Shared memory name
+        :param wait <bool>: Keep retrying until the producer has created the ring
+        :param poll <float>: Seconds between retries
+        :return: ScanRing
+        """
+        while True:
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+                break
+            except FileNotFoundError:
+                if not wait:
+                    raise
+                time.sleep(poll)
+        # The producer owns the segment; stop our resource tracker from unlinking it on exit
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        if np.ndarray((1,), dtype=np.uint32, buffer=shm.buf, offset=0)[0] != MAGIC:
+            shm.close()
+            raise ValueError(f"Shared memory '{name}' is not a scan ring")
+        return cls(shm, owner=False)
+
+    def __len__(self):
+        """Number of scans written but not yet read."""
+        return int(self._write_index[0] - self._read_index[0])
+
+    @property
+    def dropped(self):
+        """Scans the producer had to drop because the ring was full."""
+        return int(self._dropped[0])
+
+    def put(self, distances, car_distance=0.0, heading=0.0):
+        """
+        Publishes one scan. Producer side only.
+
+        :param distances <array-like>: Up to 360 distances, index is the angle in degrees
+        :param car_distance <float>: Distance travelled since the previous scan
+        :param heading <float>: Heading in degrees
+        :return: sequence number of the scan, or None if the ring was full (scan dropped)
+        """
+        write_index = int(self._write_index[0])
+        if write_index - int(self._read_index[0]) >= self._slots.shape[0]:
+            self._dropped[0] += 1
+            return None
+        slot = self._slots[write_index % self._slots.shape[0]]
+        distances = np.asarray(distances, dtype=np.float32)[:SCAN_BINS]
+        slot['distances'][:distances.shape[0]] = distances
+        slot['distances'][distances.shape[0]:] = 0
+        slot['car_distance'] = car_distance
+        slot['heading'] = heading
+        slot['seq'] = write_index + 1
+        # Publishing the index last hands the slot over to the consumer
+        self._write_index[0] = write_index + 1
+        return write_index + 1
+
+    def get(self):
+        """
+        Takes the oldest unread scan. Consumer side only.
+
+        :return: (seq, distances, car_distance, heading) or None if there is nothing new
+          * distances is a float32 copy, safe to keep after the slot is reused
+        """
+        read_index = int(self._read_index[0])
+        if read_index == int(self._write_index[0]):
+            return None
+        slot = self._slots[read_index % self._slots.shape[0]]
+        scan = (int(slot['seq']), slot['distances'].copy(), float(slot['car_distance']), float(slot['heading']))
+        # Releasing the index last hands the slot back to the producer
+        self._read_index[0] = read_index + 1
+        return scan
+
+    def close(self):
+        """Detaches from the ring; the producer also removes the segment."""
+        self._header = self._write_index = self._read_index = self._dropped = self._slots = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -1,8 +1,20 @@
 """
 \file       server.py
 \brief      Code to run a local server on computer and receive POST requests
+            Asyncio ingest: HTTP/1.1 keep-alive POSTs or a raw length-prefixed
+            TCP stream, decoded on a worker thread behind a bounded queue
+            Scans may be JSON or binary frames (common/scan_frame.py), chosen by
+            Content-Type over HTTP and by the frame magic on the stream
+            A POST may also carry a batch of scans (scan_frame.BATCH_CONTENT_TYPE,
+            optionally Content-Encoding: deflate), see pi/telemetry_uploader.py
             Requires finding local IP (run 'ifconfig | grep inet')
             Save the inet IP that is NOT localhost (127.0.0.1)
+            Received scans are published to map.py through the shared memory
+            scan ring (scan_ring.py). Pass --json to also write lidar_scans.json
+            for debugging, and --record to keep a session log for replay.
+            With --fleet, scans are instead routed by (vehicle, session) to fusion
+            worker processes (fleet.py), and their local maps are merged into
+            fleet_map.npz every MERGE_PERIOD for map.py to show (FLEET_MAP).
 
 \authors    Corbin Warmbier
             Brian Barcenas
@@ -13,50 +25,306 @@
 """
 
 """ [Imports] """
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
 import logging
-from sys import argv
+import os
+import struct
+import sys
+import time
 import numpy as np
 import math
 import json
+import zlib
+from scan_convert import DEG_COS, DEG_SIN
+from scan_ring import ScanRing
+from session_log import SessionWriter
+from fleet import FusionPool, save_map
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import scan_frame
 
+""" [Constants] """
+HTTP_PORT = 8069
+STREAM_PORT = 8070  # Raw length-prefixed stream: 4 byte big-endian length + payload, 1 byte ack per frame
+QUEUE_SIZE = 256  # Received scans waiting to be decoded
+DECODE_BATCH = 32  # Max scans handed to the decode thread at once
+STATS_PERIOD = 5  # Seconds between ingest stats log lines
+MERGE_PERIOD = 2.0  # Seconds between global map merges (--fleet)
+FLEET_MAP = 'fleet_map.npz'  # Merged map written with --fleet
+MAX_BODY = 1 << 20
+FRAME_HEADER = struct.Struct('>I')
+ACK_OK = b'\x01'
+ACK_ERROR = b'\x00'
+
+scan_ring = None  # Set in main, shared with map.py
+json_sink = False  # Also write every scan to lidar_scans.json (debug only)
+session_writer = None  # Optional session log recorder (--record)
+fusion_pool = None  # Per-vehicle fusion workers (--fleet), replaces the scan ring
+
+"""
+Ingest Stats
+Counters for the receive -> decode -> scan ring path
+Each counter has one writer: received and the queue counters are event loop only,
+the rest decode thread only, so the += never race
 """
-Server Handling Class
-Provides code for POST capabilities
+class IngestStats:
+    def __init__(self):
+        self.received = 0  # Bodies (a batch counts once)
+        self.batched = 0  # Scans inside batches beyond the first, counted when the batch is decoded
+        self.published = 0
+        self.decode_errors = 0
+        self.ring_drops = 0
+        self.queue_full_waits = 0  # Times a connection had to wait on a full queue (backpressure)
+        self.queue_wait_s = 0.0
+        self.max_queue_depth = 0
+        self.latencies = deque(maxlen=4096)  # Receive -> published in the scan ring, seconds
+
+    def summary(self, queue_depth):
+        if self.latencies:
+            p50, p99 = np.percentile(np.fromiter(self.latencies, dtype=np.float64), [50, 99]) * 1000
+        else:
+            p50 = p99 = 0.0
+        return (f"received {self.received + self.batched} published {self.published} decode_err {self.decode_errors} "
+                f"ring_drop {self.ring_drops} | queue {queue_depth}/{QUEUE_SIZE} max {self.max_queue_depth} "
+                f"full_waits {self.queue_full_waits} wait {self.queue_wait_s:.3f}s | "
+                f"latency p50 {p50:.2f}ms p99 {p99:.2f}ms")
+
+stats = IngestStats()
+
+"""
+Receive Path
+HTTP/1.1 keep-alive POSTs and the raw length-prefixed stream both end in enqueue_scan,
+the event loop itself never decodes or touches the scan ring
+"""
+async def enqueue_scan(queue, body, binary, batch_encoding=None):
+    """
+    :param batch_encoding <str>: None for a single scan, '' or 'deflate' for a scan_frame batch
+    """
+    stats.received += 1
+    item = (time.perf_counter(), body, binary, batch_encoding)
+    if queue.full():
+        stats.queue_full_waits += 1
+        wait_start = time.perf_counter()
+        await queue.put(item)  # Stops reading this connection until the decoder catches up
+        stats.queue_wait_s += time.perf_counter() - wait_start
+    else:
+        queue.put_nowait(item)
+    stats.max_queue_depth = max(stats.max_queue_depth, queue.qsize())
+
+async def handle_http(reader, writer, queue):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                headers[key.strip().lower()] = value.strip().lower()
+
+            content_length = int(headers.get('content-length', 0))
+            if content_length > MAX_BODY:
+                writer.write(b'HTTP/1.1 413 Payload Too Large\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                break
+            body = await reader.readexactly(content_length) if content_length else b''
+
+            parts = request_line.split()
+            version = parts[2] if len(parts) > 2 else b'HTTP/1.0'
+            if version == b'HTTP/1.1':
+                keep_alive = headers.get('connection') != 'close'
+            else:
+                keep_alive = headers.get('connection') == 'keep-alive'
+
+            if parts and parts[0] == b'POST':
+                content_type = headers.get('content-type', '')
+                if content_type.startswith(scan_frame.BATCH_CONTENT_TYPE):
+                    await enqueue_scan(queue, body, True, headers.get('content-encoding', ''))
+                else:
+                    await enqueue_scan(queue, body, content_type.startswith(scan_frame.CONTENT_TYPE))
+                status = b'200 OK'
+            else:
+                status = b'405 Method Not Allowed'
+            writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Length: 0\r\nConnection: ' +
+                         (b'keep-alive' if keep_alive else b'close') + b'\r\n\r\n')
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+        logging.debug("HTTP connection dropped: %s", e)
+    finally:
+        writer.close()
+
+async def handle_stream(reader, writer, queue):
+    try:
+        while True:
+            header = await reader.readexactly(FRAME_HEADER.size)
+            (length,) = FRAME_HEADER.unpack(header)
+            if length > MAX_BODY:
+                writer.write(ACK_ERROR)
+                break
+            body = await reader.readexactly(length)
+            await enqueue_scan(queue, body, scan_frame.is_frame(body))
+            writer.write(ACK_OK)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError) as e:
+        logging.debug("Stream connection dropped: %s", e)
+    finally:
+        writer.close()
+
 """
-class S(BaseHTTPRequestHandler):
-    def _set_response(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-
-    def do_POST(self):
-        content_length = int(self.headers['Content-Length'])  # Gets the size of data
-        post_data = self.rfile.read(content_length)  # Gets the data itself
-        logging.info("POST request,\nPath: %s\nHeaders:\n%s\n\nBody:\n%s\n",
-                str(self.path), str(self.headers), post_data.decode('utf-8'))
-        data = json.loads(post_data)
-        gen_file_out(data["scan_data"], 0)
-        self._set_response()  # Send received response
-        self.wfile.write("POST request for {}".format(self.path).encode('utf-8'))
-
-def run(server_class=HTTPServer, handler_class=S, port=8069):
+Decode Path
+Runs in a single worker thread so json decoding stays off the event loop,
+and so the scan ring keeps exactly one producer
+"""
+def json_distances(data):
+    """
+    :param data <dict>: Decoded JSON body
+    :return: scan_data as a float64 array; ValueError unless it is a non-empty flat list of numbers
+    """
+    distances = np.asarray(data["scan_data"], dtype=np.float64)
+    if distances.ndim != 1 or distances.shape[0] == 0:
+        raise ValueError(f"scan_data must be a non-empty list of distances, got shape {distances.shape}")
+    return distances
+
+def decode_scan(received_at, body, binary):
+    try:
+        if binary:
+            frame = scan_frame.decode_scan(body)
+            publish_scan(frame.distances, frame.car_distance, frame.vehicle, frame.session, received_at)
+        else:
+            data = json.loads(bytes(body))
+            publish_scan(json_distances(data), float(data.get("distance", 0)), int(data.get("vehicle", 0)),
+                         int(data.get("session", 0)), received_at)
+    except (ValueError, KeyError, TypeError) as e:
+        stats.decode_errors += 1
+        logging.warning("Could not decode scan: %s", e)
+        return
+    except Exception:
+        # Anything else is a bug, but one bad scan must not take the decode worker down with it
+        stats.decode_errors += 1
+        logging.exception("Scan dropped")
+        return
+    stats.latencies.append(time.perf_counter() - received_at)
+
+def decode_batch(batch):
+    for received_at, body, binary, batch_encoding in batch:
+        if batch_encoding is None:
+            decode_scan(received_at, body, binary)
+            continue
+        try:
+            payloads = scan_frame.split_batch(zlib.decompress(body) if batch_encoding == 'deflate' else body)
+        except (zlib.error, ValueError) as e:
+            stats.decode_errors += 1
+            logging.warning("Could not decode scan batch: %s", e)
+            continue
+        stats.batched += len(payloads) - 1  # The batch itself was counted once on receive
+        for payload in payloads:
+            decode_scan(received_at, payload, scan_frame.is_frame(payload))
+    if fusion_pool is not None:
+        fusion_pool.flush()  # One message per worker per decoded batch
+
+async def decode_worker(queue, executor):
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < DECODE_BATCH and not queue.empty():
+            batch.append(queue.get_nowait())
+        try:
+            await loop.run_in_executor(executor, decode_batch, batch)
+        except Exception:
+            # Nothing restarts this task: if it ended, the queue would fill and block every connection
+            logging.exception("Decode batch failed")
+
+async def stats_logger(queue):
+    while True:
+        await asyncio.sleep(STATS_PERIOD)
+        logging.info(stats.summary(queue.qsize()))
+        if fusion_pool is not None and fusion_pool.vehicles:
+            for line in fusion_pool.summary().splitlines():
+                logging.info(line)
+
+def merge_fleet(path):
+    points, poses = fusion_pool.merge()
+    save_map(path, points, poses)
+
+async def fleet_merger(executor, path):
+    """
+    Merge stage: combines the workers' newest local maps every MERGE_PERIOD,
+    on its own thread so neither the event loop nor decoding waits for it
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(MERGE_PERIOD)
+        await loop.run_in_executor(executor, merge_fleet, path)
+
+async def serve(port=HTTP_PORT, stream_port=STREAM_PORT, fleet_map=FLEET_MAP):
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='decode')
+    merge_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='merge')
+    http_server = await asyncio.start_server(lambda r, w: handle_http(r, w, queue), '', port)
+    stream_server = await asyncio.start_server(lambda r, w: handle_stream(r, w, queue), '', stream_port)
+    logging.info('Listening for HTTP on %d and scan stream on %d', port, stream_port)
+    tasks = [asyncio.create_task(decode_worker(queue, executor)), asyncio.create_task(stats_logger(queue))]
+    if fusion_pool is not None:
+        tasks.append(asyncio.create_task(fleet_merger(merge_executor, fleet_map)))
+    try:
+        async with http_server, stream_server:
+            await asyncio.gather(http_server.serve_forever(), stream_server.serve_forever())
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=True)
+        merge_executor.shutdown(wait=True)
+
+def run(port=HTTP_PORT, stream_port=STREAM_PORT, fleet_map=FLEET_MAP):
     logging.basicConfig(level=logging.INFO)
-    server_address = ('', port)
-    print(server_address)
-    httpd = server_class(server_address, handler_class)
-    logging.info('Starting httpd...\n')
+    logging.info('Starting ingest server...\n')
     try:
-        httpd.serve_forever()
+        asyncio.run(serve(port, stream_port, fleet_map))
     except KeyboardInterrupt:
         pass
-    httpd.server_close()
-    logging.info('Stopping httpd...\n')
+    logging.info('Stopping ingest server...\n')
 
 def deg_to_rad(degrees):
     return degrees * (math.pi / 180)
 
-# Experimental WIP #
+def scan_heading(data):
+    """
+    Angle of the resultant of all scan vectors in degrees, range [0, 360)
+    """
+    distances = np.asarray(data, dtype=np.float64)[:360]
+    x_sum = np.dot(distances, DEG_COS[:distances.shape[0]])
+    y_sum = np.dot(distances, DEG_SIN[:distances.shape[0]])
+    return math.degrees(math.atan2(y_sum, x_sum)) % 360
+
+def publish_scan(data, car_distance, vehicle=0, session=0, received_at=None):
+    """
+    Hands a received scan to map.py through the scan ring, or to its vehicle's fusion
+    worker with --fleet (and the JSON debug sink if enabled)
+    """
+    # Only the scan ring and the session log use the heading, fleet workers match their own pose
+    heading = scan_heading(data) if scan_ring is not None or session_writer is not None else 0.0
+    if fusion_pool is not None:
+        fusion_pool.submit(vehicle, session, data, car_distance,
+                           time.perf_counter() if received_at is None else received_at)
+        stats.published += 1
+    elif scan_ring.put(data, car_distance, heading) is None:
+        stats.ring_drops += 1
+        if stats.ring_drops == 1:
+            logging.warning("Scan ring full (is map.py running?), dropping scans; see ingest stats for totals")
+    else:
+        stats.published += 1
+    if session_writer is not None:
+        session_writer.append(data, car_distance, heading=heading, vehicle=vehicle, session=session)
+    if json_sink:
+        gen_file_out(np.asarray(data).tolist(), car_distance)
+
+# Debug sink, only used with --json #
 def gen_file_out(data, car_distance):
     with open('lidar_scans.json', 'w', encoding='utf-8') as fp:
         # Initialize x and y components
@@ -87,8 +355,41 @@ def gen_file_out(data, car_distance):
 #          === [Main Function] ===          #
 # ========================================= #
 if __name__ == '__main__':
-    open('lidar_scans.json', 'w').close()  # Clear data.out file
-    if len(argv) == 2:
-        run(port=int(argv[1]))
+    parser = argparse.ArgumentParser(description='LiDAR scan ingest server')
+    parser.add_argument('port', nargs='?', type=int, default=HTTP_PORT, help='HTTP port')
+    parser.add_argument('--stream-port', type=int, default=STREAM_PORT, help='length-prefixed stream port')
+    parser.add_argument('--json', action='store_true', help='also write each scan to lidar_scans.json')
+    parser.add_argument('--record', metavar='PATH', help='append every scan to a session log (session_log.py)')
+    parser.add_argument('--fleet', nargs='?', type=int, const=0, default=None, metavar='WORKERS',
+                        help='fuse each vehicle / session in a worker process (default one per core) instead of '
+                             'publishing to the scan ring')
+    parser.add_argument('--fleet-map', default=FLEET_MAP, help='merged map written with --fleet')
+    parser.add_argument('--start', action='append', default=[], metavar='VEHICLE:X,Y,HEADING',
+                        help='global start pose of a vehicle for the merged map (mm, degrees), repeatable')
+    args = parser.parse_args()
+
+    json_sink = args.json
+    if json_sink:
+        open('lidar_scans.json', 'w').close()  # Clear data.out file
+    if args.record:
+        session_writer = SessionWriter(args.record)
+    if args.fleet is not None:
+        starts = {}
+        for start in args.start:
+            vehicle, _, pose = start.partition(':')
+            starts[int(vehicle)] = tuple(float(v) for v in pose.split(','))
+        fusion_pool = FusionPool(workers=args.fleet or None, starts=starts)
+        print(f"Fleet fusion on {fusion_pool.workers} workers, merged map -> {args.fleet_map}")
     else:
-        run()
\ No newline at end of file
+        scan_ring = ScanRing.create()
+    try:
+        run(port=args.port, stream_port=args.stream_port, fleet_map=args.fleet_map)
+    finally:
+        if scan_ring is not None:
+            scan_ring.close()
+        if fusion_pool is not None:
+            fusion_pool.close()
+            merge_fleet(args.fleet_map)
+            print(fusion_pool.summary())
+        if session_writer is not None:
+            session_writer.close()
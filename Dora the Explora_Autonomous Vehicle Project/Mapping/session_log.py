@@ -0,0 +1,296 @@
+"""
+\file       session_log.py
+\brief      Append-only binary session log of LiDAR scans with a sidecar index
+            <name>.scans holds a 64 byte header and fixed-width scan records,
+            <name>.scans.idx holds one (offset, timestamp) entry per record.
+            Both are memory-mapped for reading, so replay tools can jump to scan N
+            directly, find the scan at time T with a binary search over the index,
+            and iterate in batches without loading the whole session.
+            Records carry the (vehicle, session) tags of the scan frame, so a log
+            recorded from a fleet (server.py --fleet --record) replays per car.
+
+            Run:  python session_log.py convert data.txt drive.scans [--period 0.1]
+                  python session_log.py info drive.scans
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import os
+import struct
+import time
+import numpy as np
+from scan_text_parser import ParseStats, iter_batches
+
+""" [Constants] """
+MAGIC = b'DSES'
+LOG_VERSION = 2  # 2 adds vehicle / session to each record, version 1 logs are still read
+SCAN_BINS = 360
+HEADER = struct.Struct('<4sHHI')  # magic, version, bins, record size
+HEADER_SIZE = 64
+INDEX_SUFFIX = '.idx'
+FLUSH_EVERY = 64  # Records between flushes while logging live
+
+RECORD_DTYPE = np.dtype([
+    ('timestamp_us', '<u8'),
+    ('seq', '<u4'),
+    ('vehicle', '<u2'),  # Scan frame tags (scan_frame.py), 0 for untagged scans
+    ('session', '<u4'),
+    ('angle', '<f4'),  # Angle field of the text log / heading used for pose integration
+    ('car_distance', '<f4'),
+    ('heading', '<f4'),
+    ('distances', '<f4', (SCAN_BINS,)),
+])
+RECORD_DTYPE_V1 = np.dtype([
+    ('timestamp_us', '<u8'),
+    ('seq', '<u4'),
+    ('angle', '<f4'),
+    ('car_distance', '<f4'),
+    ('heading', '<f4'),
+    ('distances', '<f4', (SCAN_BINS,)),
+])
+RECORD_DTYPES = {1: RECORD_DTYPE_V1, 2: RECORD_DTYPE}
+INDEX_DTYPE = np.dtype([
+    ('offset', '<u8'),
+    ('timestamp_us', '<u8'),
+])
+
+
+class SessionWriter:
+    """
+    Appends scan records to a session log, creating it if needed.
+    Records must be appended in timestamp order.
+    """
+    def __init__(self, path):
+        self.path = path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._data = open(path, 'ab')
+        self._index = open(path + INDEX_SUFFIX, 'ab')
+        if new_file:
+            header = HEADER.pack(MAGIC, LOG_VERSION, SCAN_BINS, RECORD_DTYPE.itemsize)
+            self._data.write(header.ljust(HEADER_SIZE, b'\0'))
+        elif _check_header(path) is not RECORD_DTYPE:
+            raise ValueError(f"{path}: older session log version, record to a new file")
+        self._count = (self._data.tell() - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        self._unflushed = 0
+        self._record = np.zeros(1, dtype=RECORD_DTYPE)
+        self._entry = np.zeros(1, dtype=INDEX_DTYPE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, distances, car_distance=0.0, angle=0.0, heading=0.0, timestamp_us=None, seq=None,
+               vehicle=0, session=0):
+        """
+        Appends one scan.
+
+        :param distances <array-like>: Up to 360 distances, index is the angle in degrees
+        :param timestamp_us <int>: Capture time, defaults to now
+        :param seq <int>: Sequence number, defaults to the record number
+        :param vehicle <int>: Vehicle id of the scan frame
+        :param session <int>: Session id of the scan frame
+        :return: record number of the scan
+        """
+        record = self._record[0]
+        distances = np.asarray(distances, dtype=np.float32)[:SCAN_BINS]
+        record['distances'][:distances.shape[0]] = distances
+        record['distances'][distances.shape[0]:] = 0
+        record['timestamp_us'] = time.time_ns() // 1000 if timestamp_us is None else timestamp_us
+        record['seq'] = self._count if seq is None else seq
+        record['vehicle'] = vehicle
+        record['session'] = session
+        record['angle'] = angle
+        record['car_distance'] = car_distance
+        record['heading'] = heading
+        self.append_records(self._record)
+        if self._unflushed >= FLUSH_EVERY:
+            self.flush()
+        return self._count - 1
+
+    def append_records(self, records):
+        """
+        Appends a block of records in one write (used for bulk conversion).
+
+        :param records <np.ndarray>: RECORD_DTYPE array
+        :return: none
+        """
+        count = records.shape[0]
+        entries = np.empty(count, dtype=INDEX_DTYPE)
+        entries['offset'] = HEADER_SIZE + (self._count + np.arange(count, dtype=np.uint64)) * RECORD_DTYPE.itemsize
+        entries['timestamp_us'] = records['timestamp_us']
+        self._data.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+        self._index.write(entries.tobytes())
+        self._count += count
+        self._unflushed += count
+
+    def flush(self):
+        # Data first, so the index never points past the end of the data file
+        self._data.flush()
+        self._index.flush()
+        self._unflushed = 0
+
+    def close(self):
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+
+class SessionLog:
+    """
+    Read-only, memory-mapped view of a session log.
+    Indexing returns record views (fields: timestamp_us, seq, vehicle, session, angle, car_distance,
+    heading, distances; version 1 logs have no vehicle / session).
+    """
+    def __init__(self, path):
+        self.path = path
+        self.dtype = _check_header(path)
+        count = (os.path.getsize(path) - HEADER_SIZE) // self.dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+        index_path = path + INDEX_SUFFIX
+        entries = os.path.getsize(index_path) // INDEX_DTYPE.itemsize if os.path.exists(index_path) else 0
+        if entries < count:
+            # Index lagging behind the data (e.g. logger killed before a flush), use the records
+            self.index = None
+        else:
+            self.index = np.memmap(index_path, dtype=INDEX_DTYPE, mode='r', shape=(count,)) if count else None
+
+    def __len__(self):
+        return self.records.shape[0]
+
+    def __getitem__(self, n):
+        return self.records[n]
+
+    @property
+    def timestamps(self):
+        if self.index is not None:
+            return self.index['timestamp_us']
+        return self.records['timestamp_us']
+
+    def find_time(self, timestamp_us):
+        """
+        :param timestamp_us <int>: Time to look up
+        :return: record number of the last scan at or before timestamp_us (0 if it is before the first scan)
+        """
+        n = int(np.searchsorted(self.timestamps, timestamp_us, side='right')) - 1
+        return max(0, n)
+
+    def keys(self):
+        """
+        :return: (K, 2) distinct (vehicle, session) pairs in the log ([[0, 0]] for version 1 logs)
+        """
+        if 'vehicle' not in self.dtype.names:
+            return np.zeros((1 if len(self) else 0, 2), dtype=np.int64)
+        keys = (self.records['vehicle'].astype(np.int64) << 32) | self.records['session']
+        keys = np.unique(keys)
+        return np.stack([keys >> 32, keys & 0xFFFFFFFF], axis=1)
+
+    def select(self, vehicle, session=None):
+        """
+        :param vehicle <int>: Vehicle id
+        :param session <int>: Session id, None = every session of the vehicle
+        :return: record numbers of that vehicle's scans, in order
+        """
+        if 'vehicle' not in self.dtype.names:
+            match = np.full(len(self), vehicle == 0 and session in (None, 0))
+        else:
+            match = self.records['vehicle'] == vehicle
+            if session is not None:
+                match &= self.records['session'] == session
+        return np.flatnonzero(match)
+
+    def iter_batches(self, batch_size=4096, start=0, stop=None, vehicle=None, session=None):
+        """
+        Yields consecutive record slices (memory-mapped views) of at most batch_size scans.
+        With `vehicle` only that vehicle's records are yielded (copies, see select()).
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if vehicle is None:
+            for first in range(start, stop, batch_size):
+                yield self.records[first:min(first + batch_size, stop)]
+            return
+        numbers = self.select(vehicle, session)
+        numbers = numbers[(numbers >= start) & (numbers < stop)]
+        for first in range(0, numbers.shape[0], batch_size):
+            yield self.records[numbers[first:first + batch_size]]
+
+
+def _check_header(path):
+    """:return: record dtype of the log's version"""
+    with open(path, 'rb') as fp:
+        header = fp.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path}: not a session log (file too short)")
+    magic, version, bins, record_size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a session log (bad magic)")
+    dtype = RECORD_DTYPES.get(version)
+    if dtype is None or bins != SCAN_BINS or record_size != dtype.itemsize:
+        raise ValueError(f"{path}: unsupported session log (version {version}, {bins} bins, {record_size} B records)")
+    return dtype
+
+
+def convert_text_log(text_path, session_path, period=0.1, start_us=0, batch_size=4096):
+    """
+    Converts a '{angle,distance} [d0,d1,...]' text log into a session log.
+    Text logs carry no timestamps, so scans are spaced `period` seconds apart.
+
+    :return: (scans written, malformed lines skipped)
+    """
+    records = np.zeros(batch_size, dtype=RECORD_DTYPE)
+    stats = ParseStats()
+    written = 0
+    with SessionWriter(session_path) as writer:
+        for batch in iter_batches(text_path, batch_size=batch_size, stats=stats):
+            count = batch.angle.shape[0]
+            block = records[:count]
+            block['distances'] = batch.distances
+            block['angle'] = batch.angle
+            block['car_distance'] = batch.distance_travelled
+            block['seq'] = written + np.arange(count)
+            block['timestamp_us'] = start_us + np.round((written + np.arange(count)) * period * 1e6).astype(np.uint64)
+            writer.append_records(block)
+            written += count
+    skipped = stats.malformed
+    return written, skipped
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Session log tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help='convert a text scan log')
+    convert.add_argument('text_log')
+    convert.add_argument('session_log')
+    convert.add_argument('--period', type=float, default=0.1, help='seconds between scans')
+    info = commands.add_parser('info', help='summarize a session log')
+    info.add_argument('session_log')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        start = time.perf_counter()
+        written, skipped = convert_text_log(args.text_log, args.session_log, args.period)
+        print(f"Wrote {written} scans ({skipped} malformed lines skipped) in {time.perf_counter() - start:.2f}s")
+    else:
+        log = SessionLog(args.session_log)
+        if len(log) == 0:
+            print("Empty session")
+        else:
+            duration = (int(log.timestamps[-1]) - int(log.timestamps[0])) / 1e6
+            print(f"{len(log)} scans, {duration:.1f}s, index {'ok' if log.index is not None else 'missing/stale'}")
+            for vehicle, session in log.keys():
+                print(f"  vehicle {vehicle} session {session:08x}: {log.select(vehicle, session).shape[0]} scans")
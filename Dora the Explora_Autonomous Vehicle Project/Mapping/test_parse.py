@@ -1,82 +1,22 @@
+import argparse
 import math
-import numpy as np
-
-import math
+import threading
 import numpy as np
 import open3d as o3d
 import time
-
-def parse_data(input_str):
-    try:
-        # Split the line into two parts: angle-distance and distances array
-        parts = input_str.split(' ', 1)  # Split only at the first space
-        if len(parts) < 2:
-            print(f"Invalid input format: {input_str}")
-            return None, None, None
-        
-        # Extract and parse the angle and distance travelled
-        angle_distance_str = parts[0].strip('{}')
-        angle_distance_parts = angle_distance_str.split(',')
-        
-        if len(angle_distance_parts) < 2:
-            print(f"Invalid angle-distance format: {angle_distance_str}")
-            return None, None, None
-        
-        angle = float(angle_distance_parts[0])
-        distance_travelled = float(angle_distance_parts[1])
-        
-        # Extract and parse the distances array
-        distances_str = parts[1].strip('[]').strip()
-        if not distances_str:
-            print(f"Empty distances array: {input_str}")
-            return angle, distance_travelled, []
-        
-        distances = list(map(float, distances_str.split(',')))
-        return angle, distance_travelled, distances
-    except Exception as e:
-        print(f"Error parsing input data: {e}")
-        print(f"Input string causing error: {input_str}")
-        return None, None, None
-
-def polar_to_cartesian(distances, translation):
-    points = []
-    for degree in range(360):
-        if degree < len(distances):
-            distance = distances[degree]
-            if distance == 0:
-                continue  # Skip zero distances
-            radians = math.radians(degree)
-            x = distance * math.cos(radians) + translation[0]
-            y = distance * math.sin(radians) + translation[1]
-            z = 0  # Assuming 2D LiDAR
-            points.append([x, y, z])
-    return np.array(points)
-
-def create_point_cloud(points, color):
-    pcd = o3d.geometry.PointCloud()
-    pcd.points = o3d.utility.Vector3dVector(points)
-    pcd.colors = o3d.utility.Vector3dVector(np.tile(color, (points.shape[0], 1)))
-    return pcd
-
-def update_view(vis, pcd):
-    vis.update_geometry(pcd)
-    vis.poll_events()
-    vis.update_renderer()
-
-    # Fit the view to the new set of points
-    view_ctl = vis.get_view_control()
-    bounds = pcd.get_axis_aligned_bounding_box()
-    center = bounds.get_center()
-    extent = bounds.get_extent()
-
-    # Set the lookat point to the center of the bounding box
-    view_ctl.set_lookat(center)
-    # Set the front to a reasonable direction
-    view_ctl.set_front([0.0, 0.0, -1.0])
-    # Set the up direction
-    view_ctl.set_up([0.0, 1.0, 0.0])
-    # Adjust the zoom to fit the bounding box
-    view_ctl.set_zoom(2.0 / max(extent))  # Adjust this factor as needed
+from scan_convert import polar_to_cartesian
+from point_buffer import PointBuffer
+from occupancy_grid import OccupancyGrid
+from scan_text_parser import ParseStats, iter_batches
+from scan_filter import ScanFilter
+from map_view import MapViewer
+
+POINT_COLOR = [1, 0, 0]  # Red
+SCAN_PERIOD = 1.0  # Seconds between logged scans at 1x (the interactive replay's pace)
+MAP_RESOLUTION = 50  # Grid cell size (mm) for --backend grid
+VIEW_POINT_BUDGET = 250000  # Max points drawn by the viewer
+VIEW_FRONT = [0.0, 0.0, -1.0]
+VIEW_UP = [0.0, 1.0, 0.0]
 
 def update_translation(translation, distance_traveled, angle_degrees):
     angle_radians = math.radians(angle_degrees)
@@ -84,66 +24,152 @@ def update_translation(translation, distance_traveled, angle_degrees):
     translation[1] += distance_traveled * math.sin(angle_radians)
     return translation
 
-def process_and_display(filename):
-    # Initialize Open3D visualizer with specific window dimensions
-    vis = o3d.visualization.Visualizer()
-    vis.create_window(window_name='LiDAR Point Cloud', width=800, height=600)
-
-    # Initial translation
-    translation = [0, 0, 0]
-    # Store all points
-    all_points = []
-
-    # Create an empty point cloud object for initial visualization
-    pcd = o3d.geometry.PointCloud()
-    vis.add_geometry(pcd)
-
-    # Read and process each line in the file
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-
-    try:
-        for i, line in enumerate(lines):
-            line = line.strip()
-            print(f"Processing line {i + 1}: {line}")
-            angle, distance_travelled, distances = parse_data(line)
-
-            if angle is not None and distance_travelled is not None and distances is not None:
-                print(f"Line {i + 1} Parsed Angle: {angle}")
-                print(f"Line {i + 1} Parsed Distance Travelled: {distance_travelled}")
-                print(f"Line {i + 1} Parsed Distances Array: {distances}")
-                print()
-
+def process_and_display(filename, scan_filter=None):
+    # Open3D window, drawn on its own timer from this (main) thread
+    viewer = MapViewer('LiDAR Point Cloud', width=800, height=600, budget=VIEW_POINT_BUDGET,
+                       color=POINT_COLOR, front=VIEW_FRONT, up=VIEW_UP)
+    stop = threading.Event()
+
+    def replay():
+        # Initial translation
+        translation = [0, 0, 0]
+        # Parse the file in bulk; malformed lines are counted in stats instead of printed
+        stats = ParseStats()
+
+        for batch in iter_batches(filename, stats=stats):
+            for angle, distance_travelled, distances in zip(*batch):
+                if scan_filter is not None:
+                    distances = scan_filter.apply(distances)
+                # distance_travelled is the odometry up to this scan's capture time, so move first (as map.py)
+                translation = update_translation(translation, distance_travelled, angle)
                 # Convert to Cartesian coordinates with current translation
                 new_points = polar_to_cartesian(distances, translation)
 
-                # Add new points to the accumulated points
-                all_points.extend(new_points)
-
-                # Create point cloud from all accumulated points
-                pcd.points = o3d.utility.Vector3dVector(np.array(all_points))
-                pcd.colors = o3d.utility.Vector3dVector(np.tile([1, 0, 0], (len(all_points), 1)))  # Red color
-
-                # Update the visualizer
-                vis.clear_geometries()
-                vis.add_geometry(pcd)
-
-                # Adjust view to fit all points
-                update_view(vis, pcd)
-
-                # Simulate movement by updating the translation
-                translation = update_translation(translation, distance_travelled, angle)
+                # Add only the new points to the viewer's level-of-detail copy
+                viewer.add_points(new_points)
 
                 # Wait for 1 second before the next update
-                time.sleep(1)
-            else:
-                print(f"Failed to parse data on line {i + 1}")
-
+                if stop.wait(1):
+                    return
+        print(stats)
+        if scan_filter is not None:
+            print(scan_filter)
+
+    thread = threading.Thread(target=replay, name='replay', daemon=True)
+    thread.start()
+    try:
+        # Keeps rendering after the end of the log until the window is closed
+        viewer.run()
     except KeyboardInterrupt:
-        # Close the visualizer on interrupt
-        vis.destroy_window()
-
-# Example usage
-filename = 'data.txt'
-process_and_display(filename)
-
+        pass
+    stop.set()
+    # Close the visualizer
+    viewer.close()
+
+def replay_headless(filename, speed=0.0, render_every=0, output=None, backend='points',
+                    period=SCAN_PERIOD, resolution=MAP_RESOLUTION, scan_filter=None):
+    """
+    Runs the full pipeline (parse, pose integration, point conversion, map fusion)
+    without a per-scan window update, for regression testing maps.
+
+    :param filename <str>: Text scan log
+    :param speed <float>: Realtime factor (1 = one scan per `period`, 10 = ten times faster, 0 = as fast as possible)
+    :param render_every <int>: Update a live window every Nth scan, 0 = no window
+    :param output <str>: Write the final map to a .ply point cloud or a .png screenshot
+    :param backend <str>: 'points' keeps every return, 'grid' fuses them into an OccupancyGrid
+    :param scan_filter <ScanFilter>: Preprocess each scan before conversion, None = raw scans
+    :return: (map points (M, 3), final translation, ParseStats)
+    """
+    translation = [0, 0, 0]
+    map_points = PointBuffer()
+    occupancy = OccupancyGrid(resolution=resolution) if backend == 'grid' else None
+    stats = ParseStats()
+
+    viewer = None
+    if render_every > 0:
+        viewer = MapViewer('LiDAR Replay', width=800, height=600, budget=VIEW_POINT_BUDGET,
+                           color=POINT_COLOR, front=VIEW_FRONT, up=VIEW_UP)
+
+    scans = 0
+    step = period / speed if speed > 0 else 0.0
+    start = time.perf_counter()
+    try:
+        for batch in iter_batches(filename, stats=stats):
+            for angle, distance_travelled, distances in zip(*batch):
+                if scan_filter is not None:
+                    distances = scan_filter.apply(distances)
+                translation = update_translation(translation, distance_travelled, angle)  # Move first, as map.py
+                new_points = polar_to_cartesian(distances, translation)
+                if occupancy is not None:
+                    occupancy.insert(new_points, translation)
+                else:
+                    map_points.append(new_points)
+                    if viewer is not None:
+                        viewer.add_points(new_points)
+                scans += 1
+
+                if viewer is not None and scans % render_every == 0:
+                    if occupancy is not None:
+                        viewer.set_points(occupancy.occupied_centers())
+                    viewer.render()
+
+                # Hold the realtime factor against the schedule, not per-scan sleeps, so slow scans catch up
+                if step:
+                    delay = start + scans * step - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+    except KeyboardInterrupt:
+        pass
+    elapsed = time.perf_counter() - start
+
+    points = _map_points(map_points, occupancy)
+    print(f"Replayed {scans} scans in {elapsed:.2f}s ({scans / elapsed if elapsed else 0:.0f} scans/s, "
+          f"x{scans * period / elapsed if elapsed else 0:.0f} realtime), {points.shape[0]} map points, "
+          f"final translation ({translation[0]:.1f}, {translation[1]:.1f})  {stats}")
+    if scan_filter is not None:
+        print(scan_filter)
+
+    if output:
+        if output.endswith('.png'):
+            if viewer is None:
+                viewer = MapViewer('LiDAR Replay', width=800, height=600, budget=VIEW_POINT_BUDGET,
+                                   color=POINT_COLOR, front=VIEW_FRONT, up=VIEW_UP, visible=False)
+            viewer.set_points(points)
+            viewer.capture(output)
+        else:
+            pcd = o3d.geometry.PointCloud()
+            pcd.points = o3d.utility.Vector3dVector(points)
+            pcd.colors = o3d.utility.Vector3dVector(np.tile(POINT_COLOR, (points.shape[0], 1)))
+            o3d.io.write_point_cloud(output, pcd)
+        print(f"Wrote {output}")
+    if viewer is not None:
+        print(viewer)
+        viewer.close()
+    return points, translation, stats
+
+def _map_points(map_points, occupancy):
+    return occupancy.occupied_centers() if occupancy is not None else map_points.points
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a text scan log into a map')
+    parser.add_argument('filename', nargs='?', default='data.txt')
+    parser.add_argument('--headless', action='store_true', help='replay as fast as --speed allows, without the per-scan window')
+    parser.add_argument('--speed', default='max', help='realtime factor for --headless: 1, 10, ... or max')
+    parser.add_argument('--render-every', type=int, default=0, help='update a window every Nth scan (--headless)')
+    parser.add_argument('--out', help='write the final map to a .ply or .png file (--headless)')
+    parser.add_argument('--backend', choices=['points', 'grid'], default='points', help='map fusion (--headless)')
+    parser.add_argument('--period', type=float, default=SCAN_PERIOD, help='seconds between logged scans at 1x')
+    parser.add_argument('--downsample', choices=['voxel', 'angular', 'none'], default='voxel',
+                        help='per-scan downsampling in the scan filter')
+    parser.add_argument('--no-filter', action='store_true', help='map the raw scans (no clipping, spike rejection or downsampling)')
+    args = parser.parse_args()
+
+    scan_filter = None
+    if not args.no_filter:
+        scan_filter = ScanFilter(downsample=None if args.downsample == 'none' else args.downsample)
+    if args.headless:
+        speed = 0.0 if args.speed == 'max' else float(args.speed.rstrip('x'))
+        replay_headless(args.filename, speed, args.render_every, args.out, args.backend, args.period,
+                        scan_filter=scan_filter)
+    else:
+        process_and_display(args.filename, scan_filter)
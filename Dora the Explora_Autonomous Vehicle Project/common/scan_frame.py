@@ -0,0 +1,174 @@
+"""
+\file       scan_frame.py
+\brief      Versioned binary wire format for LiDAR scans (Pi -> mapping server)
+            Shared by pi/lidar_test.py (encode) and Mapping/server.py (decode)
+
+            Frame layout (little-endian):
+              magic       4s   b'DSCN'
+              version     u8   FRAME_VERSION
+              encoding    u8   ENC_UINT16_MM or ENC_FLOAT16, | FLAG_QUALITY if quality bytes follow
+              bins        u16  number of distance bins (360)
+              seq         u32  scan sequence number
+              timestamp   u64  microseconds since the epoch
+              car_dist    f32  distance travelled since the previous scan
+              heading     f32  heading in degrees
+              vehicle     u16  vehicle ID (version 2)
+              session     u32  session ID, new every time the car's software starts (version 2)
+              distances   bins * 2 bytes (uint16 millimetres or float16)
+              quality     bins * 1 byte (optional)
+
+            360 uint16 bins = 754 bytes per scan vs ~3 KB of JSON text. Version 1 frames
+            (no vehicle / session) still decode, as vehicle 0 session 0.
+
+            Batches (BATCH_CONTENT_TYPE) carry several scans in one POST: each payload
+            (a frame or a JSON scan) prefixed with its u32 big-endian length, the same
+            framing as server.py's raw stream. Optionally deflated (Content-Encoding: deflate).
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+from collections import namedtuple
+import struct
+import time
+import numpy as np
+
+""" [Constants] """
+MAGIC = b'DSCN'
+FRAME_VERSION = 2
+ENC_UINT16_MM = 0
+ENC_FLOAT16 = 1
+FLAG_QUALITY = 0x80
+CONTENT_TYPE = 'application/x-dora-scan'  # HTTP Content-Type for binary frames
+BATCH_CONTENT_TYPE = 'application/x-dora-scan-batch'  # HTTP Content-Type for length-prefixed batches
+HEADER = struct.Struct('<4sBBHIQffHI')
+HEADER_V1 = struct.Struct('<4sBBHIQff')
+UINT16_MAX_MM = 65535
+BATCH_LENGTH = struct.Struct('>I')
+
+_PAYLOAD_DTYPES = {
+    ENC_UINT16_MM: np.dtype('<u2'),
+    ENC_FLOAT16: np.dtype('<f2'),
+}
+
+ScanFrame = namedtuple('ScanFrame', ['seq', 'timestamp_us', 'car_distance', 'heading', 'distances', 'quality',
+                                     'vehicle', 'session'])
+
+
+class FrameError(ValueError):
+    """Raised for buffers that are not a valid scan frame."""
+
+
+def is_frame(data):
+    """True if `data` starts with the binary frame magic (used to sniff JSON vs binary)."""
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def encode_scan(distances, car_distance=0.0, heading=0.0, seq=0, timestamp_us=None,
+                encoding=ENC_UINT16_MM, quality=None, vehicle=0, session=0):
+    """
+    Packs one scan into a binary frame.
+
+    :param distances <array-like>: Distances in mm, index is the bin
+    :param car_distance <float>: Distance travelled since the previous scan
+    :param heading <float>: Heading in degrees
+    :param seq <int>: Scan sequence number (wraps at 2^32)
+    :param timestamp_us <int>: Capture time, defaults to now
+    :param encoding <int>: ENC_UINT16_MM (rounded to whole mm, clipped to 65535) or ENC_FLOAT16
+    :param quality <array-like>: Optional per-bin quality (0-255)
+    :param vehicle <int>: Vehicle ID (0 - 65535)
+    :param session <int>: Session ID (wraps at 2^32)
+    :return: bytes
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    if encoding == ENC_UINT16_MM:
+        payload = np.clip(np.rint(distances), 0, UINT16_MAX_MM).astype('<u2')
+    elif encoding == ENC_FLOAT16:
+        payload = distances.astype('<f2')
+    else:
+        raise FrameError(f"Unknown encoding {encoding}")
+    if timestamp_us is None:
+        timestamp_us = time.time_ns() // 1000
+
+    flags = encoding
+    parts = [None, payload.tobytes()]
+    if quality is not None:
+        flags |= FLAG_QUALITY
+        parts.append(np.asarray(quality, dtype=np.uint8)[:payload.shape[0]].tobytes())
+    parts[0] = HEADER.pack(MAGIC, FRAME_VERSION, flags, payload.shape[0], seq & 0xFFFFFFFF,
+                           timestamp_us, car_distance, heading, vehicle & 0xFFFF, session & 0xFFFFFFFF)
+    return b''.join(parts)
+
+
+def decode_scan(data):
+    """
+    Unpacks a binary frame without copying the payload.
+
+    :param data <bytes-like>: One complete frame
+    :return: ScanFrame; distances (and quality) are read-only np.frombuffer views into `data`
+    """
+    if len(data) < HEADER_V1.size:
+        raise FrameError(f"Frame too short ({len(data)} bytes)")
+    magic, version, flags, bins, seq, timestamp_us, car_distance, heading = HEADER_V1.unpack_from(data)
+    if magic != MAGIC:
+        raise FrameError("Bad frame magic")
+    if version == FRAME_VERSION:
+        if len(data) < HEADER.size:
+            raise FrameError(f"Frame too short ({len(data)} bytes)")
+        vehicle, session = HEADER.unpack_from(data)[-2:]
+        header_size = HEADER.size
+    elif version == 1:
+        vehicle = session = 0
+        header_size = HEADER_V1.size
+    else:
+        raise FrameError(f"Unsupported frame version {version}")
+    dtype = _PAYLOAD_DTYPES.get(flags & ~FLAG_QUALITY)
+    if dtype is None:
+        raise FrameError(f"Unknown encoding {flags & ~FLAG_QUALITY}")
+
+    has_quality = bool(flags & FLAG_QUALITY)
+    expected = header_size + bins * dtype.itemsize + (bins if has_quality else 0)
+    if len(data) != expected:
+        raise FrameError(f"Frame is {len(data)} bytes, expected {expected}")
+    distances = np.frombuffer(data, dtype=dtype, count=bins, offset=header_size)
+    quality = None
+    if has_quality:
+        quality = np.frombuffer(data, dtype=np.uint8, count=bins, offset=header_size + bins * dtype.itemsize)
+    return ScanFrame(seq, timestamp_us, car_distance, heading, distances, quality, vehicle, session)
+
+
+def encode_batch(payloads):
+    """
+    :param payloads <list of bytes>: Encoded scans (frames or JSON)
+    :return: bytes, each payload prefixed with its length
+    """
+    parts = []
+    for payload in payloads:
+        parts.append(BATCH_LENGTH.pack(len(payload)))
+        parts.append(payload)
+    return b''.join(parts)
+
+
+def split_batch(data):
+    """
+    :param data <bytes-like>: A batch from encode_batch()
+    :return: list of memoryviews, one per payload
+    """
+    view = memoryview(data)
+    payloads = []
+    offset = 0
+    while offset < len(view):
+        if len(view) - offset < BATCH_LENGTH.size:
+            raise FrameError("Truncated batch length")
+        (length,) = BATCH_LENGTH.unpack_from(view, offset)
+        offset += BATCH_LENGTH.size
+        if length > len(view) - offset:
+            raise FrameError(f"Batch entry of {length} bytes runs past the end")
+        payloads.append(view[offset:offset + length])
+        offset += length
+    return payloads
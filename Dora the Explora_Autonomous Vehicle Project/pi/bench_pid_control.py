@@ -0,0 +1,246 @@
+"""
+\file       bench_pid_control.py
+\brief      Equivalence check and microbenchmark of pid_control vs the old PID_control
+            Runs both on recorded scans (text log '{angle,distance} [d0,...]') or on
+            synthetic corridor scans, compares (direction, percent_ang, brake, integral)
+            and reports microseconds per call against pid_control.BUDGET_US.
+            Run:  python bench_pid_control.py [data.txt] [--scans 2000]
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import contextlib
+import io
+import time
+import numpy as np
+from pid_control import pid_control, Kfw, Ki, BUDGET_US
+
+
+def find_longest_string_of_zeros(arr):
+    max_length = 0
+    current_length = 0
+    max_start_index = -1
+    max_end_index = -1
+    current_start_index = -1
+
+    for i, num in (arr):
+        if num == 0:
+            if current_length == 0:
+                current_start_index = i  # Start of a new sequence of 0s
+            current_length += 1
+        else:
+            if current_length > max_length:
+                max_length = current_length
+                max_start_index = current_start_index
+                max_end_index = i - 1
+            current_length = 0
+
+    # Final check in case the array ends with a sequence of 0s
+    if current_length > max_length:
+        max_length = current_length
+        max_start_index = current_start_index
+        max_end_index = len(arr) - 1
+
+    return max_length, max_start_index, max_end_index
+
+def legacy_PID_control(scan_data, fw_integral, pico_rdy):
+    # PID_control as it was in lidar_test.py, globals passed in and the integral returned
+    rh_vectors = []
+    lh_vectors = []
+    fw_vectors = []
+    for angle, distance in enumerate(scan_data):
+        # Process Right Hand Vectors
+        if (angle >= 0 and angle <= 20) or (angle <= 360 and angle >= 340):
+            lh_vectors.append((angle, distance))
+        elif (angle >= 160 and angle <= 200):
+            rh_vectors.append((angle, distance))
+        if (angle >= 0 and angle <= 180):
+            fw_vectors.append((angle, distance))
+            # print(fw_vectors)
+        else:
+            pass  # for now
+
+    """ Target Angle """
+    # Get the longest string of zeros array (the angle we want to be)
+    zero_length, zero_start, zero_end = find_longest_string_of_zeros(fw_vectors)
+    largest_sum_index = -1
+    max_sum = 0
+    brake = 'F'
+    target_distance = 0
+    if zero_length < 5:
+        print("!!Non Zero Target Selected!!")
+        for i in range(len(fw_vectors) -5):
+            current_sum = sum(fw_vectors[j][1] for j in range(i, i + 5))
+            if current_sum > max_sum:
+                max_sum = current_sum
+                largest_sum_index = i
+                target_distance = max_sum / 5
+        if target_distance > 1250:
+            target_angle = fw_vectors[largest_sum_index + 2][0]
+        else:
+            brake = 'N'
+    else:
+        target_angle = int((zero_start + zero_end) / 2)
+
+    percent_ang = 0
+    fw_error = (target_angle - 90)
+    fw_deadband = 2
+    
+    """ Proportion """
+    # Check if fw error is greater than deadband and set percent ang if so
+    if fw_error > 90 + fw_deadband or fw_error < 90 - fw_deadband:
+        percent_ang = abs(fw_error) * Kfw
+        percent_ang = min(0.6, percent_ang)
+        if target_angle < 90:
+            percent_ang = -percent_ang
+        fw_ang = percent_ang
+
+    """ Integral """
+    # If Pico Is Ready, Enable Integral Term
+    if pico_rdy == 1:
+        if target_angle < 90:
+            fw_integral += fw_error * Ki
+            fw_integral = max(-0.3, fw_integral)
+        else:
+            fw_integral += fw_error * Ki
+            fw_integral = min(0.3, fw_integral)
+    percent_ang += fw_integral
+
+    """ Obstacle Avoidance """
+    obstacle_avoid_tol = 500
+    obstacle_ang = 0
+    angle_left = -1
+    angle_right = -1
+    dist_short_l = obstacle_avoid_tol + 1
+    dist_short_r = obstacle_avoid_tol + 1
+    for (angle, distance) in fw_vectors[zero_start-5: zero_start]:
+        if distance <= obstacle_avoid_tol and distance < dist_short_l and distance > 0:
+            angle_left = angle
+            dist_short_l = distance
+    if(dist_short_l < obstacle_avoid_tol):
+        print(f"Close Wall Detected Left at Ang: {angle_left} Dist: {dist_short_l}")
+    
+    for (angle, distance) in fw_vectors[zero_end: zero_end + 5]:
+        if distance <= obstacle_avoid_tol and distance < dist_short_r and distance > 0:
+            angle_right = angle
+            dist_short_r = distance
+
+    if(dist_short_r < obstacle_avoid_tol):
+        print(f"Close Wall Detected Right at Ang: {angle_right} Dist: {dist_short_r}")
+    
+    # Krabby Patty Secret Formula
+    if(dist_short_r < dist_short_l):
+        obstacle_ang = 0.2 + (-0.05 / 350) * (dist_short_r - 150)
+        percent_ang += obstacle_ang
+    elif(dist_short_r > dist_short_l):
+        obstacle_ang = 0.2 + (-0.05 / 350) * (dist_short_l - 150) 
+        percent_ang -= obstacle_ang
+    
+    print(f"T Ang: {target_angle} T Dist: {target_distance}\n+ Fw P%: {round(fw_ang, 3)}  Fw I%: {round(fw_integral, 3)}  Ob %: {round(obstacle_ang, 3)}")
+    
+    # Determine Direction to Turn
+    if percent_ang > 0:
+        direction = 'R'
+    elif percent_ang < 0:
+        direction = 'L'
+    else:
+        direction = 'N'
+    
+    print(f"=== [Total % {round(percent_ang, 3)} Dir {direction} Motor Dir {brake}] ===\n\n")
+    return direction, abs(percent_ang), brake, fw_integral
+
+
+def load_scans(path):
+    scans = []
+    with open(path, 'r') as fp:
+        for line in fp:
+            _, _, tail = line.strip().partition(' ')
+            try:
+                distances = [float(d) for d in tail.strip('[]').split(',')]
+            except ValueError:
+                continue
+            scans.append((distances + [0.0] * 360)[:360])
+    return scans
+
+
+def synthetic_scans(count, seed=0):
+    """
+    Corridor-like scans in 0.25 mm steps (like the lidar reports): walls on both sides,
+    open gaps of random width and random dropouts, plus a few all-wall scans.
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.radians(np.arange(360))
+    scans = []
+    for _ in range(count):
+        width = rng.uniform(600, 3000)
+        offset = rng.uniform(0.2, 0.8) * width
+        with np.errstate(divide='ignore'):
+            walls = np.minimum(np.abs(offset / np.cos(angles)), np.abs((width - offset) / np.cos(angles)))
+        walls = np.minimum(walls, rng.uniform(1000, 6000) / np.maximum(np.abs(np.sin(angles)), 1e-3))
+        scan = np.round(np.clip(walls + rng.normal(0, 20, 360), 150, 12000) * 4) / 4
+        if rng.random() < 0.8:
+            gap_start = rng.integers(0, 181)
+            scan[gap_start:gap_start + rng.integers(1, 40)] = 0
+        scan[rng.random(360) < rng.uniform(0, 0.15)] = 0
+        scans.append(scan.tolist())
+    return scans
+
+
+def run_legacy(scan, fw_integral, pico_rdy):
+    # The old function prints on every call and crashes on some scans (see pid_control docstring)
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            return legacy_PID_control(scan, fw_integral, pico_rdy)
+        except (NameError, UnboundLocalError):
+            return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='pid_control equivalence check and microbenchmark')
+    parser.add_argument('log', nargs='?', help='text scan log (synthetic scans if omitted)')
+    parser.add_argument('--scans', type=int, default=2000, help='synthetic scan count')
+    args = parser.parse_args()
+    scans = load_scans(args.log) if args.log else synthetic_scans(args.scans)
+
+    # Equivalence: both controllers carry their own integral across the same scan sequence
+    matched = mismatched = legacy_crashed = 0
+    legacy_integral = new_integral = 0.0
+    for n, scan in enumerate(scans):
+        pico_rdy = 1 if n % 3 else 0
+        expected = run_legacy(scan, legacy_integral, pico_rdy)
+        got = pid_control(scan, new_integral, pico_rdy)
+        new_integral = got[3]
+        if expected is None:
+            legacy_crashed += 1
+            legacy_integral = new_integral  # Stay in step after a scan the old code could not handle
+            continue
+        legacy_integral = expected[3]
+        if expected == got:
+            matched += 1
+        else:
+            mismatched += 1
+            if mismatched <= 5:
+                print(f"scan {n}: legacy {expected} new {got}")
+    print(f"{len(scans)} scans: {matched} identical, {mismatched} different, "
+          f"{legacy_crashed} crashed the old PID_control")
+
+    # Microbenchmark (the old function's prints go to a StringIO, not a terminal)
+    valid = [scan for scan in scans if run_legacy(scan, 0.0, 1) is not None]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for scan in valid:
+            legacy_PID_control(scan, 0.0, 1)
+    legacy_us = (time.perf_counter() - start) / len(valid) * 1e6
+    start = time.perf_counter()
+    for scan in valid:
+        pid_control(scan, 0.0, 1)
+    new_us = (time.perf_counter() - start) / len(valid) * 1e6
+    print(f"legacy PID_control : {legacy_us:8.1f} us/call")
+    print(f"pid_control        : {new_us:8.1f} us/call  (x{legacy_us / new_us:.1f}, budget {BUDGET_US} us)")
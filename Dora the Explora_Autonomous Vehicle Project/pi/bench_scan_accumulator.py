@@ -0,0 +1,62 @@
+"""
+\file       bench_scan_accumulator.py
+\brief      Per-revolution binning cost: old list loop in lidar_test.py vs ScanAccumulator
+            Revolutions are lists of (quality, angle, distance) tuples like lidar.iter_scans() yields.
+            Run:  python bench_scan_accumulator.py [--revolutions 2000] [--per-rev 400]
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import math
+import time
+import numpy as np
+from scan_accumulator import ScanAccumulator
+
+
+def legacy_bin(scan):
+    # The loop from lidar_test.py's main loop
+    scan_data = [0]*360
+    for(quality, angle, distance) in scan:
+        scan_data[min([359, math.floor(angle)])] = distance
+    return scan_data
+
+
+def synthetic_revolutions(count, per_rev, seed=0):
+    rng = np.random.default_rng(seed)
+    revolutions = []
+    for _ in range(count):
+        angle = np.sort(rng.uniform(0, 360, per_rev))
+        distance = np.round(rng.uniform(150, 6000, per_rev) * 4) / 4
+        quality = rng.integers(0, 16, per_rev)
+        revolutions.append([(int(q), float(a), float(d)) for q, a, d in zip(quality, angle, distance)])
+    return revolutions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scan binning benchmark')
+    parser.add_argument('--revolutions', type=int, default=2000)
+    parser.add_argument('--per-rev', type=int, default=400, help='measurements per revolution')
+    args = parser.parse_args()
+    revolutions = synthetic_revolutions(args.revolutions, args.per_rev)
+
+    start = time.perf_counter()
+    for scan in revolutions:
+        legacy_bin(scan)
+    legacy_us = (time.perf_counter() - start) / len(revolutions) * 1e6
+    print(f"legacy list loop    : {legacy_us:8.1f} us/revolution")
+
+    for bins in (360, 720, 1440):
+        for reduction in ('min', 'weighted'):
+            accumulator = ScanAccumulator(bins=bins, reduction=reduction)
+            start = time.perf_counter()
+            for scan in revolutions:
+                accumulator.bin_scan(scan)
+            us = (time.perf_counter() - start) / len(revolutions) * 1e6
+            print(f"{bins:4d} bins {reduction:8s} : {us:8.1f} us/revolution  (x{legacy_us / us:.1f})")
@@ -0,0 +1,96 @@
+"""
+\file       bench_sector_latency.py
+\brief      Scan-to-command latency of sector mode (RollingScan) vs the full-scan path
+            Replays a simulated RPLidar measurement stream on a virtual clock. For each
+            forward sector sample, latency = time until the first steering command that
+            used it. Controller time is the measured cost of pid_control.
+            Run:  python bench_sector_latency.py [--hz 5.5] [--rate 20] [--rotations 500]
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import time
+import numpy as np
+from pid_control import pid_control
+from rolling_scan import RollingScan, FORWARD_SECTOR
+from bench_pid_control import synthetic_scans
+
+
+def measurement_stream(scans, hz, sample_rate):
+    """
+    Yields (t, new_scan, quality, angle, distance) like iter_measurements, one rotation per scan.
+    """
+    period = 1.0 / hz
+    per_rotation = int(sample_rate * period)
+    for n, scan in enumerate(scans):
+        for k in range(per_rotation):
+            angle = 360.0 * k / per_rotation
+            distance = scan[int(angle)]
+            yield n * period + k / sample_rate, k == 0, 15 if distance > 0 else 0, angle, distance
+
+
+def sample_latencies(sample_times, command_times):
+    # Each sample is served by the first command at or after it
+    served = np.searchsorted(command_times, sample_times, side='left')
+    ok = served < command_times.shape[0]
+    return command_times[served[ok]] - sample_times[ok]
+
+
+def run_full(scans, hz, sample_rate, compute):
+    sample_times, command_times = [], []
+    for t, new_scan, quality, angle, distance in measurement_stream(scans, hz, sample_rate):
+        if new_scan and t > 0:
+            # iter_scans hands over the revolution when the next one starts
+            command_times.append(t + compute)
+        if FORWARD_SECTOR[0] <= angle < FORWARD_SECTOR[1]:
+            sample_times.append(t)
+    return np.array(sample_times), np.array(command_times)
+
+
+def run_sector(scans, hz, sample_rate, rate, compute):
+    now = [0.0]
+    rolling = RollingScan(rate=rate, clock=lambda: now[0])
+    sample_times, command_times = [], []
+    for t, new_scan, quality, angle, distance in measurement_stream(scans, hz, sample_rate):
+        now[0] = t
+        if FORWARD_SECTOR[0] <= angle < FORWARD_SECTOR[1]:
+            sample_times.append(t)
+        if rolling.update(new_scan, quality, angle, distance):
+            command_times.append(t + compute)
+    return np.array(sample_times), np.array(command_times)
+
+
+def report(name, sample_times, command_times, duration):
+    lat = sample_latencies(sample_times, command_times) * 1000
+    p50, p99 = np.percentile(lat, [50, 99])
+    print(f"{name:8s}: {command_times.shape[0] / duration:6.1f} commands/s  latency mean {lat.mean():6.1f} ms  "
+          f"p50 {p50:6.1f} ms  p99 {p99:6.1f} ms  max {lat.max():6.1f} ms")
+    return lat.mean()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sector vs full-scan steering latency')
+    parser.add_argument('--hz', type=float, default=5.5, help='lidar rotations per second')
+    parser.add_argument('--sample-rate', type=float, default=2000, help='measurements per second')
+    parser.add_argument('--rate', type=float, default=20, help='sector mode max commands per second')
+    parser.add_argument('--rotations', type=int, default=500)
+    args = parser.parse_args()
+
+    scans = synthetic_scans(args.rotations)
+    start = time.perf_counter()
+    for scan in scans:
+        pid_control(scan)
+    compute = (time.perf_counter() - start) / len(scans)
+    duration = args.rotations / args.hz
+    print(f"{args.hz} Hz rotation, {args.sample_rate:.0f} samples/s, pid_control {compute * 1e6:.0f} us")
+
+    full = report('full', *run_full(scans, args.hz, args.sample_rate, compute), duration)
+    sector = report('sector', *run_sector(scans, args.hz, args.sample_rate, args.rate, compute), duration)
+    print(f"mean scan-to-command latency reduced by {full - sector:.1f} ms ({100 * (1 - sector / full):.0f}%)")
@@ -0,0 +1,235 @@
+"""
+\file       instrumentation.py
+\brief      Low-overhead stage timing and rate-limited logging for the Pi control loop
+            StageTimers keeps one fixed-size, log-linear (HDR-style) latency histogram
+            per stage, fed from time.monotonic_ns(), and every `period` seconds writes
+            p50 / p99 / max and deadline misses per stage as one JSON line to a file or
+            a local UDP socket, then starts a new interval. With enabled=False every call
+            returns after a single attribute check.
+
+            RateLimitFilter lets each log call site through at most once per period and
+            counts what it held back, so status lines can't flood the console at 20 Hz.
+
+            Reading reports:  tail -f latency.jsonl   or   nc -ul 9999  (sink 'udp://127.0.0.1:9999')
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import json
+import logging
+import socket
+import sys
+import time
+
+""" [Constants] """
+SUB_BUCKET_BITS = 5  # 16 linear sub-buckets per power of two: values are kept to within ~6%
+SUB_BUCKETS = 1 << (SUB_BUCKET_BITS - 1)
+MAX_EXPONENT = 40  # Values up to 2^45 ns (~10 h) are bucketed, larger ones go in the last bucket
+BUCKETS = (MAX_EXPONENT + 2) * SUB_BUCKETS
+REPORT_PERIOD = 5.0  # Seconds between reports
+LOG_PERIOD = 1.0  # Seconds between log lines from the same call site
+
+
+def bucket_index(value):
+    """
+    :param value <int>: Non-negative latency in ns
+    :return: histogram bucket
+    """
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    index = SUB_BUCKETS * shift + (value >> shift)
+    return index if index < BUCKETS else BUCKETS - 1
+
+
+def bucket_value(index):
+    """:return: the largest value that lands in bucket `index` (what percentiles report)"""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    return ((SUB_BUCKETS + index % SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Fixed-memory latency histogram (BUCKETS counters), values in ns."""
+    def __init__(self, deadline_ns=None):
+        self.deadline_ns = deadline_ns
+        self.counts = [0] * BUCKETS
+        self.reset()
+
+    def reset(self):
+        for i in range(BUCKETS):
+            self.counts[i] = 0
+        self.count = 0
+        self.max = 0
+        self.misses = 0
+
+    def record(self, value):
+        if value < 0:
+            value = 0
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+        if self.deadline_ns is not None and value > self.deadline_ns:
+            self.misses += 1
+
+    def percentile(self, p):
+        """
+        :param p <float>: 0 - 100
+        :return: latency in ns (bucket upper bound, capped at the max seen), 0 if empty
+        """
+        if not self.count:
+            return 0
+        target = max(1, -(-self.count * p // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(bucket_value(index), self.max)
+        return self.max
+
+    def summary(self):
+        """:return: dict of count, p50 / p99 / max in us, deadline and misses"""
+        return {
+            'count': self.count,
+            'p50_us': round(self.percentile(50) / 1000, 1),
+            'p99_us': round(self.percentile(99) / 1000, 1),
+            'max_us': round(self.max / 1000, 1),
+            'deadline_us': None if self.deadline_ns is None else self.deadline_ns / 1000,
+            'misses': self.misses,
+        }
+
+
+class StageTimers:
+    """
+    Per-stage latency histograms with periodic reports.
+
+        t = timers.now()
+        ... stage ...
+        t = timers.lap('pid', t)   # records now - t, returns now
+        timers.maybe_report()      # once per loop pass
+    """
+    def __init__(self, stages, deadlines_us=None, enabled=True, sink=None, period=REPORT_PERIOD):
+        """
+        :param stages <list of str>: Stage names, in report order
+        :param deadlines_us <dict>: stage -> deadline in us; longer samples count as misses
+        :param enabled <bool>: False turns every call into a no-op
+        :param sink <str>: File path to append JSON lines to, 'udp://host:port', or None for stderr
+        :param period <float>: Seconds between reports
+        """
+        deadlines_us = deadlines_us or {}
+        self.enabled = enabled
+        self.period_ns = int(period * 1e9)
+        self.histograms = {stage: LatencyHistogram(None if deadlines_us.get(stage) is None
+                                                   else int(deadlines_us[stage] * 1000))
+                           for stage in stages}
+        self._next_report = time.monotonic_ns() + self.period_ns
+        self._interval_start = time.time()
+        self._sink = sink
+        self._file = None
+        self._socket = None
+        if enabled and sink:
+            if sink.startswith('udp://'):
+                host, _, port = sink[len('udp://'):].rpartition(':')
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._address = (host, int(port))
+            else:
+                self._file = open(sink, 'a', buffering=1)
+
+    def now(self):
+        """:return: time.monotonic_ns(), or 0 when disabled"""
+        if not self.enabled:
+            return 0
+        return time.monotonic_ns()
+
+    def lap(self, stage, start):
+        """
+        Records the time since `start` for `stage`.
+
+        :return: the current time, to start the next stage from
+        """
+        if not self.enabled:
+            return 0
+        now = time.monotonic_ns()
+        self.histograms[stage].record(now - start)
+        return now
+
+    def maybe_report(self):
+        """Writes a report and starts a new interval once `period` has passed."""
+        if not self.enabled or time.monotonic_ns() < self._next_report:
+            return
+        self._next_report += self.period_ns
+        self.report()
+
+    def report(self):
+        now = time.time()
+        line = json.dumps({
+            'time': round(now, 3),
+            'interval_s': round(now - self._interval_start, 3),
+            'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+        })
+        self._interval_start = now
+        for histogram in self.histograms.values():
+            histogram.reset()
+        if self._socket is not None:
+            try:
+                self._socket.sendto(line.encode(), self._address)
+            except OSError:
+                pass  # Nobody listening is fine
+        elif self._file is not None:
+            self._file.write(line + '\n')
+        else:
+            print(line, file=sys.stderr)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._socket is not None:
+            self._socket.close()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Passes each call site (logger, level, message template) at most once per `period` seconds.
+    The next line that gets through says how many were held back.
+    """
+    def __init__(self, period=LOG_PERIOD):
+        super().__init__()
+        self.period = period
+        self._last = {}
+        self._suppressed = {}
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < self.period:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+        self._last[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar suppressed)"
+        return True
+
+
+def rate_limited_logger(name, period=LOG_PERIOD, level=logging.INFO):
+    """
+    :return: logging.Logger writing to stderr through a RateLimitFilter
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.addFilter(RateLimitFilter(period))
+        logger.setLevel(level)
+        logger.propagate = False
+    return logger
@@ -0,0 +1,341 @@
+"""
+\file       pico_link.py
+\brief      Binary framed Pi <-> Pico UART protocol (Pi side)
+            Replaces the "R 0.123 F\n" text commands, the GPIO "data ready" lines
+            and the str(distance) replies. pico/EEC195_Team5.py has the matching
+            MicroPython encoder / decoder.
+
+            Frame:  sync  u8   0xA5
+                    type  u8   MSG_*
+                    seq   u8   per-sender sequence number (wraps)
+                    len   u8   payload length
+                    payload
+                    crc   u8   CRC-8 (poly 0x07, init 0) over type, seq, len, payload
+
+            Payloads (little-endian, fixed point with FIXED_ONE = 1.0):
+              MSG_COMMAND   Pi -> Pico  i16 steer (-1 left .. +1 right), i16 speed (0 .. 1), u8 motor dir index in MOTOR_DIRS
+              MSG_ODOMETRY  Pico -> Pi  ODOM_BATCH samples of u32 Pico ticks_us, i32 total distance since
+                                        boot (1/1000 inch, interpolated between sensor edges), i32 speed (1/100 inch/s)
+              MSG_PING      Pi -> Pico  u32 Pi timestamp (us), echoed back as MSG_PONG with the same seq
+              MSG_DEBUG     Pico -> Pi  u16 GC count, i32 max loop jitter (us), u32 heap allocated (bytes),
+                                        u16 CRC errors, u16 RX overflows (only when the firmware has DEBUG = True)
+
+            Odometry samples are stamped with Pico time; PicoClock maps them onto the Pi's
+            time.monotonic(), so take_distance(at) gives the distance travelled up to the
+            moment a scan was captured instead of whatever the last report said.
+
+            Run:  python pico_link.py --ping 1000 [--port /dev/ttyS0]   (round-trip latency)
+                  python pico_link.py --debug 30                        (print MSG_DEBUG reports)
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+from collections import deque
+import struct
+import time
+
+""" [Constants] """
+SYNC = 0xA5
+MSG_COMMAND = 0x01
+MSG_ODOMETRY = 0x02
+MSG_PING = 0x03
+MSG_PONG = 0x04
+MSG_DEBUG = 0x05
+FIXED_ONE = 10000  # Fixed point scale for steer / speed
+MILLI_INCH = 1000  # Odometry distance scale
+CENTI_INCH = 100  # Odometry speed scale
+ODOM_BATCH = 4  # Samples per MSG_ODOMETRY frame (same as the firmware)
+ODOM_HISTORY = 256  # Samples kept for distance_at() (~5 s at 50 Hz)
+MAX_EXTRAPOLATION = 0.1  # Seconds past the newest sample distance_at() extrapolates with its speed
+PICO_TICKS_PERIOD = 1 << 30  # MicroPython ticks_us wraps here on the RP2040
+CLOCK_WINDOW = 64  # Frames the Pico -> Pi clock offset is taken over
+MOTOR_DIRS = 'FRBN'  # Index sent on the wire; 'N' leaves the motor direction unchanged (as before)
+DEFAULT_SPEED = 0.21  # Speed the Pico used to hard-code
+MAX_PAYLOAD = 64
+HEADER = struct.Struct('<BBBB')
+PAYLOADS = {
+    MSG_COMMAND: struct.Struct('<hhB'),
+    MSG_ODOMETRY: struct.Struct('<' + 'Iii' * ODOM_BATCH),
+    MSG_PING: struct.Struct('<I'),
+    MSG_PONG: struct.Struct('<I'),
+    MSG_DEBUG: struct.Struct('<HiIHH'),
+}
+DEBUG_FIELDS = ('gc_count', 'max_jitter_us', 'heap_alloc', 'crc_errors', 'rx_overflows')
+
+
+def _crc8_table():
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[i] = crc
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_frame(kind, seq, *fields):
+    """
+    :param kind <int>: MSG_* type
+    :param seq <int>: Sequence number (only the low 8 bits are sent)
+    :return: bytes
+    """
+    payload = PAYLOADS[kind].pack(*fields)
+    body = HEADER.pack(SYNC, kind, seq & 0xFF, len(payload)) + payload
+    return body + bytes((crc8(body[1:]),))
+
+
+def encode_command(seq, direction, percent_ang, motor_dir, speed=DEFAULT_SPEED):
+    """
+    Binary form of write_pid_ctrl's "direction percent_ang motor_dir" message.
+
+    :param direction <char>: 'R', 'L' or 'N'
+    :param percent_ang <float>: 0 - 1 (values outside are clipped, the Pico ignored them before)
+    :param motor_dir <char>: One of MOTOR_DIRS
+    :param speed <float>: 0 - 1
+    :return: bytes
+    """
+    steer = int(round(min(1.0, max(0.0, percent_ang)) * FIXED_ONE))
+    if direction == 'L':
+        steer = -steer
+    elif direction != 'R':
+        steer = 0
+    speed = int(round(min(1.0, max(0.0, speed)) * FIXED_ONE))
+    return encode_frame(MSG_COMMAND, seq, steer, speed, MOTOR_DIRS.index(motor_dir))
+
+
+class FrameDecoder:
+    """
+    Incremental decoder: feed() raw UART bytes, get back complete, CRC-checked frames.
+    Garbage and corrupted frames are skipped by resyncing on the next sync byte.
+    """
+    def __init__(self):
+        self._buf = bytearray()
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+
+    def feed(self, data):
+        """
+        :param data <bytes>: Bytes read from the UART
+        :return: list of (kind, seq, fields tuple)
+        """
+        self._buf += data
+        frames = []
+        buf = self._buf
+        start = 0
+        while True:
+            sync = buf.find(SYNC, start)
+            if sync < 0:
+                self.skipped_bytes += len(buf) - start
+                start = len(buf)
+                break
+            self.skipped_bytes += sync - start
+            start = sync
+            if len(buf) - start < HEADER.size + 1:
+                break
+            _, kind, seq, length = HEADER.unpack_from(buf, start)
+            end = start + HEADER.size + length + 1
+            if length > MAX_PAYLOAD:
+                start += 1
+                continue
+            if len(buf) < end:
+                break
+            if crc8(buf[start + 1:end - 1]) != buf[end - 1]:
+                self.crc_errors += 1
+                start += 1
+                continue
+            layout = PAYLOADS.get(kind)
+            if layout is not None and layout.size == length:
+                frames.append((kind, seq, layout.unpack_from(buf, start + HEADER.size)))
+            start = end
+        del buf[:start]
+        return frames
+
+
+class PicoClock:
+    """
+    Maps Pico ticks_us onto the Pi's time.monotonic().
+    The ticks are unwrapped, and the offset is the smallest (Pi receive time - Pico send time)
+    over the last CLOCK_WINDOW frames, i.e. the frame that saw the least UART / scheduling delay.
+    """
+    def __init__(self):
+        self._offsets = deque(maxlen=CLOCK_WINDOW)
+        self.reset()
+
+    def reset(self):
+        """Forgets the ticks and offsets seen so far (the Pico rebooted and its ticks_us started over)."""
+        self._last_ticks = None
+        self._wraps = 0
+        self._offsets.clear()
+        self.offset = None
+
+    def unwrap(self, ticks):
+        """:return: Pico time in seconds since boot, continuous across ticks_us wraparound"""
+        if self._last_ticks is not None and ticks < self._last_ticks - PICO_TICKS_PERIOD // 2:
+            self._wraps += 1
+        self._last_ticks = ticks
+        return (self._wraps * PICO_TICKS_PERIOD + ticks) / 1e6
+
+    def observe(self, pico_time, received):
+        """
+        :param pico_time <float>: Unwrapped Pico time of the newest sample in a frame
+        :param received <float>: time.monotonic() when the frame was read
+        """
+        self._offsets.append(received - pico_time)
+        self.offset = min(self._offsets)
+
+    def to_pi(self, pico_time):
+        return pico_time + self.offset
+
+
+class PicoLink:
+    """
+    Command / odometry link over an open serial port (pyserial).
+    Call poll() regularly (e.g. once per scan); it never blocks.
+    """
+    def __init__(self, ser):
+        self.ser = ser
+        self.decoder = FrameDecoder()
+        self.seq = 0
+        self.clock = PicoClock()
+        self.samples = deque(maxlen=ODOM_HISTORY)  # (Pi monotonic time, total inches, inches/s)
+        self._taken = None  # Total distance at the last take_distance()
+        self.pongs = {}
+        self.debug = None  # Latest MSG_DEBUG report as a dict
+
+    def send_command(self, direction, percent_ang, motor_dir, speed=DEFAULT_SPEED):
+        self.ser.write(encode_command(self.seq, direction, percent_ang, motor_dir, speed))
+        self.seq = (self.seq + 1) & 0xFF
+
+    def poll(self):
+        """
+        Reads whatever the Pico has sent so far.
+
+        :return: list of decoded frames (odometry samples are also recorded)
+        """
+        waiting = self.ser.in_waiting
+        if not waiting:
+            return []
+        frames = self.decoder.feed(self.ser.read(waiting))
+        received = time.monotonic()
+        for kind, seq, fields in frames:
+            if kind == MSG_ODOMETRY:
+                self._add_samples(fields, received)
+            elif kind == MSG_PONG:
+                self.pongs[seq] = time.perf_counter()
+            elif kind == MSG_DEBUG:
+                self.debug = dict(zip(DEBUG_FIELDS, fields))
+        return frames
+
+    def _add_samples(self, fields, received):
+        if self.samples and fields[1] / MILLI_INCH < self.samples[-1][1]:
+            # Distance went backwards: the Pico restarted, start over from its new count and clock
+            self.samples.clear()
+            self._taken = None
+            self.clock.reset()
+        batch = [(self.clock.unwrap(fields[i]), fields[i + 1] / MILLI_INCH, fields[i + 2] / CENTI_INCH)
+                 for i in range(0, len(fields), 3)]
+        self.clock.observe(batch[-1][0], received)
+        for pico_time, distance, speed in batch:
+            self.samples.append((self.clock.to_pi(pico_time), distance, speed))
+
+    def distance_at(self, t):
+        """
+        Total distance (since the Pico booted) at Pi time t, interpolated between samples.
+
+        :param t <float>: time.monotonic() seconds
+        :return: inches, or None before the first sample
+        """
+        samples = self.samples
+        if not samples:
+            return None
+        last_t, last_d, last_v = samples[-1]
+        if t >= last_t:
+            return last_d + last_v * min(t - last_t, MAX_EXTRAPOLATION)
+        if t <= samples[0][0]:
+            return samples[0][1]
+        for i in range(len(samples) - 2, -1, -1):
+            t0, d0, _ = samples[i]
+            if t0 <= t:
+                t1, d1, _ = samples[i + 1]
+                return d0 + (d1 - d0) * (t - t0) / (t1 - t0)
+        return samples[0][1]
+
+    def take_distance(self, at=None):
+        """
+        :param at <float>: time.monotonic() the distance is wanted for (e.g. when a scan was captured), default now
+        :return: inches travelled between the previous call's time and `at`
+        """
+        total = self.distance_at(time.monotonic() if at is None else at)
+        if total is None:
+            return 0.0
+        if self._taken is None:
+            self._taken = total
+        distance = max(0.0, total - self._taken)
+        self._taken = max(self._taken, total)
+        return distance
+
+    def ping(self, timeout=0.1):
+        """
+        :return: round-trip time in seconds, or None on timeout
+        """
+        seq = self.seq
+        self.seq = (self.seq + 1) & 0xFF
+        self.pongs.pop(seq, None)
+        start = time.perf_counter()
+        self.ser.write(encode_frame(MSG_PING, seq, (time.monotonic_ns() // 1000) & 0xFFFFFFFF))
+        self.ser.flush()
+        while time.perf_counter() - start < timeout:
+            self.poll()
+            if seq in self.pongs:
+                return self.pongs.pop(seq) - start
+        return None
+
+
+if __name__ == '__main__':
+    import serial
+    parser = argparse.ArgumentParser(description='Pi <-> Pico link round-trip latency')
+    parser.add_argument('--port', default='/dev/ttyS0')
+    parser.add_argument('--ping', type=int, default=1000, help='number of pings')
+    parser.add_argument('--debug', type=float, default=0, help='print firmware debug reports for this many seconds instead')
+    args = parser.parse_args()
+
+    link = PicoLink(serial.Serial(port=args.port, baudrate=115200, timeout=0))
+    if args.debug:
+        end = time.monotonic() + args.debug
+        while time.monotonic() < end:
+            for kind, seq, fields in link.poll():
+                if kind == MSG_DEBUG:
+                    print('  '.join(f"{name} {value}" for name, value in zip(DEBUG_FIELDS, fields)))
+            time.sleep(0.05)
+        raise SystemExit
+    rtts = []
+    lost = 0
+    for _ in range(args.ping):
+        rtt = link.ping()
+        if rtt is None:
+            lost += 1
+        else:
+            rtts.append(rtt * 1e6)
+    rtts.sort()
+    if rtts:
+        print(f"{len(rtts)} pongs, {lost} lost, {link.decoder.crc_errors} CRC errors  "
+              f"rtt p50 {rtts[len(rtts) // 2]:.0f} us  p99 {rtts[int(len(rtts) * 0.99)]:.0f} us  max {rtts[-1]:.0f} us")
+    else:
+        print(f"No replies ({lost} pings lost)")
@@ -0,0 +1,120 @@
+"""
+\file       pid_control.py
+\brief      NumPy steering controller used by lidar_test.py
+            Works on the 360 element scan array directly: sector views instead of
+            (angle, distance) lists, zero-gap detection with np.diff and a cumulative
+            sum sliding window. Outputs match the original PID_control.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import numpy as np
+
+""" [Constants] """
+Kfw = 0.008
+Ki = 0.000015
+FW_END = 181  # Forward sector is 0 - 180 degrees inclusive
+WINDOW = 5  # Sliding window width (degrees) when there is no open gap
+MIN_GAP = 5  # Shortest zero gap (degrees) steered at directly
+TARGET_MIN_DIST = 1250  # Below this mean window distance there is nowhere to go, brake
+FW_DEADBAND = 2
+P_LIMIT = 0.6
+I_LIMIT = 0.3
+OBSTACLE_TOL = 500  # Close wall distance (mm) next to the gap
+BUDGET_US = 1000  # Per-scan time budget for the controller (scans arrive every ~100 ms)
+
+
+def find_longest_zero_gap(distances):
+    """
+    Finds the longest run of zero distances (no return = open space).
+
+    :param distances <np.ndarray>: 1D distances, index is the angle
+    :return: (length, start index, end index inclusive), (0, -1, -1) if there are no zeros
+      * ties go to the first run, like the old find_longest_string_of_zeros
+    """
+    edges = np.diff(np.concatenate(([0], (distances == 0).view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    if starts.shape[0] == 0:
+        return 0, -1, -1
+    lengths = np.flatnonzero(edges == -1) - starts
+    k = int(np.argmax(lengths))
+    return int(lengths[k]), int(starts[k]), int(starts[k] + lengths[k] - 1)
+
+
+def _closest_wall(distances):
+    # Shortest 0 < d <= OBSTACLE_TOL, OBSTACLE_TOL + 1 if there is none
+    near = distances[(distances > 0) & (distances <= OBSTACLE_TOL)]
+    return float(near.min()) if near.shape[0] else OBSTACLE_TOL + 1
+
+
+def pid_control(scan_data, fw_integral=0.0, pico_rdy=0):
+    """
+    Steering / brake command for one scan.
+
+    :param scan_data <array-like>: 360 distances, index is the angle in degrees
+    :param fw_integral <float>: Integral term carried between scans
+    :param pico_rdy <int>: 1 once the Pico is ready, enables the integral term
+    :return: (direction: char, percent_ang: float, brake: char, fw_integral: float)
+      * percent_ang is a fraction of the maximum servo angle (0 - 1)
+      * with no gap and no window over TARGET_MIN_DIST the old code crashed (target_angle unset),
+        here the target is straight ahead (90) with the brake set
+    """
+    fw = np.asarray(scan_data, dtype=np.float64)[:FW_END]
+
+    """ Target Angle """
+    zero_length, zero_start, zero_end = find_longest_zero_gap(fw)
+    brake = 'F'
+    target_distance = 0
+    target_angle = 90
+    if zero_length < MIN_GAP:
+        # Window sums for start angles 0..175 (the old loop stopped one window short of 180).
+        # Lidar distances are multiples of 0.25 mm, so the cumulative sums are exact.
+        csum = np.concatenate(([0.0], np.cumsum(fw)))
+        sums = csum[WINDOW:FW_END] - csum[:FW_END - WINDOW]
+        k = int(np.argmax(sums))
+        if sums[k] > 0:
+            target_distance = sums[k] / WINDOW
+        if target_distance > TARGET_MIN_DIST:
+            target_angle = k + WINDOW // 2
+        else:
+            brake = 'N'
+    else:
+        target_angle = int((zero_start + zero_end) / 2)
+
+    """ Proportion """
+    # Compares against 90 +- deadband (not +- deadband) like the original, so only 178 - 180 is inside it
+    percent_ang = 0
+    fw_error = target_angle - 90
+    if fw_error > 90 + FW_DEADBAND or fw_error < 90 - FW_DEADBAND:
+        percent_ang = min(P_LIMIT, abs(fw_error) * Kfw)
+        if target_angle < 90:
+            percent_ang = -percent_ang
+
+    """ Integral """
+    if pico_rdy == 1:
+        fw_integral += fw_error * Ki
+        fw_integral = max(-I_LIMIT, fw_integral) if target_angle < 90 else min(I_LIMIT, fw_integral)
+    percent_ang += fw_integral
+
+    """ Obstacle Avoidance """
+    # Same (possibly negative) slice bounds as the original list slices
+    dist_short_l = _closest_wall(fw[zero_start - 5:zero_start])
+    dist_short_r = _closest_wall(fw[zero_end:zero_end + 5])
+    if dist_short_r < dist_short_l:
+        percent_ang += 0.2 + (-0.05 / 350) * (dist_short_r - 150)
+    elif dist_short_r > dist_short_l:
+        percent_ang -= 0.2 + (-0.05 / 350) * (dist_short_l - 150)
+
+    if percent_ang > 0:
+        direction = 'R'
+    elif percent_ang < 0:
+        direction = 'L'
+    else:
+        direction = 'N'
+    return direction, abs(percent_ang), brake, fw_integral
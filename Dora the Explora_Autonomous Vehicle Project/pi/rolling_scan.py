@@ -0,0 +1,81 @@
+"""
+\file       rolling_scan.py
+\brief      Rolling 360 degree scan fed one measurement at a time (lidar.iter_measurements)
+            Each bin holds the latest return from the last full rotation, so the
+            controller can run as soon as the forward sector has been swept instead of
+            waiting for iter_scans to finish the whole revolution.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import time
+import numpy as np
+
+""" [Constants] """
+SCAN_BINS = 360
+FORWARD_SECTOR = (0, 181)  # Degrees [start, end) used by pid_control
+COMMAND_RATE = 20  # Max steering commands per second while the sector is being swept
+
+
+class RollingScan:
+    """
+    Rolling scan with per-bin sweep stamps.
+    A bin not written in the last rotation (missed sample or no return) reads as 0,
+    the same as a bin iter_scans left empty.
+    """
+    def __init__(self, bins=SCAN_BINS, sector=FORWARD_SECTOR, rate=COMMAND_RATE, clock=time.monotonic):
+        self.bins = bins
+        self.sector = (sector[0] * bins // 360, sector[1] * bins // 360)  # in bins
+        self.min_interval = 1.0 / rate if rate > 0 else float('inf')
+        self.clock = clock
+        self.distances = np.zeros(bins)
+        self._stamp = np.full(bins, -bins, dtype=np.int64)  # Sweep position each bin was last written at
+        self._position = 0  # revolutions * bins + bin of the latest measurement
+        self._revolution = 0
+        self._in_sector = False
+        self._pending = 0  # Sector measurements since the last command
+        self._last_command = -float('inf')
+        self.revolutions = 0
+        self.commands = 0
+
+    def update(self, new_scan, quality, angle, distance):
+        """
+        Adds one measurement (the tuple iter_measurements yields).
+
+        :return: True if the controller should run now:
+          * the sweep just left the forward sector (every sector bin is from this rotation), or
+          * new sector samples arrived and 1 / rate seconds passed since the last command
+        """
+        if new_scan:
+            self._revolution += 1
+            self.revolutions += 1
+        b = min(self.bins - 1, int(angle * self.bins / 360))
+        self._position = self._revolution * self.bins + b
+        self.distances[b] = distance if quality > 0 else 0
+        self._stamp[b] = self._position
+
+        in_sector = self.sector[0] <= b < self.sector[1]
+        run = False
+        if in_sector:
+            self._pending += 1
+            run = self.clock() - self._last_command >= self.min_interval
+        elif self._in_sector and self._pending:
+            run = True  # Sector complete
+        self._in_sector = in_sector
+        if run:
+            self._pending = 0
+            self._last_command = self.clock()
+            self.commands += 1
+        return run
+
+    def view(self):
+        """
+        :return: (bins,) distances of the last full rotation, stale bins zeroed (a new array)
+        """
+        return np.where(self._position - self._stamp < self.bins, self.distances, 0.0)
@@ -0,0 +1,311 @@
+"""
+\file       runtime.py
+\brief      Multi-process Pi runtime: LiDAR acquisition, control and telemetry on separate cores
+            Replaces the single loop in lidar_test.py, where a slow serial write or
+            print stalled LiDAR reading until the RPLidar buffer overran.
+
+              acquisition  reads the lidar and publishes the newest scan to a ScanMailbox
+              control      runs pid_control on the newest scan and writes the Pico command
+              telemetry    posts scans to the mapping server at TELEMETRY_RATE and prints
+                           the runtime counters
+
+            The supervisor (this process) creates the mailbox, starts the workers and
+            restarts any that exit, with exponential backoff. LiDAR errors are retried
+            inside acquisition first; after MAX_LIDAR_ERRORS in a row it exits and is
+            restarted with a fresh RPLidar connection.
+
+            Run:  python runtime.py [--mode full|sector] [--server URL]
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import scan_frame
+from pid_control import pid_control
+from rolling_scan import RollingScan, COMMAND_RATE
+from scan_accumulator import ScanAccumulator
+from scan_mailbox import ScanMailbox, DEFAULT_NAME
+from pico_link import PicoLink
+
+""" [Constants] """
+# Same wiring as lidar_test.py
+PICO_DISABLE_PIN = 25
+PICO_RDY_PIN = 16
+SERIAL_PORT = '/dev/ttyS0'
+LIDAR_PORT_NAME = '/dev/ttyUSB0'
+SERVER_URL = 'http://10.42.0.61:8069'
+VEHICLE_ID = 1  # Unique per car on the floor; the mapping server keeps one map per vehicle and session
+
+SCAN_MODE = 'full'  # 'full': publish once per revolution, 'sector' (opt-in): whenever the forward sector is swept
+SCAN_RESOLUTION = 360  # Accumulator bins in 'full' mode (360, 720 or 1440); published scans are always per degree
+TELEMETRY_RATE = 5  # Scans/s posted to the server
+TELEMETRY_BATCH = 1  # Scans per POST; >1 trades up to telemetry_uploader.MAX_DELAY of latency for fewer requests
+STATUS_PERIOD = 5.0  # Seconds between counter printouts
+CONTROL_POLL = 0.001  # Seconds between mailbox polls when there is no new scan
+MAX_LIDAR_ERRORS = 5  # RPLidarExceptions in a row before acquisition gives up and is restarted
+RESTART_BACKOFF = (0.5, 8.0)  # Seconds, doubled per restart up to the max
+STABLE_RUN = 30.0  # A worker that ran this long gets its backoff reset
+CORES = {'acquisition': 1, 'control': 2, 'telemetry': 3}  # Supervisor stays on core 0
+
+
+def _worker_setup(name):
+    # Ctrl-C goes to the whole process group; only the supervisor handles it and sets stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(os, 'sched_setaffinity') and CORES[name] < os.cpu_count():
+        os.sched_setaffinity(0, {CORES[name]})
+
+
+def acquisition(mailbox_name, stop, mode=SCAN_MODE, rate=COMMAND_RATE, bins=SCAN_RESOLUTION):
+    """
+    Reads the lidar and publishes scans until stop is set.
+    Exits with RPLidarException after MAX_LIDAR_ERRORS consecutive errors.
+    """
+    from adafruit_rplidar import RPLidar, RPLidarException
+    _worker_setup('acquisition')
+    mailbox = ScanMailbox.attach(mailbox_name)
+    lidar = RPLidar(None, LIDAR_PORT_NAME, timeout=3)
+    errors = 0
+    try:
+        while not stop.is_set():
+            try:
+                if mode == 'sector':
+                    rolling = RollingScan(rate=rate)
+                    for new_scan, quality, angle, distance in lidar.iter_measurements():
+                        if rolling.update(new_scan, quality, angle, distance):
+                            mailbox.publish(rolling.view())
+                            errors = 0
+                        if stop.is_set():
+                            break
+                else:
+                    accumulator = ScanAccumulator(bins=bins)
+                    for scan in lidar.iter_scans():
+                        mailbox.publish(accumulator.bin_scan(scan))
+                        errors = 0
+                        if stop.is_set():
+                            break
+            except RPLidarException:
+                # Usually a buffer overrun or a bad descriptor after one; drop the backlog and restart the scan
+                mailbox.increment('overruns')
+                errors += 1
+                if errors >= MAX_LIDAR_ERRORS:
+                    raise
+                lidar.stop()
+                lidar.clear_input()
+    finally:
+        lidar.stop()
+        lidar.stop_motor()
+        lidar.disconnect()
+        mailbox.close()
+
+
+def control(mailbox_name, stop):
+    """
+    Steers from the newest scan in the mailbox until stop is set.
+    Scans published while the previous command was being computed or written are skipped, not queued.
+    """
+    import serial
+    import RPi.GPIO as GPIO
+    _worker_setup('control')
+    mailbox = ScanMailbox.attach(mailbox_name)
+    ser = serial.Serial(
+        port=SERIAL_PORT,
+        baudrate=115200,
+        parity=serial.PARITY_NONE,
+        bytesize=serial.EIGHTBITS,
+        stopbits=serial.STOPBITS_ONE,
+        timeout=0
+    )
+    link = PicoLink(ser)
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setup(PICO_DISABLE_PIN, GPIO.OUT)
+    GPIO.setup(PICO_RDY_PIN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+    GPIO.output(PICO_DISABLE_PIN, False)
+
+    pico = {'rdy': 0}
+
+    def pico_rdy_irq_handler(channel):
+        if channel == PICO_RDY_PIN:
+            pico['rdy'] = 1
+
+    GPIO.add_event_detect(PICO_RDY_PIN, GPIO.RISING, callback=pico_rdy_irq_handler, bouncetime=200)
+
+    fw_integral = 0.0
+    last_seq = 0
+    try:
+        while not stop.is_set():
+            link.poll()
+            scan = mailbox.read(last_seq)
+            if scan is None:
+                time.sleep(CONTROL_POLL)
+                continue
+            seq, distances, timestamp_us = scan
+            # Odometer up to the moment the scan was captured (timestamp_us is wall clock, odometry is monotonic)
+            captured = time.monotonic() - (time.time_ns() // 1000 - timestamp_us) / 1e6
+            mailbox.odometer += link.take_distance(at=captured)
+            if last_seq and seq > last_seq + 1:
+                mailbox.increment('control_skipped', seq - last_seq - 1)
+            last_seq = seq
+            direction, percent_ang, brake, fw_integral = pid_control(distances, fw_integral, pico['rdy'])
+            link.send_command(direction, percent_ang, brake)
+            mailbox.increment('control_runs')
+    finally:
+        if stop.is_set():
+            # Runtime shutting down: a Disable edge ends the firmware's main loop for good (there is no re-enable)
+            GPIO.output(PICO_DISABLE_PIN, True)
+        else:
+            # Worker died and the supervisor will restart it: brake and centre the steering, but leave the
+            # firmware running so the new control process can drive it again
+            try:
+                link.send_command('N', 0.0, 'B', speed=0.0)
+            except OSError:
+                pass
+        GPIO.cleanup()
+        ser.close()
+        mailbox.close()
+
+
+def telemetry(mailbox_name, stop, server_url=SERVER_URL, rate=TELEMETRY_RATE, batch=TELEMETRY_BATCH,
+              vehicle=VEHICLE_ID, session=0):
+    """
+    Queues the newest scan (binary scan_frame) for upload at most `rate` times a second and prints the counters.
+    Scans are tagged with `vehicle` and `session` (picked once by the supervisor, so a restarted
+    telemetry worker keeps adding to the same map).
+    """
+    from telemetry_uploader import TelemetryUploader
+    _worker_setup('telemetry')
+    mailbox = ScanMailbox.attach(mailbox_name)
+    uploader = TelemetryUploader(server_url, batch_size=batch) if server_url else None
+    reported = {'sent': 0, 'dropped': 0, 'failed': 0}
+    last_seq = 0
+    last_odometer = mailbox.odometer
+    next_status = time.monotonic() + STATUS_PERIOD
+    try:
+        while not stop.wait(1.0 / rate):
+            scan = mailbox.read(last_seq)
+            if scan is not None:
+                seq, distances, timestamp_us = scan
+                if last_seq and seq > last_seq + 1:
+                    mailbox.increment('telemetry_skipped', seq - last_seq - 1)
+                last_seq = seq
+                odometer = mailbox.odometer
+                body = scan_frame.encode_scan(distances, odometer - last_odometer, seq=seq, timestamp_us=timestamp_us,
+                                              vehicle=vehicle, session=session)
+                last_odometer = odometer
+                if uploader is not None:
+                    uploader.submit(body)
+            if uploader is not None:
+                # Mirror the uploader's counters into the shared ones
+                counters = uploader.counters()
+                for name, counter in (('sent', 'telemetry_sent'), ('dropped', 'telemetry_skipped'),
+                                      ('failed', 'telemetry_errors')):
+                    if counters[name] > reported[name]:
+                        mailbox.increment(counter, counters[name] - reported[name])
+                        reported[name] = counters[name]
+            if time.monotonic() >= next_status:
+                next_status += STATUS_PERIOD
+                print(format_counters(mailbox.counters()), flush=True)
+    finally:
+        if uploader is not None:
+            uploader.close()
+        mailbox.close()
+
+
+def format_counters(counters):
+    return ("[runtime] scans {scans}  overruns {overruns}  control {control_runs} (skipped {control_skipped})  "
+            "telemetry {telemetry_sent} (skipped {telemetry_skipped}, errors {telemetry_errors})  "
+            "restarts acq {restarts_acquisition} ctl {restarts_control} tel {restarts_telemetry}").format(**counters)
+
+
+def supervise(workers, mailbox_name=DEFAULT_NAME):
+    """
+    Runs the workers until Ctrl-C, restarting any that exit.
+
+    :param workers <dict>: name -> (target, extra args); targets are called as target(mailbox_name, stop, *extra)
+    :return: final counters
+    """
+    mailbox = ScanMailbox.create(mailbox_name)
+    stop = multiprocessing.Event()
+    procs = {}
+    started = {}
+    backoff = {name: RESTART_BACKOFF[0] for name in workers}
+    restart_at = {name: 0.0 for name in workers}
+
+    def start(name):
+        target, extra = workers[name]
+        proc = multiprocessing.Process(target=target, args=(mailbox_name, stop) + tuple(extra), name=name)
+        proc.start()
+        procs[name] = proc
+        started[name] = time.monotonic()
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {0})
+    try:
+        for name in workers:
+            start(name)
+        while True:
+            now = time.monotonic()
+            for name, proc in procs.items():
+                if proc.is_alive():
+                    continue
+                if not restart_at[name]:
+                    # Just exited: schedule the restart
+                    if now - started[name] >= STABLE_RUN:
+                        backoff[name] = RESTART_BACKOFF[0]
+                    print(f"[runtime] {name} exited with code {proc.exitcode}, restarting in {backoff[name]:.1f}s")
+                    restart_at[name] = now + backoff[name]
+                    backoff[name] = min(RESTART_BACKOFF[1], backoff[name] * 2)
+                elif now >= restart_at[name]:
+                    mailbox.increment('restarts_' + name)
+                    restart_at[name] = 0.0
+                    start(name)
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        print("Stopping")
+    finally:
+        stop.set()
+        for proc in procs.values():
+            proc.join(timeout=3)
+            if proc.is_alive():
+                proc.terminate()
+        counters = mailbox.counters()
+        mailbox.close()
+    print(format_counters(counters))
+    return counters
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Multi-process Pi runtime')
+    parser.add_argument('--mode', choices=['full', 'sector'], default=SCAN_MODE, help='when acquisition publishes scans')
+    parser.add_argument('--rate', type=float, default=COMMAND_RATE, help='max mid-sweep publishes/s in sector mode')
+    parser.add_argument('--bins', type=int, choices=[360, 720, 1440], default=SCAN_RESOLUTION,
+                        help="binning resolution in 'full' mode")
+    parser.add_argument('--server', default=SERVER_URL, help="mapping server URL, '' to only print counters")
+    parser.add_argument('--telemetry-rate', type=float, default=TELEMETRY_RATE, help='max scans/s queued for upload')
+    parser.add_argument('--telemetry-batch', type=int, default=TELEMETRY_BATCH, help='scans per POST')
+    parser.add_argument('--vehicle', type=int, default=VEHICLE_ID, help='vehicle ID sent with every scan')
+    args = parser.parse_args()
+    # Checked here: a bad value would only show up as a telemetry worker crashing and being restarted
+    if args.telemetry_rate <= 0:
+        parser.error('--telemetry-rate must be > 0')
+    if not 0 <= args.vehicle <= 0xFFFF:
+        parser.error('--vehicle must fit the scan frame (0-65535)')
+    session = int.from_bytes(os.urandom(4), 'little')  # New map on the server for every run
+
+    print("=== [Beginning Pi Runtime] ===")
+    supervise({
+        'acquisition': (acquisition, (args.mode, args.rate, args.bins)),
+        'control': (control, ()),
+        'telemetry': (telemetry, (args.server, args.telemetry_rate, args.telemetry_batch, args.vehicle, session)),
+    })
@@ -0,0 +1,167 @@
+"""
+\file       scan_accumulator.py
+\brief      Reusable, array-backed binning of RPLidar measurements into a scan
+            Replaces the per-measurement `scan_data[min([359, math.floor(angle)])] = distance`
+            loop and the `[0]*360` list rebuilt every revolution. A whole revolution
+            of (quality, angle, distance) tuples is binned in one vectorized step into
+            preallocated buffers, low-quality returns are dropped, and each bin keeps
+            the closest return (or the quality-weighted mean) instead of the last one.
+
+            Filtering, binning and finishing run in scratch buffers sized for the
+            largest revolution seen so far (they only grow when a bigger one arrives).
+            The one array allocated per revolution is the conversion of a list of
+            tuples (the driver allocates the tuples themselves anyway); pass an
+            (n, 3) array to skip it.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+from itertools import chain
+import numpy as np
+
+""" [Constants] """
+SCAN_BINS = 360
+RESOLUTIONS = (360, 720, 1440)
+MIN_QUALITY = 5  # adafruit_rplidar qualities are 0 - 63, weak / spurious returns come in low
+CAPACITY = 1024  # Initial scratch size in measurements (an A1 revolution is ~400)
+REDUCTIONS = ('min', 'weighted')
+
+
+class ScanAccumulator:
+    """
+    Bins measurements into `bins` angular bins.
+    `distances` holds the scan at the accumulator's resolution, `degrees` the same scan
+    at one bin per degree (what pid_control and scan_frame take). Both are float64
+    arrays owned by the accumulator and overwritten by the next reset(); 0 = no return.
+    """
+    def __init__(self, bins=SCAN_BINS, min_quality=MIN_QUALITY, reduction='min'):
+        if bins not in RESOLUTIONS:
+            raise ValueError(f"bins must be one of {RESOLUTIONS}")
+        if reduction not in REDUCTIONS:
+            raise ValueError(f"reduction must be one of {REDUCTIONS}")
+        self.bins = bins
+        self.min_quality = min_quality
+        self.reduction = reduction
+        self.distances = np.zeros(bins)
+        self.quality = np.zeros(bins)  # Best quality per bin ('min') or total quality weight ('weighted')
+        self.degrees = self.distances if bins == SCAN_BINS else np.zeros(SCAN_BINS)
+        self._weighted = np.zeros(bins)
+        self._scratch = np.empty(bins)
+        self._empty = np.empty(bins, dtype=bool)
+        self._hit = np.empty(bins, dtype=bool)
+        self._empty_degrees = np.empty(SCAN_BINS, dtype=bool)
+        self._capacity = 0
+        self._reserve(CAPACITY)
+        self.measurements = 0
+        self.filtered = 0
+        self.reset()
+
+    def _reserve(self, count):
+        """Grows the per-measurement scratch buffers to hold `count` measurements."""
+        if count <= self._capacity:
+            return
+        capacity = max(count, 2 * self._capacity)
+        self._capacity = capacity
+        self._keep = np.empty(capacity, dtype=bool)
+        self._drop = np.empty(capacity, dtype=bool)
+        self._columns = np.empty((3, capacity))  # quality, angle, distance rows
+        self._product = np.empty(capacity)
+        self._index = np.empty(capacity, dtype=np.intp)
+        self._degree_index = np.empty(capacity, dtype=np.intp)
+
+    def reset(self):
+        """Clears the scan for the next revolution (no allocation)."""
+        self.distances.fill(np.inf if self.reduction == 'min' else 0.0)
+        self.degrees.fill(np.inf)
+        self.quality.fill(0)
+        self._weighted.fill(0)
+
+    def add(self, measurements):
+        """
+        Bins a batch of measurements, e.g. one revolution from lidar.iter_scans().
+
+        :param measurements <list or np.ndarray>: (quality, angle, distance) tuples, or an (n, 3) array
+        :return: number of measurements kept after the quality / zero-distance filter
+        """
+        if isinstance(measurements, np.ndarray):
+            batch = measurements.reshape(-1, 3)
+        else:
+            # fromiter over the flattened tuples is ~2x faster than np.asarray on a list of tuples
+            batch = np.fromiter(chain.from_iterable(measurements), dtype=np.float64,
+                                count=3 * len(measurements)).reshape(-1, 3)
+        total = batch.shape[0]
+        self._reserve(total)
+        columns = self._columns[:, :total]
+        np.copyto(columns, batch.T)
+        quality, angle, distance = columns
+        keep = self._keep[:total]
+        drop = self._drop[:total]
+        np.greater_equal(quality, self.min_quality, out=keep)
+        np.greater(distance, 0, out=drop)
+        np.logical_and(keep, drop, out=keep)
+        np.logical_not(keep, out=drop)
+        count = int(np.count_nonzero(keep))
+        self.measurements += total
+        self.filtered += total - count
+
+        # Angles are in [0, 360], so truncation is floor; 360 itself goes into the last bin like min(359, ...)
+        index = self._index[:total]
+        product = self._product[:total]
+        np.multiply(angle, self.bins / 360.0, out=product)
+        np.copyto(index, product, casting='unsafe')
+        np.minimum(index, self.bins - 1, out=index)
+        # Dropped measurements stay in place but can no longer change a bin (no compaction copy)
+        np.copyto(quality, 0, where=drop)
+        if self.reduction == 'min':
+            np.copyto(distance, np.inf, where=drop)
+            np.minimum.at(self.distances, index, distance)
+            np.maximum.at(self.quality, index, quality)
+            if self.bins != SCAN_BINS:
+                degree_index = self._degree_index[:total]
+                np.floor_divide(index, self.bins // SCAN_BINS, out=degree_index)
+                np.minimum.at(self.degrees, degree_index, distance)
+        else:
+            np.multiply(quality, distance, out=product)
+            np.copyto(product, 0, where=drop)  # 0 * nan is still nan
+            np.add.at(self._weighted, index, product)
+            np.add.at(self.quality, index, quality)
+        return count
+
+    def finish(self):
+        """
+        Completes the scan: empty bins become 0 and `degrees` is filled.
+
+        :return: self.degrees
+        """
+        empty = self._empty
+        if self.reduction == 'min':
+            np.isinf(self.distances, out=empty)
+        else:
+            np.equal(self.quality, 0, out=empty)
+            np.logical_not(empty, out=self._hit)
+            np.divide(self._weighted, self.quality, out=self.distances, where=self._hit)
+        np.copyto(self.distances, 0, where=empty)
+        if self.bins != SCAN_BINS and self.reduction == 'weighted':
+            # Closest non-zero return among the bins of each degree ('min' keeps degrees up to date in add())
+            np.copyto(self._scratch, self.distances)
+            np.copyto(self._scratch, np.inf, where=empty)
+            np.min(self._scratch.reshape(SCAN_BINS, -1), axis=1, out=self.degrees)
+        np.isinf(self.degrees, out=self._empty_degrees)
+        np.copyto(self.degrees, 0, where=self._empty_degrees)
+        return self.degrees
+
+    def bin_scan(self, measurements):
+        """
+        reset() + add() + finish() for one revolution.
+
+        :return: self.degrees (one bin per degree, reused by the next call)
+        """
+        self.reset()
+        self.add(measurements)
+        return self.finish()
@@ -0,0 +1,176 @@
+"""
+\file       scan_mailbox.py
+\brief      Latest-value-wins scan mailbox and runtime counters in shared memory
+            runtime.py's acquisition process publishes the newest scan, the control
+            and telemetry processes each read whatever is newest when they are ready.
+            Nothing queues up, so control never works through a backlog of old scans;
+            scans that were overwritten before a reader got to them are counted.
+
+            Layout: a 256 byte header (magic, bins, then the sequence word and the
+            odometer on their own cache lines), the counters block, then one slot of
+            (timestamp, distances). The sequence word is a seqlock: odd while the writer is filling
+            the slot, so a reader that sees it change (or odd) simply copies again.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+from multiprocessing import shared_memory
+import time
+import numpy as np
+
+""" [Constants] """
+DEFAULT_NAME = 'dora_mailbox'
+SCAN_BINS = 360
+MAGIC = 0x444D4258  # 'DMBX'
+HEADER_SIZE = 256
+SEQ_OFFSET = 64
+ODOMETER_OFFSET = 128
+COUNTERS_OFFSET = HEADER_SIZE
+MAX_READ_RETRIES = 100
+
+# One writer per counter, so no locking is needed
+COUNTERS = (
+    'scans',  # Scans published by acquisition
+    'overruns',  # RPLidarExceptions (buffer overruns, bad descriptors) survived by acquisition
+    'control_runs',
+    'control_skipped',  # Scans overwritten before control read them
+    'telemetry_sent',
+    'telemetry_skipped',
+    'telemetry_errors',
+    'restarts_acquisition',
+    'restarts_control',
+    'restarts_telemetry',
+)
+COUNTERS_SIZE = 8 * 16
+
+SLOT_DTYPE = np.dtype([
+    ('timestamp_us', np.uint64),
+    ('distances', np.float32, (SCAN_BINS,)),
+])
+
+
+class ScanMailbox:
+    """
+    Shared-memory single-writer, many-reader latest scan slot.
+    Use ScanMailbox.create() in the supervisor and ScanMailbox.attach() in the workers.
+    """
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        buf = shm.buf
+        self._seq = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=SEQ_OFFSET)
+        self._odometer = np.ndarray((1,), dtype=np.float64, buffer=buf, offset=ODOMETER_OFFSET)
+        self._counters = np.ndarray((len(COUNTERS),), dtype=np.uint64, buffer=buf, offset=COUNTERS_OFFSET)
+        self._slot = np.ndarray((1,), dtype=SLOT_DTYPE, buffer=buf, offset=COUNTERS_OFFSET + COUNTERS_SIZE)
+        self._copy = np.zeros(1, dtype=SLOT_DTYPE)
+
+    @classmethod
+    def create(cls, name=DEFAULT_NAME):
+        """
+        Creates (or recreates) the shared memory segment. Called by the supervisor.
+
+        :param name <str>: Shared memory name
+        :return: ScanMailbox
+        """
+        size = COUNTERS_OFFSET + COUNTERS_SIZE + SLOT_DTYPE.itemsize
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        header = np.ndarray((2,), dtype=np.uint32, buffer=shm.buf, offset=0)
+        header[1] = SCAN_BINS
+        header[0] = MAGIC
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME):
+        """
+        Attaches to a mailbox created by the supervisor (from one of its worker processes).
+
+        :param name <str>: Shared memory name
+        :return: ScanMailbox
+        """
+        # Workers are children of the supervisor and share its resource tracker, so the
+        # registration here is the supervisor's own (unlike ScanRing.attach, no unregister)
+        shm = shared_memory.SharedMemory(name=name)
+        if np.ndarray((1,), dtype=np.uint32, buffer=shm.buf, offset=0)[0] != MAGIC:
+            shm.close()
+            raise ValueError(f"Shared memory '{name}' is not a scan mailbox")
+        return cls(shm, owner=False)
+
+    @property
+    def seq(self):
+        """Sequence number of the latest published scan (0 = none yet)."""
+        return int(self._seq[0]) // 2
+
+    @property
+    def odometer(self):
+        """Total distance travelled as reported by the Pico (written by the control process)."""
+        return float(self._odometer[0])
+
+    @odometer.setter
+    def odometer(self, value):
+        self._odometer[0] = value
+
+    def publish(self, distances, timestamp_us=None):
+        """
+        Replaces the mailbox contents with a new scan. Acquisition side only.
+
+        :param distances <array-like>: Up to 360 distances, index is the angle in degrees
+        :param timestamp_us <int>: Capture time, defaults to now
+        :return: sequence number of the scan
+        """
+        seq = int(self._seq[0])
+        self._seq[0] = seq + 1  # Odd: slot is being written
+        distances = np.asarray(distances, dtype=np.float32)[:SCAN_BINS]
+        self._slot['distances'][0, :distances.shape[0]] = distances
+        self._slot['distances'][0, distances.shape[0]:] = 0
+        self._slot['timestamp_us'] = time.time_ns() // 1000 if timestamp_us is None else timestamp_us
+        self._seq[0] = seq + 2
+        self.increment('scans')
+        return (seq + 2) // 2
+
+    def read(self, last_seq=0):
+        """
+        Copies out the latest scan if it is newer than last_seq.
+
+        :param last_seq <int>: Sequence number of the scan the caller already has
+        :return: (seq, distances, timestamp_us) or None if nothing newer was published
+          * distances is a float32 array that is reused by the next read(); copy it to keep it
+          * seq - last_seq - 1 scans were overwritten before this reader saw them
+        """
+        for _ in range(MAX_READ_RETRIES):
+            before = int(self._seq[0])
+            if before // 2 == last_seq:
+                return None
+            if before & 1:
+                continue
+            self._copy[:] = self._slot
+            if int(self._seq[0]) == before:
+                return before // 2, self._copy['distances'][0], int(self._copy['timestamp_us'][0])
+        return None
+
+    def increment(self, counter, amount=1):
+        self._counters[COUNTERS.index(counter)] += amount
+
+    def counters(self):
+        """:return: dict of counter name -> value"""
+        return dict(zip(COUNTERS, (int(c) for c in self._counters)))
+
+    def close(self):
+        """Detaches from the mailbox; the supervisor also removes the segment."""
+        self._seq = self._odometer = self._counters = self._slot = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
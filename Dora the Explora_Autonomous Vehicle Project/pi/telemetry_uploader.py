@@ -0,0 +1,166 @@
+"""
+\file       telemetry_uploader.py
+\brief      Background, batched scan uploader (Pi -> mapping server)
+            submit() only appends an encoded scan to a bounded queue and returns;
+            a sender thread posts up to `batch_size` scans per request over one
+            keep-alive requests.Session, so the scan / control loop never waits on
+            the network. When the queue is full the oldest (or the newest) scan is
+            dropped, which keeps the server close to real time if the link stalls.
+
+            Batches use scan_frame.BATCH_CONTENT_TYPE (optionally deflated);
+            batch_size=1 posts each scan on its own with its normal Content-Type.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+from collections import deque
+import os
+import sys
+import threading
+import time
+import zlib
+import requests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import scan_frame
+
+""" [Constants] """
+QUEUE_SIZE = 32  # Scans waiting to be sent (~6 s at 5 scans/s)
+BATCH_SIZE = 4  # Max scans per POST
+MAX_DELAY = 0.1  # Seconds the oldest queued scan waits for a batch to fill
+DROP_POLICIES = ('oldest', 'newest')
+REQUEST_TIMEOUT = 0.5  # Seconds
+RETRIES = 2  # Extra attempts per batch before it is given up
+RETRY_BACKOFF = 0.05  # Seconds, doubled per retry
+COMPRESS_LEVEL = 1  # zlib level; fast, the payloads are small
+COUNTERS = ('queued', 'sent', 'dropped', 'retried', 'failed', 'requests')
+
+
+class TelemetryUploader:
+    """
+    Bounded-queue, batching HTTP uploader running on its own thread.
+
+    Counters (see counters()):
+      queued   scans accepted by submit()
+      sent     scans the server acknowledged
+      dropped  scans discarded because the queue was full
+      retried  POST attempts that were repeated after an error
+      failed   scans given up after RETRIES retries
+      requests POSTs that succeeded
+    """
+    def __init__(self, url, content_type=scan_frame.CONTENT_TYPE, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 max_delay=MAX_DELAY, drop='oldest', compress=False, timeout=REQUEST_TIMEOUT, retries=RETRIES):
+        if drop not in DROP_POLICIES:
+            raise ValueError(f"drop must be one of {DROP_POLICIES}")
+        self.url = url
+        self.content_type = content_type
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.drop = drop
+        self.compress = compress
+        self.timeout = timeout
+        self.retries = retries
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._closing = False
+        self._session = requests.Session()  # Keep-alive, one TCP connection for the whole run
+        self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+        self._thread.start()
+
+    def submit(self, payload):
+        """
+        Queues one encoded scan (scan_frame.encode_scan() bytes, or JSON bytes with a JSON content_type).
+        Never blocks on the network.
+
+        :param payload <bytes>: Encoded scan
+        :return: True if queued without dropping anything
+        """
+        with self._cond:
+            dropped = False
+            if len(self._queue) >= self.queue_size:
+                dropped = True
+                self._counters['dropped'] += 1
+                if self.drop == 'newest':
+                    return False
+                self._queue.popleft()
+            self._queue.append((time.monotonic(), payload))
+            self._counters['queued'] += 1
+            self._cond.notify()
+        return not dropped
+
+    def counters(self):
+        """:return: dict of counter name -> value (plus 'pending', the current queue length)"""
+        with self._cond:
+            counters = dict(self._counters)
+            counters['pending'] = len(self._queue)
+        return counters
+
+    def close(self, timeout=1.0):
+        """Sends what is queued (for up to `timeout` seconds) and stops the sender thread."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self._session.close()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._closing:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            # Give a partial batch until the oldest scan has waited max_delay
+            deadline = self._queue[0][0] + self.max_delay
+            while len(self._queue) < self.batch_size and not self._closing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft()[1] for _ in range(count)]
+
+    def _post(self, payloads):
+        if self.batch_size == 1:
+            body = payloads[0]
+            headers = {'Content-Type': self.content_type}
+        else:
+            body = scan_frame.encode_batch(payloads)
+            headers = {'Content-Type': scan_frame.BATCH_CONTENT_TYPE}
+            if self.compress:
+                body = zlib.compress(body, COMPRESS_LEVEL)
+                headers['Content-Encoding'] = 'deflate'
+        backoff = RETRY_BACKOFF
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count('retried')
+                time.sleep(backoff)
+                backoff *= 2
+            try:
+                response = self._session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+            except requests.RequestException:
+                continue
+            if response.status_code < 500:
+                return response.ok
+        return False
+
+    def _count(self, counter, amount=1):
+        with self._cond:
+            self._counters[counter] += amount
+
+    def _run(self):
+        while True:
+            payloads = self._next_batch()
+            if payloads is None:
+                return
+            if self._post(payloads):
+                self._count('sent', len(payloads))
+                self._count('requests')
+            else:
+                self._count('failed', len(payloads))
@@ -12,10 +12,16 @@
 """
 
 """ [Imports] """
-from machine import ADC, Pin, PWM, Timer, UART
+from machine import ADC, Pin, PWM, Timer, UART, disable_irq, enable_irq
+from array import array
+import gc
+import micropython
 import neopixel
-from time import sleep
-from math import pi
+import led_frames
+from time import sleep, sleep_ms, ticks_us, ticks_diff
+
+# Room for the traceback of an exception raised inside an IRQ
+micropython.alloc_emergency_exception_buf(100)
 
 
 # ========================================= #
@@ -26,10 +32,42 @@ from math import pi
 MOTOR_FREQ = 5000  # 5kHz; optimal VNH freq
 SERVO_FREQ = 100
 MOTOR_SPD_MAX = 200000  # Based on MOTOR_FREQ ! Must Change if MOTOR_FREQ is modified
-TIMER_FREQ = 4  # Hz
+TIMER_FREQ = 50  # Hz; odometry sample rate
+ODOM_BATCH = 4  # Samples per MSG_ODOMETRY frame (TIMER_FREQ / ODOM_BATCH frames/s)
 LED_FREQ = 5 #hz
 LED_COUNT = 44
+LED_BYTES = 3 * LED_COUNT
+LED_VIPER = True  # Copy frames with the viper blit; False points the strip at the frame instead (no copy)
 COUNTS_TO_ROTATION = 3  # Number of counters per wheel rotation (aka # of tape pieces)
+MILLI_INCH_PER_ROTATION = 12881  # 4.1 in wheel dia * pi, in 1/1000 inch
+EDGE_MILLI_INCH = MILLI_INCH_PER_ROTATION // COUNTS_TO_ROTATION  # Distance between two sensor edges
+EDGE_SPEED_K = 429366667  # Edge distance in 1/100 inch * 1e6; / edge interval (us) = speed in 1/100 inch/s
+EDGE_RING_SIZE = 16  # Power of 2
+EDGE_MASK = EDGE_RING_SIZE - 1
+EDGE_DEBOUNCE_US = 2000  # Edges closer than this are sensor bounce (~2000 in/s)
+STOP_US = 500000  # No edge for this long = stopped
+LOOP_MS = 200  # Main loop period
+DEBUG = False  # Report GC count / max loop jitter to the Pi as MSG_DEBUG frames
+DEBUG_REPORT_LOOPS = 25  # Main loop passes per MSG_DEBUG report (5 s)
+
+# Integer duty math: FIXED_ONE steer / speed units -> ns
+SERVO_CENTER_NS = 1500000
+SERVO_NS_PER_STEP = 40  # 400000 ns (~45 degrees) per FIXED_ONE
+MOTOR_NS_PER_STEP = 20  # MOTOR_SPD_MAX per FIXED_ONE
+
+# Pi <-> Pico frames (see pi/pico_link.py): sync, type, seq, len, payload, CRC-8 over type..payload
+SYNC = 0xA5
+MSG_COMMAND = 0x01  # i16 steer, i16 speed (FIXED_ONE = 1.0), u8 motor dir index
+MSG_ODOMETRY = 0x02  # ODOM_BATCH x (u32 ticks_us, i32 total distance (1/1000 inch), i32 speed (1/100 inch/s))
+MSG_PING = 0x03
+MSG_PONG = 0x04
+MSG_DEBUG = 0x05  # u16 GC count, i32 max loop jitter (us), u32 heap allocated, u16 CRC errors, u16 RX overflows
+FIXED_ONE = 10000
+MILLI_INCH = 1000
+MOTOR_DIRS = ('F', 'R', 'B', 'N')
+MAX_PAYLOAD = 64
+RX_RING_SIZE = 256  # Power of 2
+RX_MASK = RX_RING_SIZE - 1
 
 """ [Initialization] """
 # DC Motor Pin Setup
@@ -40,7 +78,6 @@ Motor_CS = ADC(Pin(28))  # Optional Current Sensing Pin; Analog Read
 
 Servo_PWM = Pin(20, Pin.OUT)  # Servo Motor Pin Setup
 Motor_Spd = Pin(22, Pin.IN, Pin.PULL_DOWN)  # Color Sensor for Tracking Speed Pin Setup
-UART_Rdy = Pin(2, Pin.OUT)  # Interrupt Pin to set High when ready to transmit UART data
 
 # Initialize Pins for PWM and Set Frequency
 Motor_PWM = PWM(Motor_PWM, freq = MOTOR_FREQ)
@@ -51,23 +88,51 @@ led_strip = neopixel.NeoPixel(Pin(9), LED_COUNT)
 led_timer = Timer()
 led_counter = 0
 turn_color = ''
+LED_FRAMES = led_frames.build_frames(LED_COUNT)  # turn_color -> precomputed GRB frames
+LED_FRAMES_DEFAULT = LED_FRAMES['']
 
-# Init UART Communication Lines
-pi2pico = Pin(3, Pin.IN, Pin.PULL_DOWN)
-uart = UART(0, 115200, tx=Pin(0), rx=Pin(1), timeout=2)
+# Init UART Communication Lines (timeout=0: reads never wait)
+uart = UART(0, 115200, tx=Pin(0), rx=Pin(1), timeout=0)
 
 Disable = Pin(4, Pin.IN, Pin.PULL_DOWN)
 Pico_Rdy = Pin(5, Pin.OUT)
 
 # Init Globals
 timer = Timer()
-counter = 0
 last_distance = 0
-traveled_distance = 0
 run = 1
-pid_dir = 'N'
-pid_ang = 0
+pid_steer = 0  # -FIXED_ONE (full left) .. FIXED_ONE (full right)
 pid_brake = 'F'
+pid_speed = 2100  # 0.21 * FIXED_ONE
+
+# Hard IRQs only touch the buffers and counters below, all allocated once here.
+# Anything else (parsing, motor updates, odometry math) runs via micropython.schedule.
+edge_times = array('i', [0] * EDGE_RING_SIZE)  # ticks_us of the last EDGE_RING_SIZE sensor edges
+edge_head = 0  # Next write position
+edge_total = 0  # Edges since boot
+odo_time = 0  # ticks_us of the sample send_odometry is about to take
+odo_pending = 0  # 1 while send_odometry is scheduled
+odo_batch = 0  # Samples already in tx_odometry
+odo_dropped = 0  # Sample ticks skipped because the previous one was still pending
+
+rx_ring = bytearray(RX_RING_SIZE)
+rx_head = 0  # Next write position (IRQ)
+rx_tail = 0  # Next read position (parser)
+rx_chunk = bytearray(64)
+rx_frame = bytearray(MAX_PAYLOAD + 5)
+rx_overflows = 0
+rx_crc_errors = 0
+rx_pending = 0  # 1 while parse_frames is scheduled
+
+# One TX buffer per frame type, each exactly one frame long, so uart.write() needs no slice
+# and a scheduled sender can't overwrite a frame the main loop is still filling
+tx_odometry = bytearray(5 + 12 * ODOM_BATCH)
+tx_pong = bytearray(9)
+tx_debug = bytearray(19)
+tx_seq = 0
+
+gc_count = 0
+max_jitter = 0
 
 # ========================================= #
 #         === [Local Functions] ===         #
@@ -123,12 +188,42 @@ def set_motor_spd(percent_spd):
     """
     if percent_spd < 0 or percent_spd > 1:
         return
-    duty_cycle = MOTOR_SPD_MAX * percent_spd  # Convert Percent Speed to Duty Cycle in ns
-    Motor_PWM.duty_ns(int(duty_cycle))
+    set_motor_speed(int(percent_spd * FIXED_ONE))
 
 
-def set_servo(direction, percent_ang=0):
+def set_motor_speed(speed):
+    """
+    Integer version of set_motor_spd (no float math, safe to call from scheduled callbacks).
+
+    :param speed <int>: 0 - FIXED_ONE
+    :return: none
+    """
+    if speed < 0 or speed > FIXED_ONE:
+        return
+    Motor_PWM.duty_ns(MOTOR_NS_PER_STEP * speed)  # Duty cycle in ns
+
+
+def set_steer(steer):
+    """
+    Integer version of set_servo (no float math, safe to call from scheduled callbacks).
+
+    :param steer <int>: -FIXED_ONE (full left) .. FIXED_ONE (full right), 0 = neutral
+    :return: none
+    """
     global turn_color
+    if steer < -FIXED_ONE or steer > FIXED_ONE:
+        return
+    # Range (1100000 -> 1900000), right is the low end
+    Servo_PWM.duty_ns(SERVO_CENTER_NS - SERVO_NS_PER_STEP * steer)
+    if steer > 0:
+        turn_color = 'R'
+    elif steer < 0:
+        turn_color = 'G'
+    else:
+        turn_color = 'B'
+
+
+def set_servo(direction, percent_ang=0):
     """
     Sets servo to desired direction and at the percentage of that direction.
     100% percent in a direction correlates to roughly ~ 45 degrees
@@ -144,18 +239,11 @@ def set_servo(direction, percent_ang=0):
     if percent_ang < 0 or percent_ang > 1:
         return
     if direction == 'R' or direction == 'r':
-        # Range (1100000 -> 1500000)
-        delta = 400000 * percent_ang
-        turn_color = 'R'
-        Servo_PWM.duty_ns(int(1500000 - delta))
+        set_steer(int(percent_ang * FIXED_ONE))
     elif direction == 'L' or direction == 'l':
-        # Range (1500000 -> 1900000)
-        delta = 400000 * percent_ang
-        Servo_PWM.duty_ns(int(1500000 + delta))
-        turn_color = 'G'
+        set_steer(-int(percent_ang * FIXED_ONE))
     elif direction == 'N' or direction == 'n':
-        Servo_PWM.duty_ns(1500000)
-        turn_color = 'B'
+        set_steer(0)
 
 
 def car_init():
@@ -171,6 +259,9 @@ def car_init():
 def car_stop():
     global turn_color
     turn_color == 'P'
+    # Nothing may drive the car after a Disable: no more commands from the UART, no LED ticks
+    uart.irq(handler = None)
+    led_timer.deinit()
     timer.deinit()
     car_init()
 
@@ -185,37 +276,248 @@ def spd_irq_handler(edge_type):
     :param edge_type <Pin obj>: Falling or rising edge irq detection
     :return: none
     """
-    global counter
-    counter += 1
+    global edge_head
+    global edge_total
+    now = ticks_us()
+    if edge_total and ticks_diff(now, edge_times[(edge_head - 1) & EDGE_MASK]) < EDGE_DEBOUNCE_US:
+        return
+    edge_times[edge_head] = now
+    edge_head = (edge_head + 1) & EDGE_MASK
+    edge_total += 1
+
+def _crc8_table():
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[i] = crc
+    return table
+
+CRC8_TABLE = _crc8_table()
+
+def crc8(buf, start, end):
+    crc = 0
+    for i in range(start, end):
+        crc = CRC8_TABLE[crc ^ buf[i]]
+    return crc
+
+def send_frame(frame, kind, seq=-1):
+    """
+    Fills in the header and CRC of a TX buffer whose payload is already written, and sends it.
 
-def send_sensor_data(speed):
-    print("Sending Sensor data to Pi")
-    speed = speed +'\n'
-    UART_Rdy.value(1)
-    if uart.write(speed.encode('utf-8')) < 0:
-        print("Error sending UART message to pi")
-    uart.flush()
-    UART_Rdy.value(0)
+    :param frame <bytearray>: One of the tx_* buffers (header + payload + CRC)
+    :param kind <int>: MSG_* type
+    :param seq <int>: Sequence number, -1 = next from tx_seq
+    :return: none
+    """
+    global tx_seq
+    if seq < 0:
+        seq = tx_seq
+        tx_seq = (tx_seq + 1) & 0xFF
+    end = len(frame) - 1
+    frame[0] = SYNC
+    frame[1] = kind
+    frame[2] = seq
+    frame[3] = end - 4
+    frame[end] = crc8(frame, 1, end)
+    uart.write(frame)  # Fits in the UART TX FIFO, returns without waiting
+
+def _put_u16(buf, i, v):
+    buf[i] = v & 0xFF
+    buf[i + 1] = (v >> 8) & 0xFF
+
+def _put_u32(buf, i, v):
+    _put_u16(buf, i, v & 0xFFFF)
+    _put_u16(buf, i + 2, (v >> 16) & 0xFFFF)
+
+def edge_distance(edges):
+    """
+    :param edges <int>: Sensor edges
+    :return: distance in 1/1000 inch (small ints only: no edges * 12881 product)
+    """
+    rotations = edges // COUNTS_TO_ROTATION
+    return rotations * MILLI_INCH_PER_ROTATION + (edges - rotations * COUNTS_TO_ROTATION) * EDGE_MILLI_INCH
 
+def odometry_at(t, edges, last, prev):
+    """
+    Total distance and speed at time t from the last two edge timestamps.
+    Between edges the distance is interpolated at the last edge interval's speed, but never
+    past the next edge, so it only ever increases. Speed decays once an edge is overdue.
+
+    :param t <int>: ticks_us of the sample
+    :param edges <int>: edge_total at t
+    :param last <int>: ticks_us of the newest edge
+    :param prev <int>: ticks_us of the edge before it
+    :return: (distance in 1/1000 inch, speed in 1/100 inch/s)
+    """
+    distance = edge_distance(edges)
+    if edges < 2:
+        return distance, 0
+    since = ticks_diff(t, last)
+    interval = ticks_diff(last, prev)
+    if since < 0 or interval < 16:
+        return distance, 0
+    if since >= interval:
+        # Slowing down (or parked): the next edge is already late, hold just short of it
+        return distance + EDGE_MILLI_INCH - 1, 0 if since > STOP_US else EDGE_SPEED_K // since
+    # Scale both down so EDGE_MILLI_INCH * since stays a small int (ticks_diff is below 2^29)
+    shift = 4 if since <= STOP_US else 12
+    extra = EDGE_MILLI_INCH * (since >> shift) // (interval >> shift)
+    if extra >= EDGE_MILLI_INCH:
+        extra = EDGE_MILLI_INCH - 1
+    speed = 0 if since > STOP_US else EDGE_SPEED_K // interval
+    return distance + extra, speed
+
+def send_debug():
+    """
+    Reports GC count, max loop jitter and heap use as a MSG_DEBUG frame (DEBUG builds).
+
+    :return: none
+    """
+    _put_u16(tx_debug, 4, gc_count & 0xFFFF)
+    _put_u32(tx_debug, 6, max_jitter & 0xFFFFFFFF)
+    _put_u32(tx_debug, 10, gc.mem_alloc())
+    _put_u16(tx_debug, 14, rx_crc_errors & 0xFFFF)
+    _put_u16(tx_debug, 16, rx_overflows & 0xFFFF)
+    send_frame(tx_debug, MSG_DEBUG)
+
+def _i16(buf, i):
+    v = buf[i] | (buf[i + 1] << 8)
+    return v - 0x10000 if v & 0x8000 else v
+
+def handle_frame(length):
+    """
+    Acts on the valid frame in rx_frame.
 
-def rx_irq_handler(edge_type):
-    global pid_dir
-    global pid_ang
+    :param length <int>: Payload length
+    :return: none
+    """
+    global pid_steer
+    global pid_speed
     global pid_brake
-    sleep(0.03)
-    message = uart.readline().decode('utf-8')
-    pid_dir, percent_ang, pid_brake = (message.strip('\n')).split(' ')
-    pid_ang = float(percent_ang)
+    kind = rx_frame[1]
+    if kind == MSG_COMMAND and length == 5:
+        if not run:
+            return  # Disabled: car_stop() has the motor and servo at neutral, keep them there
+        motor = rx_frame[8]
+        pid_steer = _i16(rx_frame, 4)
+        pid_speed = _i16(rx_frame, 6)
+        pid_brake = MOTOR_DIRS[motor] if motor < len(MOTOR_DIRS) else 'N'
+        # Apply now instead of waiting for the next main loop pass
+        set_steer(pid_steer)
+        set_motor_dir(pid_brake)
+        set_motor_speed(pid_speed)
+    elif kind == MSG_PING and length == 4:
+        # Echo the Pi's timestamp back with the Pi's sequence number
+        for i in range(4):
+            tx_pong[4 + i] = rx_frame[4 + i]
+        send_frame(tx_pong, MSG_PONG, rx_frame[2])
+
+def parse_frames(_):
+    """
+    Scheduled by uart_rx_handler. Pulls complete frames out of the RX ring,
+    resyncing on the sync byte after garbage or a bad CRC.
+
+    :param _ <int>: micropython.schedule argument (unused)
+    :return: none
+    """
+    global rx_tail
+    global rx_crc_errors
+    global rx_pending
+    rx_pending = 0  # Bytes arriving from here on schedule another pass
+    while True:
+        available = (rx_head - rx_tail) & RX_MASK
+        if available < 5:
+            return
+        if rx_ring[rx_tail] != SYNC:
+            rx_tail = (rx_tail + 1) & RX_MASK
+            continue
+        length = rx_ring[(rx_tail + 3) & RX_MASK]
+        if length > MAX_PAYLOAD:
+            rx_tail = (rx_tail + 1) & RX_MASK
+            continue
+        total = length + 5
+        if available < total:
+            return
+        for i in range(total):
+            rx_frame[i] = rx_ring[(rx_tail + i) & RX_MASK]
+        if crc8(rx_frame, 1, total - 1) != rx_frame[total - 1]:
+            rx_crc_errors += 1
+            rx_tail = (rx_tail + 1) & RX_MASK
+            continue
+        rx_tail = (rx_tail + total) & RX_MASK
+        handle_frame(length)
+
+def uart_rx_handler(u):
+    """
+    UART RX interrupt: drains the UART FIFO into the RX ring and schedules parse_frames.
+    Touches only preallocated buffers and small int counters (no heap allocation).
+
+    :param u <UART obj>: UART that raised the interrupt
+    :return: none
+    """
+    global rx_head
+    global rx_tail
+    global rx_overflows
+    global rx_pending
+    n = uart.readinto(rx_chunk)
+    while n:
+        for i in range(n):
+            rx_ring[rx_head] = rx_chunk[i]
+            rx_head = (rx_head + 1) & RX_MASK
+            if rx_head == rx_tail:
+                # Full: drop the oldest byte, the parser resyncs
+                rx_tail = (rx_tail + 1) & RX_MASK
+                rx_overflows += 1
+        n = uart.readinto(rx_chunk)
+    if not rx_pending:
+        rx_pending = 1
+        micropython.schedule(parse_frames, 0)
+
+def send_odometry(_):
+    """
+    Scheduled by spd_counter. Adds a (time, distance, speed) sample at odo_time to
+    tx_odometry and sends the frame to the Pi once it holds ODOM_BATCH samples.
+
+    :param _ <int>: micropython.schedule argument (unused)
+    :return: none
+    """
+    global odo_pending
+    global odo_batch
+    state = disable_irq()
+    t = odo_time
+    edges = edge_total
+    last = edge_times[(edge_head - 1) & EDGE_MASK]
+    prev = edge_times[(edge_head - 2) & EDGE_MASK]
+    odo_pending = 0
+    enable_irq(state)
+    distance, speed = odometry_at(t, edges, last, prev)
+    i = 4 + 12 * odo_batch
+    _put_u32(tx_odometry, i, t)
+    _put_u32(tx_odometry, i + 4, distance & 0xFFFFFFFF)
+    _put_u32(tx_odometry, i + 8, speed)
+    odo_batch += 1
+    if odo_batch == ODOM_BATCH:
+        send_frame(tx_odometry, MSG_ODOMETRY)
+        odo_batch = 0
 
 def spd_counter(timer):
-    global counter
-    global traveled_distance
-    if counter != 0:
-        distance = (counter / COUNTS_TO_ROTATION) * 4.1 * pi  # Distance formula 'Rotations * Wheel Dia * Pi = Inches'
-        print(f'Traveled {distance} inches')
-        traveled_distance += distance
-        send_sensor_data(str(distance))
-    counter = 0
+    """
+    Timer interrupt (TIMER_FREQ): timestamps an odometry sample and schedules send_odometry.
+
+    :param timer <Timer obj>: Timer that raised the interrupt
+    :return: none
+    """
+    global odo_time
+    global odo_pending
+    global odo_dropped
+    if odo_pending:
+        odo_dropped += 1
+        return
+    odo_time = ticks_us()
+    odo_pending = 1
+    micropython.schedule(send_odometry, 0)
 
 
 # 4.1 inches (diameter of wheel)
@@ -223,29 +525,30 @@ def spd_counter(timer):
 # Equation: RPM * Wheel Diameter * Pi == Inches / Min
 def get_distance():
     global last_distance
-    global traveled_distance
-    distance = traveled_distance - last_distance
-    last_distance = traveled_distance
+    total = edge_distance(edge_total)
+    distance = (total - last_distance) / MILLI_INCH
+    last_distance = total
     print(f'Traveled {distance} inches since last func call')
     return distance
 
-def led_handler(timer):
+def led_irq_handler(timer):
+    # led_strip.write() bit-bangs the strip for ~1.3 ms; keep it out of the interrupt
+    micropython.schedule(led_handler, 0)
+
+def led_handler(_):
+    """
+    Shows the next precomputed animation frame for the current turn_color (see led_frames.py).
+
+    :param _ <int>: micropython.schedule argument (unused)
+    :return: none
+    """
     global led_counter
-    offset = led_counter % 11
-    for i in range(0, LED_COUNT):
-        intensity = ((23*(i+offset)) % 11)
-        if intensity < 3:
-            intensity = 0
-        if turn_color == 'R':
-            led_strip[i] = (intensity*2, 0, 0)
-        elif turn_color == 'G':
-            led_strip[i] = (0, intensity*2, 0)
-        elif turn_color == 'N':
-            led_strip[i] = (0,0,  intensity*2)
-        elif turn_color == 'P':
-            led_strip[i] = (0, 10*(led_counter %10), 0)
-        else:
-            led_strip[i] = (128*(led_counter %2), 0, 0)
+    frames = LED_FRAMES.get(turn_color, LED_FRAMES_DEFAULT)
+    frame = frames[led_counter % len(frames)]
+    if LED_VIPER and led_frames.HAVE_VIPER:
+        led_frames.blit(led_strip.buf, frame, LED_BYTES)
+    else:
+        led_strip.buf = frame  # Frames are never written to, so the strip can just send one
     led_strip.write()
     led_counter += 1
 
@@ -254,24 +557,41 @@ def led_handler(timer):
 # ========================================= #
 if True:
     Pico_Rdy.value(0)
-    led_timer.init(mode = Timer.PERIODIC, freq= LED_FREQ, callback = led_handler)
+    led_timer.init(mode = Timer.PERIODIC, freq= LED_FREQ, callback = led_irq_handler)
     # Init
     program_header()
     car_init()
-    Motor_Spd.irq(trigger = Pin.IRQ_RISING, handler = spd_irq_handler)
+    Motor_Spd.irq(trigger = Pin.IRQ_RISING, handler = spd_irq_handler, hard = True)  # Timestamp the edge in the ISR, not when the scheduler gets to it
     timer.init(mode = Timer.PERIODIC, freq = TIMER_FREQ, callback = spd_counter)
     
-    pi2pico.irq(trigger = Pin.IRQ_RISING, handler = rx_irq_handler)
     Disable.irq(trigger = Pin.IRQ_RISING, handler = disable_irq_handler)
-    # uart.irq(UART.RX_any, handler=rx_irq_handler)
+    uart.irq(handler = uart_rx_handler, trigger = UART.IRQ_RXIDLE)
 
+    gc.collect()
+    last_loop = ticks_us()
+    last_alloc = gc.mem_alloc()
+    loops = 0
     while run:
         Pico_Rdy.value(1)
-        # Set Motor to Forward for 30%
-        set_servo(pid_dir, pid_ang)
+        # Re-apply the last command (also applied as soon as it arrives)
+        set_steer(pid_steer)
         set_motor_dir(pid_brake)
-        set_motor_spd(0.21)
-        sleep(0.2)
+        set_motor_speed(pid_speed)
+        if DEBUG:
+            now = ticks_us()
+            jitter = abs(ticks_diff(now, last_loop) - LOOP_MS * 1000)
+            last_loop = now
+            if loops and jitter > max_jitter:
+                max_jitter = jitter
+            alloc = gc.mem_alloc()
+            if alloc < last_alloc:
+                gc_count += 1  # The heap only shrinks when a collection ran
+            last_alloc = alloc
+            loops += 1
+            if loops % DEBUG_REPORT_LOOPS == 0:
+                send_debug()
+                max_jitter = 0
+        sleep_ms(LOOP_MS)
 
     Pico_Rdy.value(0)
     car_stop()
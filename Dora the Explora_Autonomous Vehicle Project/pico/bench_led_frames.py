@@ -0,0 +1,114 @@
+"""
+\file       bench_led_frames.py
+\brief      Host-side (CPython) per-tick cost of the old led_handler vs the precomputed frames
+            The strip is a stand-in with neopixel.NeoPixel's buffer layout and __setitem__;
+            write() is a no-op, so only the Python work done per tick is timed. It also checks
+            that every frame matches what the old handler drew.
+            Run:  python bench_led_frames.py [--ticks 20000]
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import time
+import led_frames
+
+""" [Constants] """
+LED_COUNT = 44  # Same as EEC195_Team5.py
+
+
+class HostStrip:
+    """neopixel.NeoPixel's buf / __setitem__ (GRB order) without the hardware."""
+    ORDER = (1, 0, 2)
+
+    def __init__(self, n):
+        self.n = n
+        self.buf = bytearray(3 * n)
+
+    def __setitem__(self, i, v):
+        offset = i * 3
+        for j in range(3):
+            self.buf[offset + self.ORDER[j]] = v[j]
+
+    def write(self):
+        pass
+
+
+def legacy_tick(strip, turn_color, led_counter):
+    # The body of the old led_handler
+    offset = led_counter % 11
+    for i in range(0, LED_COUNT):
+        intensity = ((23*(i+offset)) % 11)
+        if intensity < 3:
+            intensity = 0
+        if turn_color == 'R':
+            strip[i] = (intensity*2, 0, 0)
+        elif turn_color == 'G':
+            strip[i] = (0, intensity*2, 0)
+        elif turn_color == 'N':
+            strip[i] = (0,0,  intensity*2)
+        elif turn_color == 'P':
+            strip[i] = (0, 10*(led_counter %10), 0)
+        else:
+            strip[i] = (128*(led_counter %2), 0, 0)
+    strip.write()
+
+
+def frame_tick(strip, frames, turn_color, led_counter, copy=True):
+    mode_frames = frames.get(turn_color, frames[''])
+    frame = mode_frames[led_counter % len(mode_frames)]
+    if copy:
+        led_frames.blit(strip.buf, frame, 3 * LED_COUNT)
+    else:
+        strip.buf = frame
+    strip.write()
+
+
+def check(frames):
+    strip = HostStrip(LED_COUNT)
+    other = HostStrip(LED_COUNT)
+    for turn_color in ('R', 'G', 'N', 'P', 'B', ''):
+        for tick in range(2 * 11 * 10):
+            legacy_tick(strip, turn_color, tick)
+            frame_tick(other, frames, turn_color, tick)
+            if strip.buf != other.buf:
+                raise AssertionError(f"Frame mismatch for turn_color {turn_color!r} tick {tick}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='NeoPixel animation tick benchmark')
+    parser.add_argument('--ticks', type=int, default=20000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    frames = led_frames.build_frames(LED_COUNT)
+    build_ms = (time.perf_counter() - start) * 1e3
+    check(frames)
+    print(f"build_frames: {build_ms:.1f} ms, {sum(len(f) for f in frames.values())} frames, frames match the old handler")
+
+    strip = HostStrip(LED_COUNT)
+    for turn_color in ('R', 'P', 'B'):
+        start = time.perf_counter()
+        for tick in range(args.ticks):
+            legacy_tick(strip, turn_color, tick)
+        legacy_us = (time.perf_counter() - start) / args.ticks * 1e6
+
+        start = time.perf_counter()
+        for tick in range(args.ticks):
+            frame_tick(strip, frames, turn_color, tick)
+        copy_us = (time.perf_counter() - start) / args.ticks * 1e6
+
+        start = time.perf_counter()
+        for tick in range(args.ticks):
+            frame_tick(strip, frames, turn_color, tick, copy=False)
+        swap_us = (time.perf_counter() - start) / args.ticks * 1e6
+
+        print(f"turn_color {turn_color!r}: legacy {legacy_us:6.1f} us/tick  "
+              f"frame copy {copy_us:5.1f} us (x{legacy_us / copy_us:.0f})  "
+              f"frame swap {swap_us:4.2f} us (x{legacy_us / swap_us:.0f})")
@@ -0,0 +1,91 @@
+"""
+\file       led_frames.py
+\brief      Precomputed NeoPixel animation frames for EEC195_Team5.py's led_handler
+            Every animation repeats (R / G / N every 11 ticks, P every 10, the default
+            blink every 2), so all of its frames are built once at boot, already in the
+            strip's GRB byte layout. A tick then only copies one frame into the strip
+            buffer instead of recomputing and packing 44 pixels.
+
+            Copy this file to the Pico next to EEC195_Team5.py. It also runs under
+            CPython (pure Python blit instead of viper), see bench_led_frames.py.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import sys
+
+# @micropython.viper is handled by the MicroPython compiler, it is not an attribute of the
+# micropython module, so the implementation decides (CPython and the SIL use blit_py)
+HAVE_VIPER = sys.implementation.name == 'micropython'
+if HAVE_VIPER:
+    import micropython
+
+""" [Constants] """
+MODES = ('R', 'G', 'N', 'P')  # Any other turn_color shows the default blink
+PERIODS = {'R': 11, 'G': 11, 'N': 11, 'P': 10, '': 2}  # '' = default
+GRB = (1, 0, 2)  # Byte offset of r, g, b within a pixel (neopixel.NeoPixel.ORDER)
+
+
+def pixel(mode, i, tick):
+    """
+    The colour led_handler used to compute for LED i on a given tick.
+
+    :param mode <char>: turn_color
+    :param i <int>: LED index
+    :param tick <int>: led_counter
+    :return: (r, g, b)
+    """
+    intensity = (23 * (i + tick % 11)) % 11
+    if intensity < 3:
+        intensity = 0
+    if mode == 'R':
+        return (intensity * 2, 0, 0)
+    elif mode == 'G':
+        return (0, intensity * 2, 0)
+    elif mode == 'N':
+        return (0, 0, intensity * 2)
+    elif mode == 'P':
+        return (0, 10 * (tick % 10), 0)
+    return (128 * (tick % 2), 0, 0)
+
+
+def build_frames(led_count):
+    """
+    :param led_count <int>: LEDs on the strip
+    :return: dict turn_color -> tuple of GRB bytearrays, one per tick of the animation ('' = default)
+    """
+    frames = {}
+    for mode, period in PERIODS.items():
+        mode_frames = []
+        for tick in range(period):
+            frame = bytearray(3 * led_count)
+            for i in range(led_count):
+                rgb = pixel(mode, i, tick)
+                for c in range(3):
+                    frame[3 * i + GRB[c]] = rgb[c]
+            mode_frames.append(frame)
+        frames[mode] = tuple(mode_frames)
+    return frames
+
+
+def blit_py(dst, src, n):
+    """Copies n bytes from src into dst (no slice objects, so no allocation)."""
+    for i in range(n):
+        dst[i] = src[i]
+
+
+if HAVE_VIPER:
+    @micropython.viper
+    def blit_viper(dst: ptr8, src: ptr8, n: int):
+        for i in range(n):
+            dst[i] = src[i]
+
+    blit = blit_viper
+else:
+    blit = blit_py
@@ -0,0 +1,145 @@
+"""
+\file       lidar_sources.py
+\brief      Measurement streams for the fake RPLidar (shims/adafruit_rplidar.py)
+            TrackLidar ray-casts the simulated track from the vehicle's current pose;
+            ReplayLidar plays back recorded scans (text log or session log) one per
+            revolution. Both yield iter_measurements() tuples at SCAN_HZ revolutions per
+            virtual second, advancing the SimClock as they go, and raise KeyboardInterrupt
+            after the requested number of revolutions so the Pi script shuts down the same
+            way it does on Ctrl-C.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Mapping'))
+
+""" [Constants] """
+SCAN_HZ = 7.0  # Revolutions per second (RPLidar A1 default motor speed)
+POINTS = 360  # Measurements per revolution
+CHUNK = 30  # Measurements cast from one vehicle pose
+QUALITY = 15  # Quality reported for a return (0 = no return)
+NOISE = 5.0  # mm, standard deviation of the range noise
+RESOLUTION = 0.25  # mm; RPLidar distances are multiples of 1/4 mm
+SEED = 195
+
+
+class LidarSource:
+    """Base class: subclasses fill in ranges(angles) for the current revolution."""
+    def __init__(self, clock, revolutions, scan_hz=SCAN_HZ, points=POINTS, seed=SEED):
+        self.clock = clock
+        self.max_revolutions = revolutions
+        self.scan_hz = scan_hz
+        self.points = points
+        self.rng = np.random.default_rng(seed)
+        self.revolutions = 0
+        self.measurements_yielded = 0
+        self.last_yield = 0.0  # time.perf_counter() of the newest measurement handed to the Pi
+        self.started = None  # (perf_counter, virtual time) of the first / after the last measurement
+        self.finished = None
+
+    def begin_revolution(self):
+        pass
+
+    def ranges(self, angles):
+        """
+        :param angles <np.ndarray>: Lidar angles (degrees) of the next measurements
+        :return: distances (mm, 0 = no return)
+        """
+        raise NotImplementedError
+
+    def measurements(self):
+        """:return: generator of (new_scan, quality, angle, distance), like RPLidar.iter_measurements()"""
+        step = 1.0 / (self.scan_hz * self.points)
+        t = self.clock.now()
+        if self.started is None:
+            self.started = (time.perf_counter(), t)
+        while self.revolutions < self.max_revolutions:
+            self.begin_revolution()
+            offset = self.rng.random()  # Samples don't land on the same angles every revolution
+            new_scan = True
+            for first in range(0, self.points, CHUNK):
+                angles = (np.arange(first, min(first + CHUNK, self.points)) + offset) * (360.0 / self.points)
+                distances = self.ranges(angles)
+                for angle, distance in zip(angles.tolist(), distances.tolist()):
+                    t += step
+                    self.clock.advance_to(t)
+                    self.measurements_yielded += 1
+                    self.last_yield = time.perf_counter()
+                    yield new_scan, QUALITY if distance > 0 else 0, angle, distance
+                    new_scan = False
+            self.revolutions += 1
+        self.finished = (time.perf_counter(), t)
+        raise KeyboardInterrupt  # End of the run: lidar_test.py's Ctrl-C path stops the car
+
+
+class TrackLidar(LidarSource):
+    """Ray-casts world.Track from the vehicle pose, with range noise."""
+    def __init__(self, clock, revolutions, vehicle, noise=NOISE, **kwargs):
+        super().__init__(clock, revolutions, **kwargs)
+        self.vehicle = vehicle
+        self.noise = noise
+
+    def ranges(self, angles):
+        vehicle = self.vehicle
+        distances = vehicle.track.cast(vehicle.x, vehicle.y, vehicle.bearings(angles))
+        hit = distances > 0
+        if self.noise:
+            distances[hit] += self.rng.normal(0.0, self.noise, int(hit.sum()))
+        distances = np.round(np.maximum(distances, 0.0) / RESOLUTION) * RESOLUTION
+        distances[~hit] = 0.0
+        return distances
+
+
+class ReplayLidar(LidarSource):
+    """Plays recorded 360 bin scans, one per revolution, looping at the end of the recording."""
+    def __init__(self, clock, revolutions, path, vehicle=None, **kwargs):
+        super().__init__(clock, revolutions, **kwargs)
+        self.scans = load_scans(path, limit=revolutions, vehicle=vehicle)
+        if not len(self.scans):
+            raise ValueError(f"{path}: no scans to replay")
+        self._scan = self.scans[0]
+
+    def begin_revolution(self):
+        self._scan = self.scans[self.revolutions % len(self.scans)]
+
+    def ranges(self, angles):
+        return self._scan[angles.astype(np.intp) % self._scan.shape[0]]
+
+
+def load_scans(path, limit=None, vehicle=None):
+    """
+    :param path <str>: Session log (session_log.py) or '{angle,distance} [d0,...]' text log
+    :param limit <int>: Max scans to load
+    :param vehicle <int>: Car to replay from a fleet session log (default: the first one recorded)
+    :return: (n, 360) distances
+    """
+    from session_log import SessionLog
+    from scan_text_parser import iter_batches
+    try:
+        log = SessionLog(path)
+    except ValueError:
+        log = None
+    if log is not None:
+        if vehicle is None:
+            vehicle = int(log.records['vehicle'][0]) if 'vehicle' in log.dtype.names and len(log) else 0
+        numbers = log.select(vehicle)[:limit]
+        return np.array(log.records['distances'][numbers], dtype=np.float64)
+    batches = []
+    count = 0
+    for batch in iter_batches(path):
+        batches.append(batch.distances.copy())  # Batches are reused buffers
+        count += batch.distances.shape[0]
+        if limit is not None and count >= limit:
+            break
+    scans = np.concatenate(batches) if batches else np.zeros((0, 360))
+    return scans if limit is None else scans[:limit]
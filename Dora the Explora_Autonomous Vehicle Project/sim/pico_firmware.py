@@ -0,0 +1,116 @@
+"""
+\file       pico_firmware.py
+\brief      Runs pico/EEC195_Team5.py unmodified on Linux for the SIL simulator
+            machine / micropython / neopixel come from sim/shims (first on sys.path).
+            The firmware's own `time` and `gc` imports are redirected to MicroPython-style
+            modules on the SimClock (ticks_us wraps at 2^30 like the RP2040), without
+            touching the CPython time module the Pi side uses.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import builtins
+import threading
+import traceback
+import types
+
+""" [Constants] """
+TICKS_PERIOD = 1 << 30
+TICKS_MASK = TICKS_PERIOD - 1
+TICKS_HALF = TICKS_PERIOD // 2
+HEAP_SIZE = 192 * 1024  # Reported by gc.mem_free() + gc.mem_alloc()
+
+
+def micropython_time(clock):
+    """:return: module with MicroPython's time API on the SimClock"""
+    module = types.ModuleType('time')
+
+    def ticks_us():
+        return int(clock.now() * 1e6) & TICKS_MASK
+
+    def ticks_ms():
+        return int(clock.now() * 1e3) & TICKS_MASK
+
+    def ticks_diff(new, old):
+        return ((new - old + TICKS_HALF) & TICKS_MASK) - TICKS_HALF
+
+    def ticks_add(ticks, delta):
+        return (ticks + delta) & TICKS_MASK
+
+    module.ticks_us = ticks_us
+    module.ticks_ms = ticks_ms
+    module.ticks_cpu = ticks_us
+    module.ticks_diff = ticks_diff
+    module.ticks_add = ticks_add
+    module.sleep = clock.sleep
+    module.sleep_ms = lambda ms: clock.sleep(ms / 1e3)
+    module.sleep_us = lambda us: clock.sleep(us / 1e6)
+    module.time = lambda: int(clock.now())
+    return module
+
+
+def micropython_gc():
+    """:return: module with MicroPython's gc API (collections are counted, the heap is not modelled)"""
+    module = types.ModuleType('gc')
+    module.collections = 0
+
+    def collect():
+        module.collections += 1
+
+    module.collect = collect
+    module.enable = lambda: None
+    module.disable = lambda: None
+    module.isenabled = lambda: True
+    module.mem_alloc = lambda: 0
+    module.mem_free = lambda: HEAP_SIZE
+    module.threshold = lambda amount=None: -1
+    return module
+
+
+class Firmware:
+    """
+    The firmware running in a daemon thread.
+    globals holds its module globals (rx_crc_errors, odo_dropped, led_strip, ...).
+    """
+    def __init__(self, path, clock, quiet=True):
+        self.path = path
+        self.error = None
+        overrides = {'time': micropython_time(clock), 'gc': micropython_gc()}
+
+        def firmware_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level == 0 and name in overrides:
+                return overrides[name]
+            return builtins.__import__(name, globals, locals, fromlist, level)
+
+        firmware_builtins = dict(vars(builtins))
+        firmware_builtins['__import__'] = firmware_import
+        if quiet:
+            firmware_builtins['print'] = lambda *args, **kwargs: None
+        self.globals = {'__name__': '__main__', '__file__': path, '__builtins__': firmware_builtins}
+        with open(path) as fp:
+            self._code = compile(fp.read(), path, 'exec')
+        self._thread = threading.Thread(target=self._run, name='pico', daemon=True)
+
+    def _run(self):
+        try:
+            exec(self._code, self.globals)
+        except Exception as e:
+            self.error = e
+            traceback.print_exc()
+
+    def start(self):
+        self._thread.start()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
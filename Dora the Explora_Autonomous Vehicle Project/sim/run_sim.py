@@ -0,0 +1,322 @@
+"""
+\file       run_sim.py
+\brief      Software-in-the-loop run of the real Pi and Pico code, no hardware needed
+            pi/lidar_test.py and pico/EEC195_Team5.py run unmodified in one process against
+            the stand-ins in sim/shims:
+
+              lidar      RPLidar streaming a ray-cast oval track (world.py) or a recorded log
+              Pi <-> Pico  a pty pair: pyserial on the slave, the Pico UART on the master
+              GPIO       PICO_DISABLE -> Pico Disable pin, Pico_Rdy -> PICO_RDY_PIN
+              car        bicycle model driven by the Pico's servo / motor PWM, feeding the
+                         speed sensor pin (it still drives when replaying a log, for odometry,
+                         but then its collisions / clearance mean nothing)
+
+            Everything runs on a virtual clock (sim_clock.py). With --speed max the lidar
+            advances it, so the run goes as fast as the code allows; --speed X paces it at
+            X times real time. The Pi's time.monotonic / time.time are virtual too; latencies
+            are real (time.perf_counter):
+
+              scan -> write        lidar measurement that completed the scan -> command on the wire
+              write -> actuation   command written -> Pico parsed it and set the PWM duty
+              scan -> actuation    the sum, end to end
+
+            Throughput is per real second. --json saves the report; --baseline compares
+            against a saved one and exits 1 if throughput dropped or latency grew by more
+            than --tolerance, so this can gate changes to the control path.
+
+            Run:  python run_sim.py [--source track|LOG] [--revolutions 200] [--speed max|X]
+                                    [--json report.json] [--baseline report.json]
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import argparse
+import contextlib
+import json
+import os
+import runpy
+import sys
+import tempfile
+import threading
+import time
+import tty
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SIM_DIR)
+sys.path[:0] = [os.path.join(SIM_DIR, 'shims'), SIM_DIR, os.path.join(PROJECT_DIR, 'pi'), os.path.join(PROJECT_DIR, 'pico')]
+import adafruit_rplidar
+import machine
+import micropython
+import serial
+import RPi.GPIO as GPIO
+from instrumentation import LatencyHistogram
+from pico_link import FrameDecoder, MSG_COMMAND
+from sim_clock import SimClock
+from world import Track, Vehicle, SERVO_CENTER_NS
+from lidar_sources import TrackLidar, ReplayLidar
+from pico_firmware import Firmware
+
+""" [Constants] """
+PI_SCRIPT = os.path.join(PROJECT_DIR, 'pi', 'lidar_test.py')
+FIRMWARE = os.path.join(PROJECT_DIR, 'pico', 'EEC195_Team5.py')
+REVOLUTIONS = 200
+VEHICLE_DT = 0.005  # Seconds per vehicle model step
+BOOT_TIMEOUT = 10.0  # Real seconds for the firmware to reach its main loop
+DRAIN_TIMEOUT = 0.5  # Real seconds to wait for the last commands to be applied
+TOLERANCE = 0.25
+
+# Wiring (lidar_test.py / EEC195_Team5.py)
+SERIAL_PORT = '/dev/ttyS0'
+PICO_DISABLE_PIN = 25  # Pi GPIO -> Pico Pin 4 (Disable)
+PICO_RDY_PIN = 16  # Pi GPIO <- Pico Pin 5 (Pico_Rdy)
+PICO_DISABLE_INPUT = 4
+PICO_RDY_OUTPUT = 5
+MOTOR_PWM_PIN = 13
+MOTOR_INA_PIN = 14
+MOTOR_INB_PIN = 15
+SERVO_PIN = 20
+SPEED_SENSOR_PIN = 22
+
+# Report fields compared against a baseline: (path, True if higher is better, False = shown only)
+# p99 is set by a handful of thread switches and moves +-50% between identical runs, so it doesn't gate
+REGRESSION_CHECKS = (
+    (('throughput', 'revolutions_per_s'), True, True),
+    (('throughput', 'commands_per_s'), True, True),
+    (('latency', 'scan_to_actuation', 'p50_us'), False, True),
+    (('latency', 'scan_to_actuation', 'p99_us'), False, False),
+)
+
+
+class LatencyProbe:
+    """Matches MSG_COMMAND frames written by the Pi to the ones the Pico applied, by sequence number."""
+    def __init__(self, source):
+        self.source = source
+        self.scan_to_write = LatencyHistogram()
+        self.write_to_actuation = LatencyHistogram()
+        self.scan_to_actuation = LatencyHistogram()
+        self.sent = 0
+        self.applied = 0
+        self._pending = {}  # seq -> (scan perf_counter, write perf_counter)
+        self._pi_decoder = FrameDecoder()
+        self._pico_decoder = FrameDecoder()
+        self._lock = threading.Lock()
+
+    def on_write(self, port, data):
+        now = time.perf_counter()
+        scan = self.source.last_yield
+        for kind, seq, _ in self._pi_decoder.feed(data):
+            if kind == MSG_COMMAND:
+                with self._lock:
+                    self._pending[seq] = (scan, now)
+                    self.sent += 1
+                    self.scan_to_write.record(int((now - scan) * 1e9))
+
+    def on_rx(self, uart_id, data):
+        now = time.perf_counter()
+        for kind, seq, _ in self._pico_decoder.feed(data):
+            if kind != MSG_COMMAND:
+                continue
+            with self._lock:
+                sent = self._pending.pop(seq, None)
+                if sent is None:
+                    continue
+                self.applied += 1
+                self.write_to_actuation.record(int((now - sent[1]) * 1e9))
+                self.scan_to_actuation.record(int((now - sent[0]) * 1e9))
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+
+def virtualize_pi_time(clock):
+    """Points time.monotonic / time.time(_ns) at the SimClock (perf_counter and monotonic_ns stay real)."""
+    epoch = time.time()
+    base = time.monotonic()
+    time.monotonic = lambda: base + clock.now()
+    time.time = lambda: epoch + clock.now()
+    time.time_ns = lambda: int((epoch + clock.now()) * 1e9)
+
+
+def wait_for(condition, timeout, clock=None):
+    """Waits (real time) until condition() holds; in stepped mode also moves the clock along."""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        if clock is not None and clock.speed is None:
+            clock.advance_to(clock.now() + 0.01)
+        time.sleep(0.001)
+    return True
+
+
+def build_report(args, source, probe, vehicle, firmware, pi_globals):
+    finished = source.finished or (time.perf_counter(), source.clock.now())
+    real = finished[0] - source.started[0]
+    virtual = finished[1] - source.started[1]
+    fw = firmware.globals
+    pi_link = pi_globals.get('pico_link')
+    pi_odometry = pi_link.samples[-1][1] * 25.4 if pi_link is not None and pi_link.samples else 0.0
+    return {
+        'source': args.source,
+        'speed': args.speed,
+        'revolutions': source.revolutions,
+        'real_s': round(real, 3),
+        'virtual_s': round(virtual, 3),
+        'throughput': {
+            'speedup': round(virtual / real, 2),
+            'revolutions_per_s': round(source.revolutions / real, 2),
+            'measurements_per_s': round(source.measurements_yielded / real, 1),
+            'commands_per_s': round(probe.sent / real, 2),
+        },
+        'commands': {'sent': probe.sent, 'applied': probe.applied, 'unmatched': probe.pending},
+        'latency': {
+            'scan_to_write': probe.scan_to_write.summary(),
+            'write_to_actuation': probe.write_to_actuation.summary(),
+            'scan_to_actuation': probe.scan_to_actuation.summary(),
+        },
+        'vehicle': {
+            'distance_mm': round(vehicle.travelled, 1),
+            'pi_odometry_mm': round(pi_odometry, 1),
+            'sensor_edges': vehicle.edges,
+            'collisions': vehicle.collisions,
+            'min_clearance_mm': round(vehicle.min_clearance, 1),
+        },
+        'firmware': {
+            'error': None if firmware.error is None else repr(firmware.error),
+            'rx_crc_errors': fw.get('rx_crc_errors'),
+            'rx_overflows': fw.get('rx_overflows'),
+            'odometry_dropped': fw.get('odo_dropped'),
+            'scheduled': micropython.scheduled_total,
+            'led_writes': fw['led_strip'].writes if 'led_strip' in fw else 0,
+        },
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    :return: list of regression messages (empty if none)
+    """
+    regressions = []
+    for path, higher_is_better, gates in REGRESSION_CHECKS:
+        current, reference = report, baseline
+        for key in path:
+            current = current.get(key) if isinstance(current, dict) else None
+            reference = reference.get(key) if isinstance(reference, dict) else None
+        if not isinstance(current, (int, float)) or not isinstance(reference, (int, float)) or not reference:
+            continue
+        change = (current - reference) / reference
+        name = '.'.join(path)
+        print(f"  {name:40s} {reference:10.1f} -> {current:10.1f}  ({change:+.0%})")
+        if gates and ((change < -tolerance) if higher_is_better else (change > tolerance)):
+            regressions.append(f"{name}: {reference} -> {current}")
+    return regressions
+
+
+def run(args):
+    speed = None if args.speed == 'max' else float(args.speed)
+    clock = SimClock(speed)
+    machine.CLOCK = clock
+    virtualize_pi_time(clock)
+
+    # Pi <-> Pico serial line
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    machine.UART_FDS[0] = master
+    serial.PORTS[SERIAL_PORT] = os.ttyname(slave)
+
+    # GPIO wiring
+    GPIO.on_output(PICO_DISABLE_PIN, lambda level: machine.drive(PICO_DISABLE_INPUT, level))
+    machine.on_output(PICO_RDY_OUTPUT, lambda level: GPIO.set_input(PICO_RDY_PIN, level))
+
+    # Car and lidar
+    track = Track()
+    vehicle = Vehicle(
+        track,
+        lambda: (machine.duty_ns_of(SERVO_PIN, SERVO_CENTER_NS), machine.duty_ns_of(MOTOR_PWM_PIN),
+                 machine.level_of(MOTOR_INA_PIN), machine.level_of(MOTOR_INB_PIN)),
+        on_edge=lambda: machine.pulse(SPEED_SENSOR_PIN)
+    )
+    clock.every(VEHICLE_DT, lambda: vehicle.step(VEHICLE_DT))
+    if args.source == 'track':
+        source = TrackLidar(clock, args.revolutions, vehicle)
+    else:
+        source = ReplayLidar(clock, args.revolutions, args.source, vehicle=args.vehicle)
+    adafruit_rplidar.SOURCE = source
+
+    probe = LatencyProbe(source)
+    serial.write_hooks.append(probe.on_write)
+    machine.rx_hooks.append(probe.on_rx)
+
+    # The Pico boots first, like on the car
+    firmware = Firmware(FIRMWARE, clock, quiet=not args.verbose)
+    firmware.start()
+    clock.start_ticker()
+    if not wait_for(lambda: machine.level_of(PICO_RDY_OUTPUT) or not firmware.running, BOOT_TIMEOUT, clock):
+        raise RuntimeError("firmware did not reach its main loop")
+    if firmware.error is not None:
+        raise RuntimeError(f"firmware failed to boot: {firmware.error!r}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='dora_sil_')
+    cwd = os.getcwd()
+    argv = sys.argv
+    pi_globals = {}
+    output = contextlib.ExitStack()
+    if not args.verbose:
+        devnull = output.enter_context(open(os.devnull, 'w'))
+        output.enter_context(contextlib.redirect_stdout(devnull))
+        output.enter_context(contextlib.redirect_stderr(devnull))
+    try:
+        os.chdir(workdir)  # lidar_test.py writes latency.jsonl to the working directory
+        sys.argv = [args.script]
+        with output:
+            pi_globals = runpy.run_path(args.script, run_name='__main__')
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+        wait_for(lambda: probe.pending == 0, DRAIN_TIMEOUT)
+        clock.stop()
+        firmware.join(2.0)
+        machine.shutdown()
+
+    report = build_report(args, source, probe, vehicle, firmware, pi_globals)
+    report['workdir'] = workdir
+    os.close(slave)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Software-in-the-loop simulator / performance regression rig')
+    parser.add_argument('--source', default='track', help="'track' (ray-cast oval) or a text / session scan log to replay")
+    parser.add_argument('--vehicle', type=int, help='car to replay from a fleet session log (default: the first one)')
+    parser.add_argument('--revolutions', type=int, default=REVOLUTIONS, help='lidar revolutions to run for')
+    parser.add_argument('--speed', default='max', help="'max' (as fast as possible) or virtual seconds per real second")
+    parser.add_argument('--script', default=PI_SCRIPT, help='Pi script to run')
+    parser.add_argument('--workdir', help='working directory for the Pi script (default: a new temp dir)')
+    parser.add_argument('--json', help='write the report here')
+    parser.add_argument('--baseline', help='report to compare against; exit code 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='allowed relative change vs the baseline')
+    parser.add_argument('--verbose', action='store_true', help='show Pi and Pico output')
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump(report, fp, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        print(f"=== [Baseline {args.baseline}, tolerance {args.tolerance:.0%}] ===")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("No regressions")
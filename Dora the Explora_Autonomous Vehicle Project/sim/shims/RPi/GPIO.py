@@ -0,0 +1,95 @@
+"""
+\file       GPIO.py
+\brief      SIL stand-in for RPi.GPIO
+            Outputs notify on_output() listeners (the harness wires PICO_DISABLE to the
+            Pico's Disable pin); set_input() changes an input from outside and runs the
+            add_event_detect() callback on a matching edge, in the caller's thread.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Constants] """
+BCM = 11
+BOARD = 10
+OUT = 0
+IN = 1
+LOW = 0
+HIGH = 1
+PUD_OFF = 20
+PUD_DOWN = 21
+PUD_UP = 22
+RISING = 31
+FALLING = 32
+BOTH = 33
+
+""" [Initializations] """
+_mode = None
+_levels = {}
+_events = {}  # channel -> (edge, callback)
+_output_callbacks = {}  # channel -> [callback(level)]
+
+
+def setmode(mode):
+    global _mode
+    _mode = mode
+
+
+def getmode():
+    return _mode
+
+
+def setwarnings(flag):
+    pass
+
+
+def setup(channel, direction, pull_up_down=PUD_OFF, initial=None):
+    _levels.setdefault(channel, 1 if pull_up_down == PUD_UP else 0)
+    if direction == OUT and initial is not None:
+        output(channel, initial)
+
+
+def output(channel, value):
+    level = 1 if value else 0
+    _levels[channel] = level
+    for callback in _output_callbacks.get(channel, ()):
+        callback(level)
+
+
+def input(channel):
+    return _levels.get(channel, 0)
+
+
+def add_event_detect(channel, edge, callback=None, bouncetime=None):
+    _events[channel] = (edge, callback)
+
+
+def remove_event_detect(channel):
+    _events.pop(channel, None)
+
+
+def cleanup(channel=None):
+    if channel is None:
+        _events.clear()
+    else:
+        _events.pop(channel, None)
+
+
+def on_output(channel, callback):
+    _output_callbacks.setdefault(channel, []).append(callback)
+
+
+def set_input(channel, value):
+    """Drives an input from outside (the Pico's Pico_Rdy pin)."""
+    old = _levels.get(channel, 0)
+    level = 1 if value else 0
+    _levels[channel] = level
+    edge, callback = _events.get(channel, (None, None))
+    if callback is None or old == level:
+        return
+    if edge == BOTH or (edge == RISING and level) or (edge == FALLING and not level):
+        callback(channel)
@@ -0,0 +1,11 @@
+"""
+\file       __init__.py
+\brief      SIL stand-in for the RPi package (see GPIO.py)
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
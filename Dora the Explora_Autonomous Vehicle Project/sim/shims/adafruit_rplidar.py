@@ -0,0 +1,73 @@
+"""
+\file       adafruit_rplidar.py
+\brief      SIL stand-in for adafruit_rplidar
+            RPLidar streams measurements from SOURCE (a lidar_sources.LidarSource set by
+            the harness) instead of a serial port; iter_scans() groups them the same way
+            the real driver does.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Initializations] """
+SOURCE = None
+
+
+class RPLidarException(Exception):
+    pass
+
+
+class RPLidar:
+    def __init__(self, motor_pin, port, baudrate=115200, timeout=1, logging=False):
+        if SOURCE is None:
+            raise RPLidarException(f"{port}: no simulated lidar source")
+        self.port = port
+        self.source = SOURCE
+        self.motor_running = True
+        self.scanning = False
+
+    def info(self):
+        return {'model': 24, 'firmware': (1, 29), 'hardware': 7, 'serialnumber': 'SIL'}
+
+    @property
+    def health(self):
+        return ('Good', 0)
+
+    def iter_measurements(self, max_buf_meas=500):
+        self.scanning = True
+        try:
+            yield from self.source.measurements()
+        finally:
+            self.scanning = False
+
+    def iter_scans(self, max_buf_meas=500, min_len=5):
+        scan = []
+        for new_scan, quality, angle, distance in self.iter_measurements(max_buf_meas):
+            if new_scan:
+                if len(scan) > min_len:
+                    yield scan
+                scan = []
+            if quality > 0 and distance > 0:
+                scan.append((quality, angle, distance))
+
+    def start_motor(self):
+        self.motor_running = True
+
+    def stop_motor(self):
+        self.motor_running = False
+
+    def stop(self):
+        self.scanning = False
+
+    def clear_input(self):
+        pass
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
@@ -0,0 +1,274 @@
+"""
+\file       machine.py
+\brief      SIL stand-in for MicroPython's machine module (the parts EEC195_Team5.py uses)
+            Interrupts are simulated: a handler runs under micropython.irq_lock (what
+            disable_irq() takes), then the micropython.schedule() queue is drained, like
+            the RP2040 returning from an IRQ. Sources of interrupts:
+
+              Pin     drive(pin_id, level) from the harness (speed sensor, Pi GPIO wiring)
+              Timer   periodic callbacks on the SimClock (set CLOCK before the firmware boots)
+              UART    a reader thread on the pty master in UART_FDS[id]; rx_hooks are called
+                      with the bytes of each interrupt once the scheduled parser has run
+
+            on_output(pin_id, callback) lets the harness see output pin changes (Pico_Rdy).
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import fcntl
+import os
+import select
+import struct
+import termios
+import threading
+import micropython
+
+""" [Initializations] """
+CLOCK = None  # sim_clock.SimClock, set by the harness
+UART_FDS = {}  # UART id -> file descriptor of the pty master
+rx_hooks = []  # callback(uart_id, data) after each UART interrupt
+pins = {}  # id -> newest Pin created for it
+pwms = {}  # pin id -> PWM
+_levels = {}  # id -> level driven from outside
+_output_callbacks = {}  # id -> [callback(level)]
+_running = True
+
+
+def irq(handler, arg):
+    """Runs an interrupt handler, then whatever it (or anything before it) scheduled."""
+    if not _running:
+        return
+    with micropython.irq_lock:
+        handler(arg)
+    micropython.run_scheduled()
+
+
+def disable_irq():
+    micropython.irq_lock.acquire()
+    return 0
+
+
+def enable_irq(state=0):
+    micropython.irq_lock.release()
+
+
+def drive(pin_id, level):
+    """Sets an input pin from outside, raising its IRQ on a matching edge."""
+    old = _levels.get(pin_id, 0)
+    level = 1 if level else 0
+    _levels[pin_id] = level
+    pin = pins.get(pin_id)
+    if pin is None or pin._handler is None or old == level:
+        return
+    if (level and pin._trigger & Pin.IRQ_RISING) or (not level and pin._trigger & Pin.IRQ_FALLING):
+        irq(pin._handler, pin)
+
+
+def pulse(pin_id):
+    """One rising edge (and back low)."""
+    drive(pin_id, 1)
+    drive(pin_id, 0)
+
+
+def on_output(pin_id, callback):
+    _output_callbacks.setdefault(pin_id, []).append(callback)
+
+
+def duty_ns_of(pin_id, default=0):
+    pwm = pwms.get(pin_id)
+    return default if pwm is None else pwm._duty_ns
+
+
+def level_of(pin_id):
+    return _levels.get(pin_id, 0)
+
+
+def shutdown():
+    """Stops interrupt delivery and the UART reader threads."""
+    global _running
+    _running = False
+
+
+def freq(hz=None):
+    return 125000000
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self._handler = None
+        self._trigger = 0
+        pins[id] = self
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if v is None:
+            return _levels.get(self.id, 0)
+        level = 1 if v else 0
+        changed = _levels.get(self.id, 0) != level
+        _levels[self.id] = level
+        if changed:
+            for callback in _output_callbacks.get(self.id, ()):
+                callback(level)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        self._handler = handler
+        self._trigger = trigger
+
+
+class PWM:
+    def __init__(self, pin, freq=None, duty_u16=None, duty_ns=None):
+        self.pin = pin
+        self._freq = freq
+        self._duty_ns = 0
+        pwms[pin.id] = self
+        if duty_ns is not None:
+            self.duty_ns(duty_ns)
+        elif duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        self._freq = value
+
+    def duty_ns(self, value=None):
+        if value is None:
+            return self._duty_ns
+        self._duty_ns = value
+
+    def duty_u16(self, value=None):
+        period_ns = 1e9 / self._freq
+        if value is None:
+            return int(self._duty_ns / period_ns * 65535)
+        self._duty_ns = int(value / 65535 * period_ns)
+
+    def deinit(self):
+        self._duty_ns = 0
+
+
+class ADC:
+    def __init__(self, pin):
+        self.pin = pin
+
+    def read_u16(self):
+        return 0
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self._handle = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, freq=-1, period=-1, callback=None):
+        self.deinit()
+        seconds = 1.0 / freq if freq > 0 else period / 1000
+        if mode == Timer.ONE_SHOT:
+            def fire():
+                self.deinit()
+                irq(callback, self)
+        else:
+            def fire():
+                irq(callback, self)
+        self._handle = CLOCK.every(seconds, fire)
+
+    def deinit(self):
+        if self._handle is not None:
+            CLOCK.cancel(self._handle)
+            self._handle = None
+
+
+class UART:
+    IRQ_RX = 4
+    IRQ_RXIDLE = 64
+    IRQ_TXIDLE = 32
+    IRQ_BREAK = 512
+
+    def __init__(self, id, baudrate=115200, bits=8, parity=None, stop=1, tx=None, rx=None, timeout=0, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.fd = UART_FDS[id]
+        os.set_blocking(self.fd, False)
+        self._handler = None
+        self._thread = None
+        self._rx_log = bytearray()
+
+    def any(self):
+        return struct.unpack('i', fcntl.ioctl(self.fd, termios.FIONREAD, b'\0\0\0\0'))[0]
+
+    def _read(self, n):
+        try:
+            data = os.read(self.fd, n)
+        except (BlockingIOError, OSError):
+            return b''
+        self._rx_log += data
+        return data
+
+    def readinto(self, buf, nbytes=None):
+        data = self._read(len(buf) if nbytes is None else nbytes)
+        if not data:
+            return None
+        buf[:len(data)] = data
+        return len(data)
+
+    def read(self, nbytes=-1):
+        data = self._read(nbytes if nbytes > 0 else max(1, self.any()))
+        return data or None
+
+    def write(self, buf):
+        view = memoryview(buf)
+        while view:
+            try:
+                written = os.write(self.fd, view)
+            except BlockingIOError:
+                select.select([], [self.fd], [], 0.01)
+                continue
+            view = view[written:]
+        return len(buf)
+
+    def irq(self, handler=None, trigger=IRQ_RXIDLE, hard=False):
+        self._handler = handler
+        if handler is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._reader, name=f'uart{self.id}-irq', daemon=True)
+            self._thread.start()
+
+    def _reader(self):
+        while _running:
+            readable, _, _ = select.select([self.fd], [], [], 0.05)
+            if not readable or self._handler is None:
+                continue
+            irq(self._handler, self)
+            data = bytes(self._rx_log)
+            self._rx_log.clear()
+            if data:
+                for hook in rx_hooks:
+                    hook(self.id, data)
@@ -0,0 +1,52 @@
+"""
+\file       micropython.py
+\brief      SIL stand-in for MicroPython's micropython module
+            schedule() queues the callback like the real one (8 slots, RuntimeError when
+            full); machine.py runs the queue after every simulated interrupt. There is no
+            viper; led_frames.py only compiles its viper blit under MicroPython.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+from collections import deque
+import threading
+
+""" [Constants] """
+SCHEDULE_DEPTH = 8  # MICROPY_SCHEDULER_DEPTH on the RP2040 port
+
+""" [Initializations] """
+irq_lock = threading.RLock()  # Held while an IRQ or scheduled callback runs, and between disable_irq / enable_irq
+pending = deque()
+scheduled_total = 0
+
+
+def schedule(func, arg):
+    global scheduled_total
+    if len(pending) >= SCHEDULE_DEPTH:
+        raise RuntimeError('schedule queue full')
+    pending.append((func, arg))
+    scheduled_total += 1
+
+
+def run_scheduled():
+    """Runs queued callbacks, including ones they schedule, until the queue is empty."""
+    while True:
+        with irq_lock:
+            if not pending:
+                return
+            func, arg = pending.popleft()
+            func(arg)
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def const(value):
+    return value
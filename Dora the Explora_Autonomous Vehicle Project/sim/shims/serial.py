@@ -0,0 +1,111 @@
+"""
+\file       serial.py
+\brief      SIL stand-in for pyserial's Serial, on one end of a pty pair
+            PORTS maps the device name the Pi code opens ('/dev/ttyS0') to the pty slave;
+            the Pico shim's UART owns the master, so bytes really cross a kernel tty.
+            write_hooks are called with (port, data) just before each write (the harness
+            timestamps commands there; after the write the Pico side may already have them).
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import fcntl
+import os
+import select
+import struct
+import termios
+import time
+import tty
+
+""" [Constants] """
+PARITY_NONE = 'N'
+PARITY_EVEN = 'E'
+PARITY_ODD = 'O'
+FIVEBITS = 5
+SIXBITS = 6
+SEVENBITS = 7
+EIGHTBITS = 8
+STOPBITS_ONE = 1
+STOPBITS_TWO = 2
+
+""" [Initializations] """
+PORTS = {}  # Device name -> pty slave path
+write_hooks = []
+
+
+class SerialException(IOError):
+    pass
+
+
+class Serial:
+    def __init__(self, port=None, baudrate=9600, bytesize=EIGHTBITS, parity=PARITY_NONE, stopbits=STOPBITS_ONE,
+                 timeout=None, write_timeout=None, **kwargs):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.fd = None
+        if port is not None:
+            self.open()
+
+    def open(self):
+        path = PORTS.get(self.port, self.port)
+        try:
+            self.fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        except OSError as e:
+            raise SerialException(f"could not open port {self.port}: {e}")
+        tty.setraw(self.fd)
+
+    @property
+    def is_open(self):
+        return self.fd is not None
+
+    @property
+    def in_waiting(self):
+        return struct.unpack('i', fcntl.ioctl(self.fd, termios.FIONREAD, b'\0\0\0\0'))[0]
+
+    def read(self, size=1):
+        data = bytearray()
+        deadline = None if self.timeout is None else time.perf_counter() + self.timeout
+        while len(data) < size:
+            try:
+                chunk = os.read(self.fd, size - len(data))
+            except BlockingIOError:
+                chunk = b''
+            data += chunk
+            if len(data) >= size:
+                break
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                break
+            select.select([self.fd], [], [], remaining)
+        return bytes(data)
+
+    def write(self, data):
+        for hook in write_hooks:
+            hook(self.port, data)
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self.fd, view)
+            except BlockingIOError:
+                select.select([], [self.fd], [], 0.01)
+                continue
+            view = view[written:]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        termios.tcflush(self.fd, termios.TCIFLUSH)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
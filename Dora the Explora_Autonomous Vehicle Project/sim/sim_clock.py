@@ -0,0 +1,133 @@
+"""
+\file       sim_clock.py
+\brief      Virtual time for the software-in-the-loop simulator
+            Everything simulated (Pico ticks_us / sleep, machine.Timer, the vehicle model,
+            the Pi's time.monotonic / time.time) reads SimClock.now() instead of the wall clock.
+
+              stepped  (speed=None)  time only moves when the lidar source advances it, so
+                                     a run goes as fast as the Pi and Pico code can keep up
+              paced    (speed=x)     virtual time = real time * x
+
+            Periodic callbacks (machine.Timer, the vehicle step) are fired by whoever
+            advances the clock, or in paced mode also by a ticker thread.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import threading
+import time
+
+""" [Constants] """
+TICKER_PERIOD = 0.001  # Real seconds between timer checks in paced mode
+MAX_CATCH_UP = 10  # Periods a timer may fall behind before missed ticks are skipped
+
+
+class SimClock:
+    def __init__(self, speed=None):
+        """
+        :param speed <float>: Virtual seconds per real second, None = stepped
+        """
+        self.speed = speed
+        self.stopped = False
+        self._now = 0.0
+        self._start = time.perf_counter()
+        self._cond = threading.Condition()
+        self._timers = []  # [due, period, callback]
+        self._timer_lock = threading.Lock()
+        self._fire_lock = threading.Lock()
+        self._ticker = None
+
+    def now(self):
+        """:return: virtual seconds since the simulation started"""
+        if self.speed is None:
+            return self._now
+        return (time.perf_counter() - self._start) * self.speed
+
+    def advance_to(self, t):
+        """
+        Moves virtual time to t (stepped), or waits until it gets there (paced), then fires due timers.
+
+        :param t <float>: Virtual seconds
+        """
+        if self.speed is None:
+            with self._cond:
+                if t > self._now:
+                    self._now = t
+                    self._cond.notify_all()
+        else:
+            delay = t / self.speed - (time.perf_counter() - self._start)
+            if delay > 0:
+                time.sleep(delay)
+        self.fire_due()
+
+    def sleep(self, seconds):
+        """Blocks the calling thread for `seconds` of virtual time (returns early once stopped)."""
+        if self.speed is not None:
+            time.sleep(seconds / self.speed)
+            return
+        with self._cond:
+            end = self._now + seconds
+            while self._now < end and not self.stopped:
+                self._cond.wait(0.05)
+
+    def every(self, period, callback):
+        """
+        Calls callback() every `period` virtual seconds.
+
+        :return: handle for cancel()
+        """
+        timer = [self.now() + period, period, callback]
+        with self._timer_lock:
+            self._timers.append(timer)
+        return timer
+
+    def cancel(self, timer):
+        with self._timer_lock:
+            if timer in self._timers:
+                self._timers.remove(timer)
+
+    def fire_due(self):
+        """Runs every timer callback that is due, in time order. Re-entrant calls return at once."""
+        if not self._fire_lock.acquire(blocking=False):
+            return
+        try:
+            now = self.now()
+            while True:
+                with self._timer_lock:
+                    due = [timer for timer in self._timers if timer[0] <= now]
+                    if not due:
+                        return
+                    timer = min(due, key=lambda entry: entry[0])
+                    if now - timer[0] > MAX_CATCH_UP * timer[1]:
+                        timer[0] = now  # Fell far behind (paced run on a busy machine): skip ahead
+                    timer[0] += timer[1]
+                timer[2]()
+        finally:
+            self._fire_lock.release()
+
+    def start_ticker(self):
+        """Paced mode: fires timers from a background thread even when nothing else advances the clock."""
+        if self.speed is None or self._ticker is not None:
+            return
+
+        def tick():
+            while not self.stopped:
+                self.fire_due()
+                time.sleep(TICKER_PERIOD)
+
+        self._ticker = threading.Thread(target=tick, name='sim-ticker', daemon=True)
+        self._ticker.start()
+
+    def stop(self):
+        """Releases every sleeper; timers stop firing."""
+        with self._cond:
+            self.stopped = True
+            self._cond.notify_all()
+        with self._timer_lock:
+            self._timers.clear()
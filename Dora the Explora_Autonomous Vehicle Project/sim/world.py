@@ -0,0 +1,158 @@
+"""
+\file       world.py
+\brief      2D track and vehicle model for the software-in-the-loop simulator
+            Track is an oval corridor (two straights joined by half circles) built from
+            wall segments; cast() ray-casts a batch of lidar bearings against every
+            segment at once with NumPy. Vehicle is a kinematic bicycle model driven by
+            the Pico's actual PWM / direction pin outputs, and it produces the speed
+            sensor edges the firmware counts for odometry.
+
+            Units are mm, radians and seconds. World angles are counter-clockwise from +x;
+            lidar angles follow the RPLidar (clockwise, 90 = straight ahead, see
+            pid_control.py), so a lidar angle a points at heading + 90 deg - a.
+
+\authors    Corbin Warmbier
+            Brian Barcenas
+            Akhil Sharma
+            Alize De Leon
+
+\date       Initial: 10/18/26  |  Last: 10/18/26
+"""
+
+""" [Imports] """
+import math
+import numpy as np
+
+""" [Constants] """
+STRAIGHT = 6000.0  # Length of each straight
+RADIUS = 2000.0  # Turn radius of the corridor centre line
+WIDTH = 1400.0  # Corridor width
+ARC_SEGMENTS = 24  # Wall segments per half circle
+MAX_RANGE = 4000.0  # Walls further than this give no return (0), which pid_control reads as open space
+
+# Same numbers as pico/EEC195_Team5.py
+SERVO_CENTER_NS = 1500000
+SERVO_NS_FULL = 400000  # Servo duty change for full lock
+MOTOR_SPD_MAX = 200000  # Motor duty (ns) at full speed
+EDGE_MM = 12881 / 3 * 0.0254  # Wheel travel between two speed sensor edges (~109 mm)
+
+WHEELBASE = 260.0
+MAX_STEER = math.radians(30)  # Front wheel angle at full servo lock
+MAX_SPEED = 5000.0  # mm/s at 100% duty (0.21 duty ~ 1 m/s)
+SPEED_LAG = 0.3  # Seconds, first order motor / drivetrain response
+HALF_WIDTH = 150.0  # Clearance below which the car counts as touching a wall
+
+
+def stadium(straight, radius, arc_segments=ARC_SEGMENTS):
+    """
+    :param straight <float>: Length of the straights
+    :param radius <float>: Half circle radius
+    :return: (n, 2) closed polyline (last point == first), counter-clockwise from the right turn
+    """
+    half = straight / 2
+    arc = np.linspace(-math.pi / 2, math.pi / 2, arc_segments + 1)
+    right = np.stack((half + radius * np.cos(arc), radius * np.sin(arc)), axis=1)
+    left = np.stack((-half - radius * np.cos(arc), -radius * np.sin(arc)), axis=1)
+    points = np.concatenate((right, left))  # The closing segment is the bottom straight
+    return np.concatenate((points, points[:1]))
+
+
+class Track:
+    """Walls as segments a[i] -> b[i]."""
+    def __init__(self, straight=STRAIGHT, radius=RADIUS, width=WIDTH, max_range=MAX_RANGE):
+        self.max_range = max_range
+        walls = [stadium(straight, radius - width / 2), stadium(straight, radius + width / 2)]
+        self.a = np.concatenate([wall[:-1] for wall in walls])
+        self.b = np.concatenate([wall[1:] for wall in walls])
+        self._e = self.b - self.a
+        self.start = (0.0, -radius, 0.0)  # Middle of the bottom straight, driving counter-clockwise
+
+    def cast(self, x, y, bearings):
+        """
+        :param x, y <float>: Ray origin
+        :param bearings <np.ndarray>: World angles of the rays
+        :return: distance to the first wall per ray, 0 beyond max_range
+        """
+        dx = np.cos(bearings)[:, None]
+        dy = np.sin(bearings)[:, None]
+        ax = self.a[:, 0] - x
+        ay = self.a[:, 1] - y
+        ex = self._e[:, 0]
+        ey = self._e[:, 1]
+        # origin + t * d = a + u * e  ->  t = (a - o) x e / d x e,  u = (a - o) x d / d x e
+        with np.errstate(divide='ignore', invalid='ignore'):
+            denom = dx * ey - dy * ex
+            t = (ax * ey - ay * ex) / denom
+            u = (ax * dy - ay * dx) / denom
+        t = np.where((t > 0) & (u >= 0) & (u <= 1), t, np.inf).min(axis=1)
+        t[t > self.max_range] = 0.0
+        return t
+
+    def clearance(self, x, y):
+        """:return: distance from (x, y) to the nearest wall"""
+        px = x - self.a[:, 0]
+        py = y - self.a[:, 1]
+        ex = self._e[:, 0]
+        ey = self._e[:, 1]
+        u = np.clip((px * ex + py * ey) / (ex * ex + ey * ey), 0.0, 1.0)
+        return float(np.hypot(px - u * ex, py - u * ey).min())
+
+
+class Vehicle:
+    """
+    Kinematic bicycle model.
+
+    actuators() returns the Pico outputs (servo duty ns, motor duty ns, INA, INB);
+    on_edge() is called every EDGE_MM of wheel travel (the speed sensor).
+    """
+    def __init__(self, track, actuators, on_edge=None):
+        self.track = track
+        self.actuators = actuators
+        self.on_edge = on_edge
+        self.x, self.y, self.heading = track.start
+        self.speed = 0.0
+        self.travelled = 0.0
+        self.edges = 0
+        self.collisions = 0
+        self.min_clearance = track.clearance(self.x, self.y)
+        self._to_edge = EDGE_MM
+        self._touching = False
+
+    def step(self, dt):
+        servo_ns, motor_ns, ina, inb = self.actuators()
+        steer = max(-1.0, min(1.0, (SERVO_CENTER_NS - servo_ns) / SERVO_NS_FULL))  # + = right
+        if ina and not inb:
+            direction = 1.0
+        elif inb and not ina:
+            direction = -1.0
+        else:
+            direction = 0.0  # Both low (brake) or both high
+        target = direction * max(0.0, min(1.0, motor_ns / MOTOR_SPD_MAX)) * MAX_SPEED
+        self.speed += (target - self.speed) * min(1.0, dt / SPEED_LAG)
+
+        self.heading -= self.speed / WHEELBASE * math.tan(steer * MAX_STEER) * dt  # Right turn = clockwise
+        self.x += self.speed * math.cos(self.heading) * dt
+        self.y += self.speed * math.sin(self.heading) * dt
+
+        moved = abs(self.speed) * dt
+        self.travelled += moved
+        self._to_edge -= moved
+        while self._to_edge <= 0:
+            self._to_edge += EDGE_MM
+            self.edges += 1
+            if self.on_edge is not None:
+                self.on_edge()
+
+        clearance = self.track.clearance(self.x, self.y)
+        self.min_clearance = min(self.min_clearance, clearance)
+        touching = clearance < HALF_WIDTH
+        if touching and not self._touching:
+            self.collisions += 1
+        self._touching = touching
+
+    def bearings(self, lidar_angles):
+        """
+        :param lidar_angles <np.ndarray>: RPLidar angles in degrees
+        :return: world angles (radians)
+        """
+        return self.heading + np.radians(90.0 - lidar_angles)